@@ -0,0 +1,454 @@
+"""
+Matching Engine Micro-Benchmarks
+Times the matching-engine primitives of both simulation scripts (the per-user API,
+the batch kernels the simulations run and an end-to-end round) at the population
+sizes of the published passes and records machine-readable JSON results. Run the
+same suite against another checkout (e.g. a git worktree of the baseline commit)
+with --tree to compare the two:
+    python Engine_Benchmarks.py run --tree ../baseline-worktree --output baseline.json
+    python Engine_Benchmarks.py run --sizes 22,500 --only dl.synergy --output after.json
+    python Engine_Benchmarks.py compare baseline.json after.json
+Benchmarks an older engine has no function for are reported as unavailable there.
+compare exits with status 1 when any benchmark got slower (or used more memory)
+than the threshold allows, so an optimization is measured instead of assumed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import types
+from datetime import datetime, timezone
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Engine scripts relative to the repository root; --tree points at another checkout
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ENGINE_SCRIPTS = {
+    'mc': os.path.join('Technical_Validation', 'Monte_Carlo_Sims', 'Montecarlo_Simulation.py'),
+    'dl': os.path.join('Technical_Validation', 'MonteCarlo_AsymSym_DualLine_Sims',
+                       'MonteCarlo_AsymSym_DualLine_Simulation.py')
+}
+
+# Population sizes used by the published passes
+POPULATION_SIZES = [22, 500, 1000, 5000, 10000, 25000]
+
+# Every benchmark/size is called at least MIN_REPEATS times and until MIN_SECONDS have passed
+MIN_REPEATS = 5
+MAX_REPEATS = 1000
+MIN_SECONDS = 0.25
+LATENCY_PERCENTILES = [50, 90, 99]
+
+# compare flags a throughput drop (or peak memory growth) larger than this fraction
+REGRESSION_THRESHOLD = 0.10
+RESULTS_VERSION = 1
+BENCHMARK_SEED = 12345
+
+# ============================================================================
+# ENGINES AND INPUTS
+# ============================================================================
+# Inputs are built here from NumPy alone, in the representation every version of
+# the engines accepts (52-element 0/1 interest vectors; packed masks for the batch
+# kernels), so the same benchmarks run against an older checkout via --tree.
+
+# Scripts are cut at this banner when present: older versions run the prompts and
+# the whole simulation at import time below it
+ENGINE_CUT_MARKER = "# USER INPUT AND RUN SIMULATION"
+
+# The per-pair explain path builds every asymmetric path dict (~10 pairs/s)
+EXPLAIN_PAIRS = 8
+
+_ENGINES = {}
+
+class BenchmarkUnavailable(Exception):
+    """The engine being benchmarked does not have the function under test"""
+
+def engine_scripts(tree=REPOSITORY_DIR):
+    return {name: os.path.join(tree, relative) for name, relative in ENGINE_SCRIPTS.items()}
+
+def load_engine(name, tree=REPOSITORY_DIR):
+    """Import one simulation script of a checkout as a module (engine only; main() is not run)"""
+    key = (name, os.path.abspath(tree))
+    if key not in _ENGINES:
+        path = engine_scripts(tree)[name]
+        with open(path) as f:
+            source = f.read()
+        if ENGINE_CUT_MARKER in source:
+            source = source[:source.index(ENGINE_CUT_MARKER)]
+        module = types.ModuleType(f"{name}_engine_{len(_ENGINES)}")
+        module.__file__ = path
+        exec(compile(source, path, "exec"), module.__dict__)
+        _ENGINES[key] = module
+    return _ENGINES[key]
+
+def require(engine, *names):
+    """Raise BenchmarkUnavailable unless the engine defines every name"""
+    missing = [name for name in names if not hasattr(engine, name)]
+    if missing:
+        raise BenchmarkUnavailable(", ".join(missing))
+
+def make_vectors(size):
+    """Seeded population of 5-interest users as a size x 52 0/1 array"""
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    picks = np.argsort(rng.random((size, 52)), axis=1)[:, :5]
+    vectors = np.zeros((size, 52), dtype=np.int64)
+    np.put_along_axis(vectors, picks, 1, axis=1)
+    return vectors
+
+def make_masks(size):
+    """The same population packed as uint64 masks (bit i set for interest i)"""
+    return (make_vectors(size).astype(np.uint64) << np.arange(52, dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+
+def make_users(size):
+    """{user_id: interest vector}, the form run_matching_round has always taken"""
+    return {f"User_{i}": vector for i, vector in enumerate(make_vectors(size).tolist())}
+
+def make_alignments(engine, size):
+    return [engine.compute_alignment(vector, engine.PERSONAS) for vector in make_vectors(size).tolist()]
+
+def make_pairs(size, limit=None):
+    """Seeded (row A, row B) pairs covering the population, at most limit of them"""
+    rows = np.random.default_rng(BENCHMARK_SEED).permutation(size)
+    pairs = rows[:2 * (size // 2)].reshape(-1, 2)
+    return pairs[:limit] if limit is not None else pairs
+
+def make_weighted_pairs(engine, size, limit):
+    """(weighted_A, weighted_B) apply_ladder_bonus dicts for up to limit pairs of the population"""
+    weighted = [engine.apply_ladder_bonus(scores) for scores in make_alignments(engine, size)]
+    return [(weighted[a], weighted[b]) for a, b in make_pairs(size, limit).tolist()]
+
+def make_dice_cache(engine, size):
+    require(engine, 'UserDiceCache')
+    return engine.UserDiceCache(make_masks(size))
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+# Each setup takes (engine, population size) and returns (call, ops_per_call): a
+# zero-argument callable doing one population-sized unit of work and the number of
+# operations (users or pairs) it processes. Setups raise BenchmarkUnavailable when
+# the engine predates the function, so older trees simply report fewer results.
+
+# ---------- Per-user / per-pair API (present in every version) ----------
+
+def bench_generate_random_user_interests(engine, size):
+    return lambda: [engine.generate_random_user_interests() for _ in range(size)], size
+
+def bench_compute_alignment(engine, size):
+    vectors = make_vectors(size).tolist()
+    return lambda: [engine.compute_alignment(vector, engine.PERSONAS) for vector in vectors], size
+
+def bench_create_weighted_dice(engine, size):
+    alignments = make_alignments(engine, size)
+    return lambda: [engine.create_weighted_dice(scores, engine.LADDER_BONUSES) for scores in alignments], size
+
+def bench_roll_weighted_dice(engine, size):
+    dice = [engine.create_weighted_dice(scores, engine.LADDER_BONUSES) for scores in make_alignments(engine, size)]
+    return lambda: [engine.roll_weighted_dice(user_dice) for user_dice in dice], size
+
+def bench_apply_ladder_bonus(engine, size):
+    alignments = make_alignments(engine, size)
+    return lambda: [engine.apply_ladder_bonus(scores) for scores in alignments], size
+
+def bench_matching_round(engine, size):
+    """End-to-end round through the public API: select a persona for every user, then pair them"""
+    users = make_users(size)
+    return lambda: engine.pair_users(engine.run_matching_round(users)), size
+
+def bench_pair_users(engine, size):
+    """pair_users alone, on selections precomputed once by run_matching_round"""
+    random.seed(BENCHMARK_SEED)
+    selections = engine.run_matching_round(make_users(size))
+    return lambda: engine.pair_users(selections), size
+
+def bench_calculate_connection_strength(engine, size):
+    pairs = make_weighted_pairs(engine, size, limit=256)
+    return lambda: [engine.calculate_connection_strength(a, b) for a, b in pairs], len(pairs)
+
+def bench_explain_synergy_paths(engine, size):
+    """calculate_synergy_score: explain mode, every path dict built (not the simulation hot path)"""
+    connections = [engine.calculate_connection_strength(a, b)
+                   for a, b in make_weighted_pairs(engine, size, limit=EXPLAIN_PAIRS)]
+    return lambda: [engine.calculate_synergy_score(AB, BA) for AB, BA in connections], len(connections)
+
+# ---------- Batch kernels (the simulation hot path) ----------
+
+def bench_compute_alignment_batch(engine, size):
+    require(engine, 'compute_alignment_batch')
+    masks = make_masks(size)
+    return lambda: engine.compute_alignment_batch(masks), size
+
+def bench_create_weighted_dice_batch(engine, size):
+    require(engine, 'compute_alignment_batch', 'create_weighted_dice_batch')
+    percentages, order = engine.compute_alignment_batch(make_masks(size))
+    sorted_percentages = np.take_along_axis(percentages, order, axis=1)
+    return lambda: engine.create_weighted_dice_batch(sorted_percentages, engine.LADDER_BONUSES), size
+
+def bench_user_dice_cache(engine, size):
+    require(engine, 'UserDiceCache')
+    masks = make_masks(size)
+    return lambda: engine.UserDiceCache(masks), size
+
+def bench_roll_weighted_dice_batch(engine, size):
+    require(engine, 'roll_weighted_dice_batch')
+    dice_cache = make_dice_cache(engine, size)
+    uniforms = np.random.default_rng(BENCHMARK_SEED).random(size)
+    return lambda: engine.roll_weighted_dice_batch(dice_cache.cumulative, uniforms, dice_cache.order), size
+
+def bench_pair_users_array(engine, size):
+    require(engine, 'pair_users_array')
+    persona_idx = np.random.default_rng(BENCHMARK_SEED).integers(0, 16, size)
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    return lambda: engine.pair_users_array(persona_idx, rng), size
+
+def bench_batch_round(engine, size):
+    """End-to-end round as the simulation loop runs it: dice rolls from the cache, then array pairing"""
+    require(engine, 'roll_weighted_dice_batch', 'pair_users_array')
+    dice_cache = make_dice_cache(engine, size)
+    rng = np.random.default_rng(BENCHMARK_SEED)
+
+    def round_once():
+        persona_idx, _ = engine.roll_weighted_dice_batch(dice_cache.cumulative, rng.random(size), dice_cache.order)
+        return engine.pair_users_array(persona_idx, rng)
+    return round_once, size
+
+def bench_simulate_once(engine, size):
+    """One full single-round simulation (population, dice, round, bookkeeping)"""
+    simulate = getattr(engine, 'simulate_once', None) or getattr(engine, 'simulate_once_with_connection_tracking', None)
+    if simulate is None:
+        raise BenchmarkUnavailable("simulate_once")
+    seed_sequence = np.random.SeedSequence(BENCHMARK_SEED)
+    return lambda: simulate(0, seed_sequence, size, 1), size
+
+def bench_connection_strength_batch(engine, size):
+    require(engine, 'weighted_scores_batch', 'connection_strength_batch')
+    weighted = engine.weighted_scores_batch(make_masks(size))
+    pairs = make_pairs(size)
+    return lambda: engine.connection_strength_batch(weighted[pairs[:, 0]], weighted[pairs[:, 1]]), len(pairs)
+
+def bench_synergy_scores_batch(engine, size):
+    require(engine, 'weighted_scores_batch', 'connection_strength_batch', 'synergy_scores_batch')
+    weighted = engine.weighted_scores_batch(make_masks(size))
+    pairs = make_pairs(size)
+    strengths_AB, strengths_BA = engine.connection_strength_batch(weighted[pairs[:, 0]], weighted[pairs[:, 1]])
+    return lambda: engine.synergy_scores_batch(strengths_AB, strengths_BA), len(pairs)
+
+def bench_synergy_cache(engine, size):
+    """SynergyCache.scores from a cold cache (profile dedup + kernel for the distinct profiles)"""
+    require(engine, 'weighted_scores_batch', 'SynergyCache')
+    weighted = engine.weighted_scores_batch(make_masks(size))
+    pairs = make_pairs(size)
+    weighted_A, weighted_B = weighted[pairs[:, 0]], weighted[pairs[:, 1]]
+    return lambda: engine.SynergyCache().scores(weighted_A, weighted_B), len(pairs)
+
+BATCH_BENCHMARKS = ['compute_alignment_batch', 'create_weighted_dice_batch', 'user_dice_cache',
+                    'roll_weighted_dice_batch', 'pair_users_array', 'batch_round', 'simulate_once']
+
+# Per-pair connection benchmarks take at most 256 pairs (EXPLAIN_PAIRS for the explain path);
+# the batch connection kernels pair up the whole population
+BENCHMARKS = {
+    f"{engine}.{function}": (engine, function, globals()[f"bench_{function}"])
+    for engine, functions in {
+        'mc': ['generate_random_user_interests', 'compute_alignment', 'create_weighted_dice',
+               'roll_weighted_dice', 'matching_round', 'pair_users'] + BATCH_BENCHMARKS,
+        'dl': ['generate_random_user_interests', 'compute_alignment', 'apply_ladder_bonus',
+               'create_weighted_dice', 'roll_weighted_dice', 'matching_round', 'pair_users'] + BATCH_BENCHMARKS +
+              ['calculate_connection_strength', 'connection_strength_batch', 'synergy_scores_batch',
+               'synergy_cache', 'explain_synergy_paths']
+    }.items()
+    for function in functions
+}
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def time_calls(call, min_seconds=MIN_SECONDS):
+    """Per-call latencies (seconds) of repeated calls"""
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < MAX_REPEATS and (len(latencies) < MIN_REPEATS
+                                            or time.perf_counter() - started < min_seconds):
+        call_started = time.perf_counter_ns()
+        call()
+        latencies.append(time.perf_counter_ns() - call_started)
+    return np.array(latencies) / 1e9
+
+def peak_memory(call):
+    """Peak bytes allocated (Python and NumPy, via tracemalloc) during one call"""
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_benchmark(name, size, min_seconds=MIN_SECONDS, tree=REPOSITORY_DIR):
+    """One benchmark at one population size (raises BenchmarkUnavailable for older engines)"""
+    engine_name, function, setup = BENCHMARKS[name]
+    engine = load_engine(engine_name, tree)
+    random.seed(BENCHMARK_SEED)
+    call, ops_per_call = setup(engine, size)
+    call()  # warm-up
+
+    latencies = time_calls(call, min_seconds)
+    return {
+        'name': name,
+        'engine': engine_name,
+        'function': function,
+        'population_size': size,
+        'ops_per_call': ops_per_call,
+        'calls': len(latencies),
+        'ops_per_sec': ops_per_call * len(latencies) / latencies.sum(),
+        'latency_seconds': {
+            **{f"p{q}": float(np.percentile(latencies, q)) for q in LATENCY_PERCENTILES},
+            'mean': float(latencies.mean()),
+            'min': float(latencies.min()),
+            'max': float(latencies.max())
+        },
+        'peak_memory_bytes': peak_memory(call)
+    }
+
+def select_benchmarks(only=None):
+    """Benchmark names matching any of the given names or prefixes (all when None)"""
+    if not only:
+        return list(BENCHMARKS)
+    selected = [name for name in BENCHMARKS if any(name == item or name.startswith(item) for item in only)]
+    if not selected:
+        raise ValueError(f"no benchmarks match {', '.join(only)} (available: {', '.join(BENCHMARKS)})")
+    return selected
+
+def run_suite(sizes=POPULATION_SIZES, only=None, min_seconds=MIN_SECONDS, tree=REPOSITORY_DIR):
+    """Run the selected benchmarks at every size and return the JSON-ready results"""
+    results = []
+    unavailable = []
+    for name in select_benchmarks(only):
+        for size in sizes:
+            try:
+                result = run_benchmark(name, size, min_seconds, tree)
+            except BenchmarkUnavailable as missing:
+                print(f"  {name:40s} not available in this tree ({missing})")
+                unavailable.append(name)
+                break
+            results.append(result)
+            print(f"  {name:40s} {size:>6,} users: {result['ops_per_sec']:>14,.0f} ops/s, "
+                  f"p50 {result['latency_seconds']['p50']*1000:9.3f} ms, "
+                  f"peak {result['peak_memory_bytes'] / 2**20:8.2f} MiB")
+    return {
+        'version': RESULTS_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'engine_tree': os.path.abspath(tree)
+        },
+        'benchmarks': results,
+        'unavailable': unavailable
+    }
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+
+def compare_results(baseline, candidate, threshold=REGRESSION_THRESHOLD):
+    """
+    Match benchmarks by (name, population_size) and flag regressions: throughput
+    below (1 - threshold) x baseline, or peak memory above (1 + threshold) x baseline.
+    Returns (rows, unmatched, missing): rows with the throughput/memory ratios and
+    regression flags, the candidate benchmarks the baseline has no result for, and the
+    (name, population_size) baseline results the candidate lacks, which count as failures.
+    """
+    base = {(row['name'], row['population_size']): row for row in baseline['benchmarks']}
+    measured = {(row['name'], row['population_size']) for row in candidate['benchmarks']}
+    missing = [key for key in base if key not in measured]
+    rows = []
+    unmatched = []
+    for row in candidate['benchmarks']:
+        key = (row['name'], row['population_size'])
+        if key not in base:
+            if row['name'] not in unmatched:
+                unmatched.append(row['name'])
+            continue
+        old = base[key]
+        speed = row['ops_per_sec'] / old['ops_per_sec']
+        memory = row['peak_memory_bytes'] / max(old['peak_memory_bytes'], 1)
+        rows.append({
+            'name': row['name'],
+            'population_size': row['population_size'],
+            'speedup': speed,
+            'memory_ratio': memory,
+            'slower': speed < 1 - threshold,
+            'more_memory': memory > 1 + threshold
+        })
+    return rows, unmatched, missing
+
+def print_comparison(rows, unmatched=(), missing=(), threshold=REGRESSION_THRESHOLD):
+    """Print the comparison; returns the number of failures (regressions plus missing results)"""
+    print(f"{'Benchmark':40s} {'Users':>7s} {'Speedup':>9s} {'Memory':>8s}")
+    for row in rows:
+        flags = [label for label, flagged in (('SLOWER', row['slower']), ('MORE MEMORY', row['more_memory']))
+                 if flagged]
+        print(f"{row['name']:40s} {row['population_size']:>7,} {row['speedup']:>8.2f}x "
+              f"{row['memory_ratio']:>7.2f}x  {' '.join(flags)}")
+    regressions = sum(row['slower'] or row['more_memory'] for row in rows)
+    print()
+    print(f"{len(rows)} benchmarks compared, {regressions} regression(s) beyond {threshold:.0%}")
+    if unmatched:
+        print(f"{len(unmatched)} benchmark(s) without a baseline result (not compared): {', '.join(unmatched)}")
+    if missing:
+        print(f"{len(missing)} baseline result(s) missing from the candidate (FAILED): "
+              f"{', '.join(f'{name} @ {size:,}' for name, size in missing)}")
+    return regressions + len(missing)
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Matching engine micro-benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks and write a JSON results file")
+    run.add_argument("--output", default="benchmark_results.json")
+    run.add_argument("--sizes", type=lambda text: [int(value) for value in text.split(",")],
+                     default=POPULATION_SIZES, help="comma-separated population sizes")
+    run.add_argument("--only", type=lambda text: text.split(","),
+                     help="comma-separated benchmark names or prefixes (e.g. dl., mc.pair_users)")
+    run.add_argument("--min-seconds", type=float, default=MIN_SECONDS, dest="min_seconds")
+    run.add_argument("--tree", default=REPOSITORY_DIR,
+                     help="repository checkout whose engines are benchmarked (default: this one)")
+
+    compare = commands.add_parser("compare", help="flag regressions between two results files")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "run":
+        results = run_suite(args.sizes, args.only, args.min_seconds, args.tree)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    rows, unmatched, missing = compare_results(baseline, candidate, args.threshold)
+    return 1 if print_comparison(rows, unmatched, missing, args.threshold) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,909 @@
+"""
+Archetype Matching Engine - shared by the Monte Carlo simulations
+Data definitions, matching kernels, the precomputed dice lookup table,
+instrumentation, progress reporting and the simulation runner used by both
+Monte_Carlo_Sims/Montecarlo_Simulation.py and
+MonteCarlo_AsymSym_DualLine_Sims/MonteCarlo_AsymSym_DualLine_Simulation.py.
+"""
+
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+from dataclasses import asdict, dataclass, fields
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# ============================================================================
+# DATA DEFINITIONS
+# ============================================================================
+
+# 52 Interests
+INTERESTS = [
+    "cars", "gaming", "working_out", "photography", "cooking", "travel",
+    "motorcycles", "hiking", "painting", "fitness", "reading", "writing",
+    "yoga", "meditation", "mindfulness", "music", "spirituality", "gardening",
+    "fashion", "technology", "movies", "running", "cycling", "investing",
+    "architecture", "astronomy", "dancing", "fishing", "camping", "theater",
+    "sports", "philosophy", "podcasts", "design", "baking", "crafts",
+    "animals", "blogging", "anime", "history", "chess", "skateboarding",
+    "programming", "volunteering", "woodworking", "languages", "makeup",
+    "diy_projects", "journaling", "interior_design", "marine_biology",
+    "entrepreneurship"
+]
+
+# 16 Archetypes with their interest vectors (52 binary values each)
+PERSONAS = {
+    "System Weaver": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 1, 0, 1, 0, 1, 0, 0, 0, 1, 0, 0, 0],
+    "Data Drifter": [0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0],
+    "Grid Captain": [1, 1, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 1, 1, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+    "Circuit Jumper": [1, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 1],
+    "Soul Cartographer": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0],
+    "Dreamsmith": [0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 1, 1, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
+    "Pulse Guide": [0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 1, 1, 0],
+    "Vibe Rider": [0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    "Core Mason": [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 1, 1, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0],
+    "Harbor Keeper": [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 1, 1, 0, 0],
+    "Forge Handler": [1, 0, 1, 0, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0],
+    "Thread Bonder": [0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 1, 0, 0],
+    "Tinker Nomad": [1, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0],
+    "Inner Glider": [0, 0, 0, 1, 0, 0, 0, 0, 1, 1, 0, 0, 1, 1, 1, 1, 1, 0, 1, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
+    "Momentum Spark": [1, 1, 1, 0, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+    "Echo Prism": [0, 1, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0]
+}
+
+# Ladder Bonuses (rank 1-16)
+LADDER_BONUSES = [
+    0.60, 0.56, 0.55, 0.54, 0.53, 0.52, 0.51, 0.50,
+    0.49, 0.48, 0.45, 0.43, 0.42, 0.41, 0.20, 0.05
+]
+
+# Array views of PERSONAS used by the batch kernels (rows follow PERSONAS order)
+PERSONA_NAMES = list(PERSONAS.keys())
+
+PERSONA_INDEX = {name: idx for idx, name in enumerate(PERSONA_NAMES)}
+
+PERSONA_MATRIX = np.array([PERSONAS[name] for name in PERSONA_NAMES], dtype=np.int32)
+
+# Packed form: bit i of a mask is set when interest i is selected (52 bits fit in a uint64)
+PERSONA_MASKS = np.array(
+    [sum(1 << i for i, v in enumerate(PERSONAS[name]) if v == 1) for name in PERSONA_NAMES],
+    dtype=np.uint64
+)
+
+PERSONA_MASK_BY_NAME = dict(zip(PERSONA_NAMES, PERSONA_MASKS.tolist()))
+
+# Set-bit counts for every byte value (popcount fallback for NumPy < 2.0)
+BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# PERCENTAGE_TABLE[user_ones, matches] == round((matches / user_ones) * 100, 2),
+# built with Python's round so the batch kernel reproduces compute_alignment exactly
+PERCENTAGE_TABLE = np.array(
+    [[round((m / n) * 100, 2) if n else 0.0 for m in range(53)] for n in range(53)]
+)
+
+# ============================================================================
+# CORE MATCHING FUNCTIONS
+# ============================================================================
+
+def interests_to_mask(user_vector):
+    """Pack a 52-element 0/1 interest vector into an int bitmask (ints pass through)"""
+    if isinstance(user_vector, (int, np.integer)):
+        return int(user_vector)
+    return sum(1 << i for i, v in enumerate(user_vector) if v == 1)
+
+def mask_to_interests(mask):
+    """Unpack an interest bitmask back into a 52-element 0/1 vector"""
+    mask = int(mask)
+    return [(mask >> i) & 1 for i in range(52)]
+
+def popcount64(masks):
+    """Count set bits for every element of a uint64 mask array"""
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int32)
+    return BYTE_POPCOUNT[masks[..., None].view(np.uint8)].sum(axis=-1, dtype=np.int32)
+
+def generate_random_user_interests(num_interests=5, as_mask=False):
+    """Generate random user by selecting interests (as a 52-vector or a packed bitmask)"""
+    indices = random.sample(range(52), num_interests)
+    if as_mask:
+        return sum(1 << idx for idx in indices)
+    vector = [0] * 52
+    for idx in indices:
+        vector[idx] = 1
+    return vector
+
+def generate_user_population(num_users, num_interests=5, rng=None):
+    """
+    Generate a whole population as a uint64 array of packed interest masks.
+    With a NumPy Generator the interests are drawn in one vectorized call (the
+    smallest num_interests of 52 uniforms form a uniformly random subset).
+    """
+    if rng is None:
+        return np.array([generate_random_user_interests(num_interests, as_mask=True) for _ in range(num_users)],
+                        dtype=np.uint64)
+    chosen = np.argpartition(rng.random((num_users, 52)), num_interests - 1, axis=1)[:, :num_interests]
+    return np.bitwise_or.reduce(np.uint64(1) << chosen.astype(np.uint64), axis=1)
+
+def counts_to_dict(counts, labels=PERSONA_NAMES):
+    """Nonzero entries of a count array as a {label: count} dict (Counter-style)"""
+    return {label: int(count) for label, count in zip(labels, np.asarray(counts).tolist()) if count}
+
+def compute_alignment(user_vector, personas):
+    """Compute alignment percentages for all archetypes (vectors or bitmasks)"""
+    user_mask = interests_to_mask(user_vector)
+    user_ones = user_mask.bit_count()
+    if user_ones == 0:
+        return []
+
+    if personas is PERSONAS:
+        persona_masks = PERSONA_MASK_BY_NAME
+    else:
+        persona_masks = {name: interests_to_mask(vector) for name, vector in personas.items()}
+
+    scores = []
+    for persona_name, persona_mask in persona_masks.items():
+        matches = (user_mask & persona_mask).bit_count()
+        percentage = (matches / user_ones) * 100
+        scores.append({
+            'persona': persona_name,
+            'percentage': round(percentage, 2)
+        })
+
+    # Sort by percentage descending
+    scores.sort(key=lambda x: x['percentage'], reverse=True)
+    return scores
+
+def compute_alignment_batch(user_matrix, persona_matrix=PERSONA_MATRIX, persona_masks=PERSONA_MASKS):
+    """
+    Compute alignment percentages for a whole population in one call.
+    user_matrix is either users x 52 (0/1 interests) against persona_matrix (16 x 52),
+    or a 1-D array of packed interest masks against persona_masks (16 uint64).
+    Returns:
+        - percentages: users x 16, in PERSONAS order, rounded like compute_alignment
+        - order: users x 16 persona indices sorted by percentage descending
+          (stable, so ties keep PERSONAS order exactly as compute_alignment does)
+    """
+    users = np.asarray(user_matrix)
+    if users.ndim == 1:
+        users = users.astype(np.uint64)
+        matches = popcount64(users[:, None] & persona_masks[None, :])
+        user_ones = popcount64(users)
+    else:
+        users = users.astype(np.int32)
+        matches = users @ persona_matrix.T
+        user_ones = users.sum(axis=1)
+    percentages = PERCENTAGE_TABLE[user_ones[:, None], matches]
+    order = np.argsort(-percentages, axis=1, kind='stable')
+    return percentages, order
+
+def create_weighted_dice(sorted_personas, ladder_bonuses):
+    """Create weighted probability distribution"""
+    weighted = []
+    for idx, persona_data in enumerate(sorted_personas):
+        ladder = ladder_bonuses[idx] if idx < len(ladder_bonuses) else ladder_bonuses[-1]
+        weighted_score = persona_data['percentage'] * ladder
+        weighted.append({
+            'persona': persona_data['persona'],
+            'weightedScore': weighted_score
+        })
+
+    total = sum(w['weightedScore'] for w in weighted)
+
+    if total == 0:
+        # Equal distribution fallback
+        inc = 100 / len(weighted)
+        cumulative = 0
+        dice = []
+        for w in weighted:
+            cumulative += inc
+            dice.append({'persona': w['persona'], 'cumulativeMax': cumulative})
+        return dice
+
+    # Create cumulative distribution
+    cumulative = 0
+    dice = []
+    for w in weighted:
+        cumulative += (w['weightedScore'] / total) * 100
+        dice.append({'persona': w['persona'], 'cumulativeMax': cumulative})
+
+    return dice
+
+def create_weighted_dice_batch(sorted_percentages, ladder_bonuses=LADDER_BONUSES):
+    """
+    Vectorized create_weighted_dice for many users at once.
+    sorted_percentages is users x 16, each row in that user's rank order.
+    Returns the users x 16 cumulativeMax matrix. Columns are accumulated left to
+    right exactly like create_weighted_dice, so the values are bit-identical.
+    """
+    weighted = np.asarray(sorted_percentages, dtype=np.float64)
+    num_users, num_ranks = weighted.shape
+    ladder = [ladder_bonuses[idx] if idx < len(ladder_bonuses) else ladder_bonuses[-1] for idx in range(num_ranks)]
+    weighted = weighted * np.array(ladder)
+
+    total = np.zeros(num_users)
+    for idx in range(num_ranks):
+        total = total + weighted[:, idx]
+
+    # Equal distribution fallback for users whose weighted scores are all zero
+    flat = total == 0
+    safe_total = np.where(flat, 1.0, total)
+    inc = 100 / num_ranks
+
+    cumulative = np.empty_like(weighted)
+    running = np.zeros(num_users)
+    for idx in range(num_ranks):
+        running = running + np.where(flat, inc, (weighted[:, idx] / safe_total) * 100)
+        cumulative[:, idx] = running
+    return cumulative
+
+def roll_weighted_dice(dice):
+    """Select persona based on weighted probability"""
+    r = random.random() * 100
+    for w in dice:
+        if r <= w['cumulativeMax']:
+            return w['persona']
+    return dice[0]['persona']
+
+def roll_weighted_dice_batch(cumulative, uniforms, order):
+    """
+    Vectorized roll_weighted_dice for a whole population (inverse-CDF search).
+    cumulative is users x 16 cumulativeMax, uniforms are the users' random.random()
+    draws and order maps rank positions to persona indices. Each user gets the first
+    rank whose cumulativeMax >= uniform * 100, falling back to rank 1 (dice[0])
+    when none qualifies, exactly like roll_weighted_dice.
+    Returns (persona_idx, rank) arrays, with rank counted from 1.
+    """
+    r = np.asarray(uniforms, dtype=np.float64) * 100
+    position = (cumulative < r[:, None]).sum(axis=1)
+    position[position == cumulative.shape[1]] = 0
+    persona_idx = np.take_along_axis(order, position[:, None], axis=1)[:, 0]
+    return persona_idx, position + 1
+
+def pair_users_array(persona_idx, rng=None):
+    """
+    Array version of pair_users for a whole round.
+    Users are randomly permuted, stable-sorted by selected persona and paired with
+    their neighbour inside each persona run; the odd leftover of each run is then
+    shuffled and paired as 'mixed'. Both steps are uniformly random, exactly like
+    the shuffle-and-pop in pair_users, so match statistics are unchanged.
+    Returns (same_pairs, mixed_pairs, remaining): k x 2 and m x 2 arrays of user
+    rows plus the unpaired row, if any.
+    """
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    persona_idx = np.asarray(persona_idx)
+    n = len(persona_idx)
+    if n == 0:
+        empty = np.empty((0, 2), dtype=np.intp)
+        return empty, empty, np.empty(0, dtype=np.intp)
+
+    shuffled = rng.permutation(n)
+    grouped = shuffled[np.argsort(persona_idx[shuffled], kind='stable')]
+    personas = persona_idx[grouped]
+
+    # Position of every user inside its persona run
+    run_start = np.r_[True, personas[1:] != personas[:-1]]
+    run_end = np.r_[personas[1:] != personas[:-1], True]
+    position = np.arange(n) - np.maximum.accumulate(np.where(run_start, np.arange(n), 0))
+    even = position % 2 == 0
+
+    # Pair within same persona
+    first = np.nonzero(even & ~run_end)[0]
+    same_pairs = np.column_stack([grouped[first], grouped[first + 1]])
+
+    # Random fallback for the odd user left in each run (MIXED PAIRS)
+    leftovers = grouped[even & run_end]
+    leftovers = leftovers[rng.permutation(len(leftovers))]
+    num_mixed = len(leftovers) // 2
+    mixed_pairs = leftovers[:2 * num_mixed].reshape(-1, 2)
+    return same_pairs, mixed_pairs, leftovers[2 * num_mixed:]
+
+# ============================================================================
+# PRECOMPUTED DICE LOOKUP TABLE (ALL 5-INTEREST USERS)
+# ============================================================================
+
+# Users always pick exactly 5 of 52 interests, so every possible user is one of
+# C(52, 5) combinations. Alignment order and dice are a pure function of that set.
+TABLE_INTERESTS = 5
+
+NUM_COMBINATIONS = math.comb(52, TABLE_INTERESTS)
+
+DEFAULT_LOOKUP_TABLE_DIR = "dice_lookup_table"
+
+# BINOMIAL[n, k] == C(n, k), used to rank combinations (combinatorial number system)
+BINOMIAL = np.array([[math.comb(n, k) for k in range(TABLE_INTERESTS + 1)] for n in range(53)], dtype=np.int64)
+
+@dataclass
+class DiceLookupTable:
+    """
+    Per-combination alignment order plus shared dice profiles.
+    The cumulative dice only depend on a user's sorted percentages, so each
+    combination stores its 16-entry rank order and a profile id; the profile
+    arrays hold the sorted percentages and cumulativeMax values (bit-identical
+    to create_weighted_dice).
+    """
+    order: np.ndarray                 # NUM_COMBINATIONS x 16 persona indices (uint8)
+    profile: np.ndarray               # NUM_COMBINATIONS profile ids (uint16)
+    profile_percentages: np.ndarray   # profiles x 16 sorted percentages
+    profile_cumulative: np.ndarray    # profiles x 16 cumulativeMax
+    path: str = DEFAULT_LOOKUP_TABLE_DIR
+    ladder_bonuses: tuple = tuple(LADDER_BONUSES)
+
+    def __reduce__(self):
+        # Worker processes reopen the memory-mapped files instead of receiving a pickled copy
+        return (load_dice_lookup_table, (self.path, list(self.ladder_bonuses)))
+
+    def lookup(self, user_masks):
+        """Gather (order, sorted_percentages, cumulative) for packed 5-interest users"""
+        ranks = combination_ranks(user_masks)
+        profile = self.profile[ranks]
+        return (self.order[ranks].astype(np.intp),
+                self.profile_percentages[profile],
+                self.profile_cumulative[profile])
+
+def combination_ranks(user_masks, num_interests=TABLE_INTERESTS):
+    """Rank packed k-interest masks in colexicographic order (0 .. C(52, k) - 1)"""
+    masks = np.asarray(user_masks, dtype=np.uint64).reshape(-1)
+    bits = ((masks[:, None] >> np.arange(52, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+    if (bits.sum(axis=1) != num_interests).any():
+        raise ValueError(f"Lookup table users must have exactly {num_interests} interests")
+    positions = np.nonzero(bits)[1].reshape(len(masks), num_interests)
+    return BINOMIAL[positions, np.arange(1, num_interests + 1)].sum(axis=1)
+
+def combination_masks(ranks, num_interests=TABLE_INTERESTS):
+    """Inverse of combination_ranks: packed k-interest masks for colexicographic ranks"""
+    remaining = np.asarray(ranks, dtype=np.int64).reshape(-1).copy()
+    masks = np.zeros(len(remaining), dtype=np.uint64)
+    for k in range(num_interests, 0, -1):
+        # Largest position c with C(c, k) <= remaining rank
+        position = np.searchsorted(BINOMIAL[:, k], remaining, side='right') - 1
+        remaining -= BINOMIAL[position, k]
+        masks |= np.uint64(1) << position.astype(np.uint64)
+    return masks
+
+def enumerate_combinations(num_interests=TABLE_INTERESTS):
+    """Every num_interests-of-52 interest set as a C(52, k) x k int8 array (lexicographic order)"""
+    return np.fromiter(
+        itertools.chain.from_iterable(itertools.combinations(range(52), num_interests)),
+        dtype=np.int8, count=math.comb(52, num_interests) * num_interests
+    ).reshape(-1, num_interests)
+
+def _lookup_table_meta(ladder_bonuses):
+    return {
+        'num_interests': TABLE_INTERESTS,
+        'num_combinations': NUM_COMBINATIONS,
+        'persona_masks': PERSONA_MASKS.tolist(),
+        'ladder_bonuses': list(ladder_bonuses)
+    }
+
+def build_dice_lookup_table(path=DEFAULT_LOOKUP_TABLE_DIR, ladder_bonuses=LADDER_BONUSES, chunk_size=1 << 18):
+    """Enumerate all C(52, 5) users once and persist the lookup table to path"""
+    os.makedirs(path, exist_ok=True)
+    combos = enumerate_combinations()
+
+    order_table = np.empty((NUM_COMBINATIONS, 16), dtype=np.uint8)
+    profile_keys = np.empty(NUM_COMBINATIONS, dtype=np.uint64)
+    rank_columns = np.arange(1, TABLE_INTERESTS + 1)
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(3)
+
+    for start in range(0, NUM_COMBINATIONS, chunk_size):
+        chunk = combos[start:start + chunk_size].astype(np.int64)
+        ranks = BINOMIAL[chunk, rank_columns].sum(axis=1)
+        masks = np.bitwise_or.reduce(np.uint64(1) << chunk.astype(np.uint64), axis=1)
+        matches = popcount64(masks[:, None] & PERSONA_MASKS[None, :])
+        order = np.argsort(-matches, axis=1, kind='stable')
+        # Sorted match counts (0-5) packed 3 bits per rank identify the dice profile
+        sorted_matches = np.take_along_axis(matches, order, axis=1).astype(np.uint64)
+        order_table[ranks] = order
+        profile_keys[ranks] = (sorted_matches << shifts).sum(axis=1, dtype=np.uint64)
+
+    keys, profile = np.unique(profile_keys, return_inverse=True)
+    profile_matches = ((keys[:, None] >> shifts) & np.uint64(7)).astype(np.intp)
+    profile_percentages = PERCENTAGE_TABLE[TABLE_INTERESTS, profile_matches]
+    profile_cumulative = create_weighted_dice_batch(profile_percentages, ladder_bonuses)
+
+    arrays = {
+        'order': order_table,
+        'profile': profile.astype(np.uint16),
+        'profile_percentages': profile_percentages,
+        'profile_cumulative': profile_cumulative
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.tmp.npy"), array)
+        os.replace(os.path.join(path, f"{name}.tmp.npy"), os.path.join(path, f"{name}.npy"))
+    # meta.json is written last so a half-built table is never picked up
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(_lookup_table_meta(ladder_bonuses), f)
+
+    return DiceLookupTable(**arrays, path=path, ladder_bonuses=tuple(ladder_bonuses))
+
+def load_dice_lookup_table(path=DEFAULT_LOOKUP_TABLE_DIR, ladder_bonuses=LADDER_BONUSES, rebuild=False):
+    """
+    Load the lookup table memory-mapped (so worker processes share one copy),
+    building it first if it is missing or was built for different personas/ladder.
+    """
+    meta_path = os.path.join(path, "meta.json")
+    if not rebuild and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta == _lookup_table_meta(ladder_bonuses):
+            return DiceLookupTable(
+                order=np.load(os.path.join(path, "order.npy"), mmap_mode='r'),
+                profile=np.load(os.path.join(path, "profile.npy"), mmap_mode='r'),
+                profile_percentages=np.load(os.path.join(path, "profile_percentages.npy")),
+                profile_cumulative=np.load(os.path.join(path, "profile_cumulative.npy")),
+                path=path,
+                ladder_bonuses=tuple(ladder_bonuses)
+            )
+    print(f"Building dice lookup table for all {NUM_COMBINATIONS:,} interest combinations...")
+    build_dice_lookup_table(path, ladder_bonuses)
+    return load_dice_lookup_table(path, ladder_bonuses)
+
+def build_user_dice(user_masks, ladder_bonuses=LADDER_BONUSES, lookup_table=None):
+    """
+    Alignment order, sorted percentages and cumulative dice for a population.
+    With a lookup table (built for the same ladder_bonuses) this is a single
+    gather per user instead of alignment + sort + dice construction.
+    """
+    if lookup_table is not None:
+        if tuple(map(float, lookup_table.ladder_bonuses)) != tuple(map(float, ladder_bonuses)):
+            raise ValueError(f"lookup table at {lookup_table.path} was built for different ladder bonuses")
+        return lookup_table.lookup(user_masks)
+    percentages, order = compute_alignment_batch(user_masks)
+    sorted_percentages = np.take_along_axis(percentages, order, axis=1)
+    return order, sorted_percentages, create_weighted_dice_batch(sorted_percentages, ladder_bonuses)
+
+class UserDiceCache:
+    """
+    Alignment order, sorted percentages and cumulative dice for every user of a
+    simulation, kept as compact users x 16 arrays. A user's interests never change
+    within a simulation, so this is built once and reused by every round; sync()
+    invalidates and rebuilds only the rows whose interest masks changed.
+    """
+
+    def __init__(self, user_masks, ladder_bonuses=LADDER_BONUSES, lookup_table=None):
+        self.ladder_bonuses = ladder_bonuses
+        self.lookup_table = lookup_table
+        self.masks = mask_array(user_masks)
+        self.order, self.sorted_percentages, self.cumulative = build_user_dice(
+            self.masks, ladder_bonuses, lookup_table
+        )
+
+    def __len__(self):
+        return len(self.masks)
+
+    def sync(self, user_masks):
+        """Rebuild the rows whose interests changed; returns the number of rows rebuilt"""
+        masks = mask_array(user_masks)
+        if len(masks) != len(self.masks):
+            self.__init__(masks, self.ladder_bonuses, self.lookup_table)
+            return len(masks)
+
+        changed = np.nonzero(masks != self.masks)[0]
+        if len(changed):
+            self.masks[changed] = masks[changed]
+            order, sorted_percentages, cumulative = build_user_dice(
+                self.masks[changed], self.ladder_bonuses, self.lookup_table
+            )
+            self.order[changed] = order
+            self.sorted_percentages[changed] = sorted_percentages
+            self.cumulative[changed] = cumulative
+        return len(changed)
+
+    def alignments(self, row):
+        """compute_alignment-style list for one user, rebuilt from the cached arrays"""
+        return [{'persona': PERSONA_NAMES[j], 'percentage': percentage}
+                for j, percentage in zip(self.order[row].tolist(), self.sorted_percentages[row].tolist())]
+
+def mask_array(user_masks):
+    """Population as a uint64 mask array (accepts masks or 52-element vectors)"""
+    if isinstance(user_masks, np.ndarray) and user_masks.ndim == 1:
+        return user_masks.astype(np.uint64)
+    return np.array([interests_to_mask(user) for user in user_masks], dtype=np.uint64)
+
+# ============================================================================
+# INSTRUMENTATION (PHASE TIMERS AND SAMPLED PROFILES)
+# ============================================================================
+
+# What to measure inside the simulation loop: timers adds per-phase cumulative seconds
+# and call counts (a few perf_counter calls per round); profile_every / tracemalloc_every
+# run cProfile / tracemalloc on every Nth simulation (0 = never). None measures nothing.
+Instrumentation = namedtuple('Instrumentation', ['timers', 'profile_every', 'tracemalloc_every'],
+                             defaults=[True, 0, 0])
+
+# Functions / allocation sites kept from sampled cProfile and tracemalloc snapshots
+PROFILE_TOP_N = 15
+
+class PhaseTimers:
+    """Cumulative seconds and call counts per named phase (use as `with timers.phase(name):`)"""
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+
+    def phase(self, name):
+        return _PhaseTimer(self, name)
+
+    def merge(self, other):
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+        return self
+
+class _PhaseTimer:
+    __slots__ = ('timers', 'name', 'started')
+
+    def __init__(self, timers, name):
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        self.timers.seconds[self.name] = self.timers.seconds.get(self.name, 0.0) + elapsed
+        self.timers.calls[self.name] = self.timers.calls.get(self.name, 0) + 1
+
+class _NullTimers:
+    """PhaseTimers stand-in when timing is off: every phase is one shared no-op context"""
+    _phase = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._phase
+
+NULL_TIMERS = _NullTimers()
+
+class InstrumentationReport:
+    """Phase timers plus sampled profiles of one simulation, or of several merged"""
+
+    def __init__(self, instrumentation=None):
+        self.timers = PhaseTimers()
+        self.phase_timers = self.timers if instrumentation is not None and instrumentation.timers else NULL_TIMERS
+        self.profile = {}   # 'function (file:line)' -> [calls, tottime, cumtime]
+        self.memory = {}    # 'file:line' -> [bytes, blocks]
+        self.peak_traced_bytes = 0
+        self.profiled_simulations = 0
+        self.traced_simulations = 0
+
+    def merge(self, other):
+        self.timers.merge(other.timers)
+        for key, values in other.profile.items():
+            self.profile[key] = [a + b for a, b in zip(self.profile.get(key, [0, 0.0, 0.0]), values)]
+        for key, values in other.memory.items():
+            self.memory[key] = [a + b for a, b in zip(self.memory.get(key, [0, 0]), values)]
+        self.peak_traced_bytes = max(self.peak_traced_bytes, other.peak_traced_bytes)
+        self.profiled_simulations += other.profiled_simulations
+        self.traced_simulations += other.traced_simulations
+        return self
+
+    def as_dict(self):
+        """JSON-friendly summary (phases by time, top profile functions and allocation sites)"""
+        total = sum(self.timers.seconds.values())
+        phases = sorted(self.timers.seconds, key=self.timers.seconds.get, reverse=True)
+        top_profile = sorted(self.profile.items(), key=lambda item: item[1][1], reverse=True)[:PROFILE_TOP_N]
+        top_memory = sorted(self.memory.items(), key=lambda item: item[1][0], reverse=True)[:PROFILE_TOP_N]
+        return {
+            'phases': {name: {'seconds': self.timers.seconds[name], 'calls': self.timers.calls[name],
+                              'share': self.timers.seconds[name] / total if total > 0 else 0.0}
+                       for name in phases},
+            'profile': [{'function': key, 'calls': calls, 'tottime': tottime, 'cumtime': cumtime}
+                        for key, (calls, tottime, cumtime) in top_profile],
+            'memory': [{'site': key, 'bytes': size, 'blocks': blocks} for key, (size, blocks) in top_memory],
+            'peak_traced_bytes': self.peak_traced_bytes,
+            'profiled_simulations': self.profiled_simulations,
+            'traced_simulations': self.traced_simulations
+        }
+
+def start_sampled_profiling(sim, instrumentation):
+    """Start cProfile / tracemalloc when this simulation is sampled; returns a handle for finish_"""
+    if instrumentation is None:
+        return None
+    profiler = None
+    if instrumentation.profile_every and sim % instrumentation.profile_every == 0:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    tracing = (bool(instrumentation.tracemalloc_every) and sim % instrumentation.tracemalloc_every == 0
+               and not tracemalloc.is_tracing())
+    if tracing:
+        tracemalloc.start()
+    return profiler, tracing
+
+def finish_sampled_profiling(handle, report):
+    """Stop what start_sampled_profiling started and fold the snapshots into report"""
+    if handle is None:
+        return
+    profiler, tracing = handle
+    if profiler is not None:
+        profiler.disable()
+        profiler.create_stats()
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in profiler.stats.items():
+            key = f"{function} ({os.path.basename(filename)}:{line})"
+            report.profile[key] = [a + b for a, b in zip(report.profile.get(key, [0, 0.0, 0.0]),
+                                                          (calls, tottime, cumtime))]
+        report.profiled_simulations += 1
+    if tracing:
+        snapshot = tracemalloc.take_snapshot()
+        report.peak_traced_bytes = max(report.peak_traced_bytes, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]:
+            frame = stat.traceback[0]
+            key = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            report.memory[key] = [a + b for a, b in zip(report.memory.get(key, [0, 0]), (stat.size, stat.count))]
+        report.traced_simulations += 1
+
+def print_instrumentation(instrumentation, top=5):
+    """Print the phase breakdown (and sampled profiles) from parameters['instrumentation']"""
+    print("Hot-Path Phases (cumulative over simulations):")
+    for name, phase in instrumentation['phases'].items():
+        print(f"  {name:20s}: {phase['seconds']:8.3f}s ({phase['share']*100:5.1f}%) over {phase['calls']:,} calls")
+    if instrumentation['profiled_simulations']:
+        print(f"  Top functions by own time (cProfile, {instrumentation['profiled_simulations']} sampled simulations):")
+        for entry in instrumentation['profile'][:top]:
+            print(f"    {entry['tottime']:8.3f}s {entry['calls']:>9,} calls  {entry['function']}")
+    if instrumentation['traced_simulations']:
+        print(f"  Top allocation sites (tracemalloc, {instrumentation['traced_simulations']} sampled simulations, "
+              f"peak {instrumentation['peak_traced_bytes'] / 2**20:.1f} MiB):")
+        for entry in instrumentation['memory'][:top]:
+            print(f"    {entry['bytes'] / 2**20:8.2f} MiB {entry['blocks']:>9,} blocks  {entry['site']}")
+
+# ============================================================================
+# PROGRESS REPORTING (THROUGHPUT, ETA, JSON-LINES METRICS)
+# ============================================================================
+
+# Seconds between progress lines / metrics records (updates come from the parent
+# loop once per finished simulation, so the hot loop never calls back)
+PROGRESS_INTERVAL_SECONDS = 10.0
+
+def current_rss_bytes():
+    """Resident set size of this process (Linux /proc; peak RSS elsewhere; None if unknown)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def worker_rss_bytes():
+    """Summed resident set size of this process's children, i.e. pool workers (Linux /proc; None elsewhere)"""
+    try:
+        entries = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+        page_size = os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+    parent = os.getpid()
+    total = 0
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after the parenthesised command name: state, ppid, ... rss (24th field overall)
+                stat = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue  # exited since the listing
+        if int(stat[1]) == parent:
+            total += int(stat[21]) * page_size
+    return total
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+class ProgressReporter:
+    """
+    Live events/sec, rounds/sec, ETA, mixed-pair count and RSS (parent process and
+    pool workers separately) for a run. update() is called once per finished
+    simulation and only reports when interval seconds have passed since the last
+    report; every report is printed (when interval is set)
+    and appended as one JSON object per line to metrics_path, flushed for tailing.
+    Simulations restored from checkpoints count as done but not toward throughput.
+    Use it as a context manager so the metrics file is closed even when a run fails.
+    """
+
+    def __init__(self, num_users, num_rounds, num_simulations, interval=PROGRESS_INTERVAL_SECONDS,
+                 metrics_path=None, already_completed=0):
+        self.num_users = num_users
+        self.num_rounds = num_rounds
+        self.num_simulations = num_simulations
+        self.interval = interval
+        self.already_completed = already_completed
+        self.started = self.last_report = time.perf_counter()
+        self.metrics_file = open(metrics_path, "a") if metrics_path else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # close() already wrote the final record on success; this only releases the file
+        if self.metrics_file is not None:
+            self.metrics_file.close()
+            self.metrics_file = None
+        return False
+
+    def update(self, completed, mixed_pairs=None, final=False):
+        """Report if due (or final); completed counts finished simulations including restored ones"""
+        now = time.perf_counter()
+        due = now - self.last_report >= (self.interval or PROGRESS_INTERVAL_SECONDS)
+        if not (final or due) or not (self.interval or self.metrics_file):
+            return None
+        self.last_report = now
+        metrics = self.metrics(completed, mixed_pairs, now)
+        metrics['final'] = final
+        if self.interval and not final:
+            print(f"  Progress: {completed}/{self.num_simulations} simulations, "
+                  f"{metrics['events_per_sec']:,.0f} events/s, {metrics['rounds_per_sec']:,.1f} rounds/s, "
+                  f"ETA {format_duration(metrics['eta_seconds'])}"
+                  + (f", {mixed_pairs:,} mixed pairs" if mixed_pairs is not None else "")
+                  + (f", RSS {metrics['parent_rss_bytes'] / 2**20:,.0f} MiB" if metrics['parent_rss_bytes'] else "")
+                  + (f" + {metrics['worker_rss_bytes'] / 2**20:,.0f} MiB workers"
+                     if metrics['worker_rss_bytes'] else ""))
+        if self.metrics_file is not None:
+            self.metrics_file.write(json.dumps(metrics) + "\n")
+            self.metrics_file.flush()
+        return metrics
+
+    def metrics(self, completed, mixed_pairs=None, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        done = completed - self.already_completed
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = self.num_simulations - completed
+        return {
+            'timestamp': time.time(),
+            'elapsed_seconds': elapsed,
+            'simulations_completed': completed,
+            'num_simulations': self.num_simulations,
+            'events_completed': completed * self.num_users * self.num_rounds,
+            'events_per_sec': rate * self.num_users * self.num_rounds,
+            'rounds_per_sec': rate * self.num_rounds,
+            'eta_seconds': remaining / rate if rate > 0 else None,
+            'mixed_pairs': mixed_pairs,
+            'parent_rss_bytes': current_rss_bytes(),
+            'worker_rss_bytes': worker_rss_bytes()
+        }
+
+    def close(self, completed, mixed_pairs=None):
+        """Write the final metrics record and close the metrics file"""
+        metrics = self.update(completed, mixed_pairs, final=True)
+        if self.metrics_file is not None:
+            self.metrics_file.close()
+            self.metrics_file = None
+        return metrics
+
+# ============================================================================
+# SIMULATION RUNS (SEEDS, WORKER POOL, HISTOGRAMS)
+# ============================================================================
+
+def spawn_simulation_seeds(seed, num_simulations):
+    """
+    Derive one independent RNG stream per simulation from a root seed.
+    Returns (root_entropy, seed_sequences); with seed=None the root entropy is
+    drawn from the random module so random.seed() still reproduces a run.
+    """
+    root = np.random.SeedSequence(seed if seed is not None else random.getrandbits(128))
+    return root.entropy, root.spawn(num_simulations)
+
+def iter_simulation_results(simulate, seed_sequences, args=(), workers=1, sims=None):
+    """
+    Yield simulate(sim, seed_sequence, *args) for every simulation, in simulation order.
+    Simulations are independent, so with workers > 1 they fan out to a process pool;
+    each one only uses its own seed sequence, so results are bit-identical for any
+    worker count. workers=None uses every available core. sims gives the simulation
+    indices when only some simulations are run (defaults to 0..n-1).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    sims = range(len(seed_sequences)) if sims is None else list(sims)
+    if workers <= 1 or len(seed_sequences) <= 1:
+        for sim, seed_sequence in zip(sims, seed_sequences):
+            yield simulate(sim, seed_sequence, *args)
+        return
+
+    # fork keeps functions defined in a notebook or __main__ script usable in the workers
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=min(workers, len(seed_sequences)), mp_context=context) as pool:
+        yield from pool.map(simulate, sims, seed_sequences, *[itertools.repeat(arg) for arg in args])
+
+class SimulationHistograms:
+    """
+    Fixed-size result histograms (persona selections, ranks 1-16, match types) summed
+    over simulations, together with their squares. Merging two of them (simulations,
+    workers, checkpoints) just adds arrays, and per-simulation mean and variance of
+    every bin come from the two sums. match_types labels the match histogram (each
+    simulation tracks its own match types).
+    """
+
+    def __init__(self, match_types):
+        self.labels = {'persona': PERSONA_NAMES, 'rank': list(range(1, 17)), 'match': list(match_types)}
+        self.num_simulations = 0
+        self.totals = {name: np.zeros(len(labels), dtype=np.int64) for name, labels in self.labels.items()}
+        self.squares = {name: np.zeros(len(labels), dtype=np.float64) for name, labels in self.labels.items()}
+
+    @classmethod
+    def from_counts(cls, persona_counts, rank_counts, match_counts, match_types):
+        """Histograms of a single simulation"""
+        histograms = cls(match_types)
+        histograms.add(persona_counts, rank_counts, match_counts)
+        return histograms
+
+    def add(self, persona_counts, rank_counts, match_counts):
+        """Add one simulation's count arrays"""
+        for name, counts in (('persona', persona_counts), ('rank', rank_counts), ('match', match_counts)):
+            counts = np.asarray(counts, dtype=np.int64)
+            self.totals[name] += counts
+            self.squares[name] += counts.astype(np.float64) ** 2
+        self.num_simulations += 1
+
+    def merge(self, other):
+        """Fold another set of histograms into this one (returns self)"""
+        for name in self.totals:
+            self.totals[name] += other.totals[name]
+            self.squares[name] += other.squares[name]
+        self.num_simulations += other.num_simulations
+        return self
+
+    def mean(self, name):
+        """Per-simulation mean of every bin"""
+        return self.totals[name] / max(self.num_simulations, 1)
+
+    def variance(self, name):
+        """Per-simulation sample variance of every bin"""
+        n = self.num_simulations
+        if n < 2:
+            return np.zeros(len(self.totals[name]))
+        return np.maximum(self.squares[name] - self.totals[name] ** 2 / n, 0.0) / (n - 1)
+
+    def as_dict(self, name):
+        """Nonzero totals of one histogram as a {label: count} dict"""
+        return counts_to_dict(self.totals[name], labels=self.labels[name])
+
+# ============================================================================
+# RUN CONFIGURATION
+# ============================================================================
+
+# A simulation-only run (no charts) should be ready to simulate this soon after import
+STARTUP_TARGET_SECONDS = 0.5
+
+def strip_kernel_args(argv=None):
+    """
+    Command-line arguments without a notebook kernel's connection file (-f kernel.json),
+    so the scripts can parse strictly when run from a notebook cell.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    for i, arg in enumerate(argv):
+        if arg == '-f' and i + 1 < len(argv) and argv[i + 1].endswith('.json'):
+            return argv[:i] + argv[i + 2:]
+        if arg.startswith(('-f=', '--f=')) and arg.endswith('.json'):
+            return argv[:i] + argv[i + 1:]
+    return argv
+
+def load_config_file(path, config):
+    """Read fields of the config dataclass from a JSON file over config (unknown keys are an error)"""
+    with open(path) as f:
+        values = json.load(f)
+    known = {field.name for field in fields(config)}
+    unknown = sorted(set(values) - known)
+    if unknown:
+        raise ValueError(f"unknown config keys in {path}: {', '.join(unknown)}")
+    return type(config)(**{**asdict(config), **values})
+
+def instrumentation_from_config(config):
+    """Instrumentation for the configured switches (None when everything is off)"""
+    if not (config.instrument or config.profile_every or config.tracemalloc_every):
+        return None
+    return Instrumentation(bool(config.instrument), config.profile_every or 0, config.tracemalloc_every or 0)
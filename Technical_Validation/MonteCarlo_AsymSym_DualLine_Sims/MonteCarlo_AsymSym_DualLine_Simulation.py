@@ -1,91 +1,48 @@
 """
 Monte Carlo Simulation with Connection Analysis for Mixed Pairs
 Runs matching simulation, tracks actual pairs, analyzes synergy patterns
+
+Batch runs (no prompts, charts saved as PNGs):
+    python MonteCarlo_AsymSym_DualLine_Simulation.py --users 10000 --rounds 10 --simulations 20 --chart-dir charts
+Importing it only loads the simulation engine; matplotlib is loaded when a chart is rendered.
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib.lines import Line2D
-import seaborn as sns
-from collections import Counter, defaultdict
+from abc import ABC, abstractmethod
+import argparse
+from collections import OrderedDict, namedtuple
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+import functools
+import heapq
+import itertools
+import json
+import os
 import random
-
-# ============================================================================
-# DATA DEFINITIONS
-# ============================================================================
-
-# 52 Interests
-INTERESTS = [
-    "cars", "gaming", "working_out", "photography", "cooking", "travel",
-    "motorcycles", "hiking", "painting", "fitness", "reading", "writing",
-    "yoga", "meditation", "mindfulness", "music", "spirituality", "gardening",
-    "fashion", "technology", "movies", "running", "cycling", "investing",
-    "architecture", "astronomy", "dancing", "fishing", "camping", "theater",
-    "sports", "philosophy", "podcasts", "design", "baking", "crafts",
-    "animals", "blogging", "anime", "history", "chess", "skateboarding",
-    "programming", "volunteering", "woodworking", "languages", "makeup",
-    "diy_projects", "journaling", "interior_design", "marine_biology",
-    "entrepreneurship"
-]
-
-# 16 Archetypes with their interest vectors
-PERSONAS = {
-    "System Weaver": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 1, 0, 1, 0, 1, 0, 0, 0, 1, 0, 0, 0],
-    "Data Drifter": [0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0],
-    "Grid Captain": [1, 1, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 1, 1, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-    "Circuit Jumper": [1, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 1],
-    "Soul Cartographer": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0],
-    "Dreamsmith": [0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 1, 1, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-    "Pulse Guide": [0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 1, 1, 0],
-    "Vibe Rider": [0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    "Core Mason": [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 1, 1, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0],
-    "Harbor Keeper": [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 1, 1, 0, 0],
-    "Forge Handler": [1, 0, 1, 0, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0],
-    "Thread Bonder": [0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 1, 0, 0],
-    "Tinker Nomad": [1, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0],
-    "Inner Glider": [0, 0, 0, 1, 0, 0, 0, 0, 1, 1, 0, 0, 1, 1, 1, 1, 1, 0, 1, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-    "Momentum Spark": [1, 1, 1, 0, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-    "Echo Prism": [0, 1, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0]
-}
-
-# Ladder Bonuses
-LADDER_BONUSES = [
-    0.60, 0.56, 0.55, 0.54, 0.53, 0.52, 0.51, 0.50,
-    0.49, 0.48, 0.45, 0.43, 0.42, 0.41, 0.20, 0.05
-]
+import sys
+
+# The matching engine shared by both simulations lives in Technical_Validation/Matching_Engine.py
+# (the scalar kernels are re-exported for Benchmarks/Engine_Benchmarks.py)
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Matching_Engine import (
+    PERSONAS, LADDER_BONUSES, PERSONA_NAMES, PERSONA_INDEX, generate_random_user_interests,
+    generate_user_population, compute_alignment, compute_alignment_batch, create_weighted_dice,
+    create_weighted_dice_batch, roll_weighted_dice, roll_weighted_dice_batch, pair_users_array,
+    load_dice_lookup_table, UserDiceCache, mask_array, NULL_TIMERS, InstrumentationReport,
+    start_sampled_profiling, finish_sampled_profiling, print_instrumentation,
+    instrumentation_from_config, STARTUP_TARGET_SECONDS, load_config_file, strip_kernel_args,
+    PROGRESS_INTERVAL_SECONDS, ProgressReporter, spawn_simulation_seeds,
+    iter_simulation_results, SimulationHistograms
+)
 
 # ============================================================================
 # CORE MATCHING FUNCTIONS
 # ============================================================================
 
-def generate_random_user_interests(num_interests=5):
-    """Generate random user by selecting interests"""
-    indices = random.sample(range(52), num_interests)
-    vector = [0] * 52
-    for idx in indices:
-        vector[idx] = 1
-    return vector
-
-def compute_alignment(user_vector, personas):
-    """Compute alignment percentages for all archetypes"""
-    user_ones = sum(user_vector)
-    if user_ones == 0:
-        return []
-
-    scores = []
-    for persona_name, persona_vector in personas.items():
-        matches = sum(1 for i in range(52) if user_vector[i] == 1 and persona_vector[i] == 1)
-        percentage = (matches / user_ones) * 100
-        scores.append({
-            'persona': persona_name,
-            'percentage': round(percentage, 2)
-        })
-
-    scores.sort(key=lambda x: x['percentage'], reverse=True)
-    return scores
-
 def apply_ladder_bonus(alignment_scores):
     """Apply ladder bonuses to alignment scores"""
     weighted_scores = {}
@@ -102,105 +59,142 @@ def apply_ladder_bonus(alignment_scores):
         }
     return weighted_scores
 
-def create_weighted_dice(sorted_personas, ladder_bonuses):
-    """Create weighted probability distribution"""
-    weighted = []
-    for idx, persona_data in enumerate(sorted_personas):
-        ladder = ladder_bonuses[idx] if idx < len(ladder_bonuses) else ladder_bonuses[-1]
-        weighted_score = persona_data['percentage'] * ladder
-        weighted.append({
-            'persona': persona_data['persona'],
-            'weightedScore': weighted_score
-        })
-
-    total = sum(w['weightedScore'] for w in weighted)
-
-    if total == 0:
-        inc = 100 / len(weighted)
-        cumulative = 0
-        dice = []
-        for w in weighted:
-            cumulative += inc
-            dice.append({'persona': w['persona'], 'cumulativeMax': cumulative})
-        return dice
-
-    cumulative = 0
-    dice = []
-    for w in weighted:
-        cumulative += (w['weightedScore'] / total) * 100
-        dice.append({'persona': w['persona'], 'cumulativeMax': cumulative})
-
-    return dice
-
-def roll_weighted_dice(dice):
-    """Select persona based on weighted probability"""
-    r = random.random() * 100
-    for w in dice:
-        if r <= w['cumulativeMax']:
-            return w['persona']
-    return dice[0]['persona']
-
-def run_matching_round(users):
-    """Run one round of matching for all users"""
+def run_matching_round(users, dice_cache=None, include_alignments=True):
+    """
+    Run one round of matching for all users.
+    With a dice_cache, alignment and dice construction are reused across rounds;
+    include_alignments=False skips the per-user alignment lists (callers can
+    rebuild them for the few users they keep with dice_cache.alignments(row)).
+    """
     selections = []
+    user_ids = list(users)
+    user_masks = [users[user_id] for user_id in user_ids]
+    if dice_cache is None:
+        dice_cache = UserDiceCache(user_masks)
+    else:
+        dice_cache.sync(user_masks)
+    uniforms = [random.random() for _ in user_ids]
+    persona_idx, ranks = roll_weighted_dice_batch(dice_cache.cumulative, uniforms, dice_cache.order)
 
-    for user_id, user_vector in users.items():
-        alignments = compute_alignment(user_vector, PERSONAS)
-        dice = create_weighted_dice(alignments, LADDER_BONUSES)
-        selected_persona = roll_weighted_dice(dice)
-        rank = next((i+1 for i, p in enumerate(alignments) if p['persona'] == selected_persona), 1)
-
-        selections.append({
+    for row, (user_id, persona, rank) in enumerate(zip(user_ids, persona_idx.tolist(), ranks.tolist())):
+        selection = {
             'user_id': user_id,
-            'user_vector': user_vector,
-            'selected_persona': selected_persona,
-            'rank': rank,
-            'alignments': alignments
-        })
+            'user_row': row,
+            'user_vector': users[user_id],
+            'selected_persona': PERSONA_NAMES[persona],
+            'rank': rank
+        }
+        if include_alignments:
+            selection['alignments'] = dice_cache.alignments(row)
+        selections.append(selection)
 
     return selections
 
-def pair_users(selections):
+def pair_users(selections, rng=None):
     """Pair users based on their selected personas"""
-    persona_groups = defaultdict(list)
-    for sel in selections:
-        persona_groups[sel['selected_persona']].append(sel)
+    persona_idx = np.array([PERSONA_INDEX[sel['selected_persona']] for sel in selections], dtype=np.intp)
+    same_pairs, mixed_pairs, remaining = pair_users_array(persona_idx, rng)
 
     matches = []
-    remaining = []
-
-    # Pair within same persona
-    for persona, users in persona_groups.items():
-        random.shuffle(users)
-        while len(users) >= 2:
-            u1 = users.pop()
-            u2 = users.pop()
-            matches.append({
-                'user1': u1,
-                'user2': u2,
-                'match_type': 'same_persona',
-                'persona': persona
-            })
-        remaining.extend(users)
-
-    # Random fallback for remaining (MIXED PAIRS)
-    if len(remaining) >= 2:
-        random.shuffle(remaining)
-        while len(remaining) >= 2:
-            u1 = remaining.pop()
-            u2 = remaining.pop()
-            matches.append({
-                'user1': u1,
-                'user2': u2,
-                'match_type': 'mixed',
-                'persona': 'mixed'
-            })
+    for row1, row2 in same_pairs.tolist():
+        matches.append({
+            'user1': selections[row1],
+            'user2': selections[row2],
+            'match_type': 'same_persona',
+            'persona': selections[row1]['selected_persona']
+        })
+    for row1, row2 in mixed_pairs.tolist():
+        matches.append({
+            'user1': selections[row1],
+            'user2': selections[row2],
+            'match_type': 'mixed',
+            'persona': 'mixed'
+        })
 
-    return matches, remaining
+    return matches, [selections[row] for row in remaining.tolist()]
 
 # ============================================================================
 # CONNECTION ANALYSIS FUNCTIONS (ASYMMETRY & CROSS-PATH SYNERGY ANALYZER)
 # ============================================================================
+# Pairs per chunk in the batched connection kernel (two 16 x 16 float64 tensors each, ~16 MB per 4096 pairs)
+CONNECTION_CHUNK_SIZE = 4096
+
+def weighted_scores_batch(user_masks, ladder_bonuses=LADDER_BONUSES):
+    """
+    Ladder-weighted scores for many users as a users x 16 array in PERSONAS order
+    (the 'weighted_score' values apply_ladder_bonus gives for each user's alignments)
+    """
+    percentages, order = compute_alignment_batch(mask_array(user_masks))
+    ladder = np.array([ladder_bonuses[min(rank, len(ladder_bonuses) - 1)] for rank in range(16)])
+    weighted = np.empty_like(percentages)
+    np.put_along_axis(weighted, order, np.take_along_axis(percentages, order, axis=1) * ladder, axis=1)
+    return weighted
+
+def weighted_score_vector(weighted_scores):
+    """apply_ladder_bonus output as a length-16 array in PERSONAS order"""
+    return np.array([weighted_scores[name]['weighted_score'] for name in PERSONA_NAMES])
+
+def pair_weighted_scores(pairs):
+    """(weighted_A, weighted_B) P x 16 arrays for a MixedPairStore or a list of mixed-pair records"""
+    if isinstance(pairs, MixedPairStore):
+        masks_A, masks_B = pairs.column('user1_mask'), pairs.column('user2_mask')
+    else:
+        masks_A = [pair['user1_vector'] for pair in pairs]
+        masks_B = [pair['user2_vector'] for pair in pairs]
+    return weighted_scores_batch(masks_A), weighted_scores_batch(masks_B)
+
+def iter_connection_strength_chunks(weighted_A, weighted_B, max_possible=60.0, threshold=0.01,
+                                    chunk_size=CONNECTION_CHUNK_SIZE):
+    """
+    Batched calculate_connection_strength over P pairs of weighted-score vectors (P x 16 each).
+    Yields (start, strengths_AB, strengths_BA) per chunk of at most chunk_size pairs:
+        - strengths_AB[p, a, b]: A → B strength of pair start + p
+        - strengths_BA[p, b, a]: B → A strength of pair start + p
+    Strengths not above the threshold are zeroed (they are the entries the dicts leave out),
+    so peak memory depends only on chunk_size, not on P.
+    """
+    weighted_A = np.atleast_2d(np.asarray(weighted_A, dtype=np.float64))
+    weighted_B = np.atleast_2d(np.asarray(weighted_B, dtype=np.float64))
+    scale = max_possible ** 2
+
+    for start in range(0, len(weighted_A), chunk_size):
+        chunk_A = weighted_A[start:start + chunk_size]
+        chunk_B = weighted_B[start:start + chunk_size]
+        strengths_AB = chunk_A[:, :, None] * (0.8 * chunk_B[:, None, :] + 0.2 * chunk_A[:, :, None]) / scale
+        strengths_BA = chunk_B[:, :, None] * (0.8 * chunk_A[:, None, :] + 0.2 * chunk_B[:, :, None]) / scale
+        strengths_AB[strengths_AB <= threshold] = 0.0
+        strengths_BA[strengths_BA <= threshold] = 0.0
+        yield start, strengths_AB, strengths_BA
+
+def connection_strength_batch(weighted_A, weighted_B, max_possible=60.0, threshold=0.01,
+                              chunk_size=CONNECTION_CHUNK_SIZE):
+    """Dense P x 16 x 16 (strengths_AB, strengths_BA) tensors; see iter_connection_strength_chunks"""
+    weighted_A = np.atleast_2d(weighted_A)
+    strengths_AB = np.empty((len(weighted_A), 16, 16))
+    strengths_BA = np.empty((len(weighted_A), 16, 16))
+    for start, chunk_AB, chunk_BA in iter_connection_strength_chunks(weighted_A, weighted_B, max_possible,
+                                                                     threshold, chunk_size):
+        strengths_AB[start:start + len(chunk_AB)] = chunk_AB
+        strengths_BA[start:start + len(chunk_BA)] = chunk_BA
+    return strengths_AB, strengths_BA
+
+def connection_strength_dicts(strengths_AB, strengths_BA):
+    """
+    One pair's 16 x 16 strength matrices as calculate_connection_strength's dicts,
+    with the same keys, values and insertion order
+    """
+    connections_AB = {
+        (PERSONA_NAMES[a], PERSONA_NAMES[b]): strengths_AB[a, b]
+        for a, b in zip(*np.nonzero(strengths_AB))
+    }
+    # Keys (b, a), inserted in the same a-outer / b-inner order as the original loop
+    connections_BA = {
+        (PERSONA_NAMES[b], PERSONA_NAMES[a]): strengths_BA[b, a]
+        for a, b in zip(*np.nonzero(strengths_BA.T))
+    }
+    return ({key: float(value) for key, value in connections_AB.items()},
+            {key: float(value) for key, value in connections_BA.items()})
+
 def calculate_connection_strength(personA_weighted, personB_weighted, max_possible=60.0):
     """
     Calculate directional connection strengths between archetypes.
@@ -208,22 +202,19 @@ def calculate_connection_strength(personA_weighted, personB_weighted, max_possib
         - connections_AB: A → B
         - connections_BA: B → A
     Adds slight self-weighting to break perfect symmetry.
+    A single pair is cheaper as this plain loop than through the tensor kernel;
+    use connection_strength_batch for many pairs.
     """
     connections_AB = {}
     connections_BA = {}
-    archetypes = list(PERSONAS.keys())
-
-    for a in archetypes:
-        for b in archetypes:
-            a_to_b = (
-                personA_weighted[a]["weighted_score"]
-                * (0.8 * personB_weighted[b]["weighted_score"] + 0.2 * personA_weighted[a]["weighted_score"])
-            ) / (max_possible ** 2)
+    scores_A = [personA_weighted[name]["weighted_score"] for name in PERSONA_NAMES]
+    scores_B = [personB_weighted[name]["weighted_score"] for name in PERSONA_NAMES]
+    scale = max_possible ** 2
 
-            b_to_a = (
-                personB_weighted[b]["weighted_score"]
-                * (0.8 * personA_weighted[a]["weighted_score"] + 0.2 * personB_weighted[b]["weighted_score"])
-            ) / (max_possible ** 2)
+    for a, score_a in zip(PERSONA_NAMES, scores_A):
+        for b, score_b in zip(PERSONA_NAMES, scores_B):
+            a_to_b = (score_a * (0.8 * score_b + 0.2 * score_a)) / scale
+            b_to_a = (score_b * (0.8 * score_a + 0.2 * score_b)) / scale
 
             if a_to_b > 0.01:
                 connections_AB[(a, b)] = a_to_b
@@ -232,14 +223,23 @@ def calculate_connection_strength(personA_weighted, personB_weighted, max_possib
 
     return connections_AB, connections_BA
 
-def calculate_synergy_score(connections_AB, connections_BA, lower_bound=0.01, upper_bound=1.0):
+def connection_matrices(connections_AB, connections_BA):
+    """calculate_connection_strength dicts back as 16 x 16 matrices [a, b] / [b, a] (absent keys are 0)"""
+    strengths_AB = np.zeros((16, 16))
+    strengths_BA = np.zeros((16, 16))
+    for (a, b), strength in connections_AB.items():
+        strengths_AB[PERSONA_INDEX[a], PERSONA_INDEX[b]] = strength
+    for (b, a), strength in connections_BA.items():
+        strengths_BA[PERSONA_INDEX[b], PERSONA_INDEX[a]] = strength
+    return strengths_AB, strengths_BA
+
+def iter_asymmetric_paths(connections_AB, connections_BA, lower_bound=0.01, upper_bound=1.0):
     """
-    Detect both direct asymmetry and cross-path synergy between archetypes.
-    Returns a synergy score and detailed diagnostics.
+    Explain mode: lazily yield (gap, path) for every asymmetric path of
+    calculate_synergy_score, in the same order. gap is what the path adds to
+    the synergy score; the path dict (rounded gaps, formatted names) is only
+    built for paths that are actually consumed.
     """
-    synergy_score = 0.0
-    asymmetric_paths = []
-
     # Consider all connections above a minimal "strong enough" threshold
     threshold_strong = 0.01
     strong_AB = {k: v for k, v in connections_AB.items() if v >= threshold_strong}
@@ -252,14 +252,13 @@ def calculate_synergy_score(connections_AB, connections_BA, lower_bound=0.01, up
         abs_diff = abs(diff)
 
         if lower_bound <= abs_diff <= upper_bound:
-            asymmetric_paths.append({
+            yield abs_diff, {
                 "A_to_B": f"{a} → {b}",
                 "B_to_A": f"{b} → {a}",
                 "gap_A_to_B": round(diff, 4),
                 "gap_B_to_A": round(-diff, 4),
                 "diagnostic": "Direct Asymmetry"
-            })
-            synergy_score += abs_diff
+            }
 
     # ---------- Cross-path asymmetry ----------
     for (a, b), strength_AB in strong_AB.items():
@@ -267,138 +266,1099 @@ def calculate_synergy_score(connections_AB, connections_BA, lower_bound=0.01, up
             if a != a2 and b != b2:
                 gap = abs(strength_AB - strength_BA)
                 if lower_bound <= gap <= upper_bound:
-                    asymmetric_paths.append({
+                    yield gap / 2, {
                         "A_to_B": f"{a} → {b}",
                         "B_to_A": f"{b2} → {a2}",
                         "gap_A_to_B": round(strength_AB, 4),
                         "gap_B_to_A": round(strength_BA, 4),
                         "diagnostic": "Cross-Path Synergy"
-                    })
-                    synergy_score += gap / 2
+                    }
+
+def _path_gap(path):
+    """Sort key of find_top_asym_pair: largest absolute gap first"""
+    return abs(path["gap_A_to_B"] - path["gap_B_to_A"])
+
+def top_asymmetric_paths(connections_AB, connections_BA, k=3, lower_bound=0.01, upper_bound=1.0):
+    """Explain mode: the k asymmetric paths with the largest gap, without materializing the rest"""
+    paths = (path for _, path in iter_asymmetric_paths(connections_AB, connections_BA, lower_bound, upper_bound))
+    return heapq.nlargest(k, paths, key=_path_gap)
+
+def synergy_score_only(connections_AB, connections_BA, lower_bound=0.01, upper_bound=1.0):
+    """
+    Score-only mode: (synergy_score, direct_count, cross_count) without building any
+    path diagnostics (see synergy_scores_batch; equal to calculate_synergy_score's
+    score to floating-point tolerance)
+    """
+    strengths_AB, strengths_BA = connection_matrices(connections_AB, connections_BA)
+    scores, direct_counts, cross_counts = synergy_scores_batch(
+        strengths_AB[None], strengths_BA[None], lower_bound, upper_bound, return_counts=True
+    )
+    return float(scores[0]), int(direct_counts[0]), int(cross_counts[0])
+
+def calculate_synergy_score(connections_AB, connections_BA, lower_bound=0.01, upper_bound=1.0):
+    """
+    Detect both direct asymmetry and cross-path synergy between archetypes.
+    Returns a synergy score and detailed diagnostics.
+    (Explain mode with every path; use synergy_score_only when only the score is needed.)
+    """
+    synergy_score = 0.0
+    asymmetric_paths = []
+    for gap, path in iter_asymmetric_paths(connections_AB, connections_BA, lower_bound, upper_bound):
+        synergy_score += gap
+        asymmetric_paths.append(path)
 
     return synergy_score, asymmetric_paths
 
+class SynergyExamples(Sequence):
+    """
+    Every asymmetric path of P pairs, in calculate_synergy_score order (pair by pair),
+    as a lazy sequence: the length comes from the batch kernel's path counts and a
+    pair's path dicts are only built when its entries are read.
+    """
+
+    def __init__(self, weighted_A, weighted_B, path_counts, lower_bound=0.01, upper_bound=1.0):
+        self.weighted_A = np.atleast_2d(weighted_A)
+        self.weighted_B = np.atleast_2d(weighted_B)
+        self.offsets = np.concatenate([[0], np.cumsum(path_counts)])
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def pair_paths(self, pair):
+        """Path dicts of one pair (explain mode)"""
+        strengths_AB, strengths_BA = connection_strength_batch(self.weighted_A[pair], self.weighted_B[pair])
+        connections_AB, connections_BA = connection_strength_dicts(strengths_AB[0], strengths_BA[0])
+        return [path for _, path in iter_asymmetric_paths(connections_AB, connections_BA,
+                                                          self.lower_bound, self.upper_bound)]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("synergy example index out of range")
+        pair = int(np.searchsorted(self.offsets, index, side='right')) - 1
+        return self.pair_paths(pair)[index - self.offsets[pair]]
+
+    def __iter__(self):
+        for pair in range(len(self.weighted_A)):
+            yield from self.pair_paths(pair)
+
+# Pairs per block in synergy_scores_batch (keeps prefix sums small, so gap sums stay precise)
+SYNERGY_BLOCK_SIZE = 512
+# Gaps this close to a synergy bound are decided by the exact pairwise comparison
+BOUND_TOLERANCE = 1e-9
+
+def _expand_ranges(starts, stops):
+    """(owner, position) for every position in each [starts[i], stops[i]) range"""
+    lengths = np.maximum(stops - starts, 0)
+    owners = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owners, starts[owners] + offsets
+
+def _windowed_gap_sums(x, x_groups, y, y_groups, num_groups, lower_bound, upper_bound):
+    """
+    Per group: (sum, count) of |x - y| over every x, y of that group with
+    lower_bound <= |x - y| <= upper_bound, in O(n log n) via sorted y and prefix sums.
+    The y within BOUND_TOLERANCE of a bound are re-checked with the exact |x - y|
+    comparison, so ties at the bounds are decided exactly as the pairwise loop does.
+    """
+    # One global searchsorted: each group's values are shifted into their own disjoint
+    # interval (the shift rounds far below BOUND_TOLERANCE for SYNERGY_BLOCK_SIZE pairs)
+    span = 2.0 * (max(np.abs(x).max(initial=0.0), np.abs(y).max(initial=0.0)) + abs(upper_bound)) + 1.0
+    order = np.lexsort((y, y_groups))
+    y_sorted = y[order]
+    keys = y_sorted + y_groups[order] * span
+    x_offsets = x_groups * span
+    prefix = np.concatenate([[0.0], np.cumsum(y_sorted)])
+
+    def count_below(queries, inclusive=False):
+        return np.searchsorted(keys, queries + x_offsets, side='right' if inclusive else 'left')
+
+    gaps = np.zeros(len(x))
+    hit_counts = np.zeros(len(x), dtype=np.int64)
+    # y above x contributes y - x, y below x contributes x - y
+    for low, high, sign in ((x + lower_bound, x + upper_bound, 1.0),
+                            (x - upper_bound, x - lower_bound, -1.0)):
+        band_start = count_below(low - BOUND_TOLERANCE)
+        inner_start = count_below(low + BOUND_TOLERANCE)
+        inner_stop = np.maximum(count_below(high - BOUND_TOLERANCE, inclusive=True), inner_start)
+        band_stop = count_below(high + BOUND_TOLERANCE, inclusive=True)
+
+        count = inner_stop - inner_start
+        gaps += sign * ((prefix[inner_stop] - prefix[inner_start]) - x * count)
+        hit_counts += count
+
+        for starts, stops in ((band_start, np.minimum(inner_start, band_stop)), (inner_stop, band_stop)):
+            owners, positions = _expand_ranges(starts, stops)
+            x_band, y_band = x[owners], y_sorted[positions]
+            gap = np.abs(x_band - y_band)
+            on_side = (y_band >= x_band) if sign > 0 else (y_band < x_band)
+            hits = on_side & (gap >= lower_bound) & (gap <= upper_bound)
+            np.add.at(gaps, owners[hits], gap[hits])
+            np.add.at(hit_counts, owners[hits], 1)
+
+    return (np.bincount(x_groups, weights=gaps, minlength=num_groups),
+            np.bincount(x_groups, weights=hit_counts, minlength=num_groups).astype(np.int64))
+
+def synergy_scores_batch(strengths_AB, strengths_BA, lower_bound=0.01, upper_bound=1.0,
+                         threshold_strong=0.01, block_size=SYNERGY_BLOCK_SIZE, return_counts=False):
+    """
+    synergy_score of calculate_synergy_score for P pairs at once, from the dense
+    strengths_AB[p, a, b] / strengths_BA[p, b, a] tensors of iter_connection_strength_chunks.
+
+    Cross-path synergy sums gap / 2 over every strong A→B (a, b) and strong B→A (b2, a2)
+    with a != a2 and b != b2. Instead of enumerating up to 256 x 256 combinations it is
+    computed by inclusion-exclusion over windowed gap sums:
+        all combinations - same a - same b + same (a, b)
+    Matches the enumerated score to floating-point tolerance.
+    With return_counts=True also returns the number of direct and cross-path
+    asymmetric paths per pair: (scores, direct_counts, cross_counts).
+    """
+    strengths_AB = np.asarray(strengths_AB)
+    strengths_BA = np.asarray(strengths_BA)
+    scores = np.empty(len(strengths_AB))
+    direct_counts = np.empty(len(strengths_AB), dtype=np.int64)
+    cross_counts = np.empty(len(strengths_AB), dtype=np.int64)
+
+    for start in range(0, len(strengths_AB), block_size):
+        block_AB = strengths_AB[start:start + block_size]
+        # reverse_BA[p, a, b] = strengths_BA[p, b, a], the B→A strength back along (a, b)
+        reverse_BA = strengths_BA[start:start + block_size].transpose(0, 2, 1)
+        num_pairs = len(block_AB)
+        strong_AB = block_AB >= threshold_strong
+        strong_BA = reverse_BA >= threshold_strong
+
+        # ---------- Direct asymmetry ----------
+        direct = np.abs(block_AB - reverse_BA)
+        direct_hits = strong_AB & (direct >= lower_bound) & (direct <= upper_bound)
+        direct_scores = np.where(direct_hits, direct, 0.0).sum(axis=(1, 2))
+
+        # ---------- Cross-path asymmetry ----------
+        pair_x, a_x, b_x = np.nonzero(strong_AB)
+        pair_y, a_y, b_y = np.nonzero(strong_BA)
+        x, y = block_AB[pair_x, a_x, b_x], reverse_BA[pair_y, a_y, b_y]
+
+        cross, cross_count = _windowed_gap_sums(x, pair_x, y, pair_y, num_pairs, lower_bound, upper_bound)
+        for axis_x, axis_y in ((a_x, a_y), (b_x, b_y)):
+            shared, shared_count = _windowed_gap_sums(x, pair_x * 16 + axis_x, y, pair_y * 16 + axis_y,
+                                                      num_pairs * 16, lower_bound, upper_bound)
+            cross -= shared.reshape(num_pairs, 16).sum(axis=1)
+            cross_count -= shared_count.reshape(num_pairs, 16).sum(axis=1)
+        same_path_hits = strong_AB & strong_BA & (direct >= lower_bound) & (direct <= upper_bound)
+        cross += np.where(same_path_hits, direct, 0.0).sum(axis=(1, 2))
+        cross_count += same_path_hits.sum(axis=(1, 2))
+
+        scores[start:start + num_pairs] = direct_scores + cross / 2
+        direct_counts[start:start + num_pairs] = direct_hits.sum(axis=(1, 2))
+        cross_counts[start:start + num_pairs] = cross_count
+
+    if return_counts:
+        return scores, direct_counts, cross_counts
+    return scores
+
+# Most (profile A, profile B) entries SynergyCache keeps (~0.5 KB each)
+SYNERGY_CACHE_SIZE = 65536
+
+SynergyCacheInfo = namedtuple('SynergyCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class SynergyCache:
+    """
+    Memoized score-only synergy, keyed by the two users' weighted profiles.
+    Synergy only depends on the multiset of each user's 16 weighted scores (relabeling
+    archetypes permutes the A→B / B→A strengths consistently), so the key is both
+    weighted vectors sorted descending: with 5 interests there are only a few thousand
+    distinct profiles, however many users or pairs a run has. Entries are evicted
+    least recently used first once maxsize is reached.
+    """
+
+    def __init__(self, maxsize=SYNERGY_CACHE_SIZE, lower_bound=0.01, upper_bound=1.0):
+        self.maxsize = maxsize
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def cache_info(self):
+        return SynergyCacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def scores(self, weighted_A, weighted_B):
+        """
+        (scores, direct_counts, cross_counts) arrays for P pairs of weighted-score vectors
+        (P x 16 each, any archetype order); only profile pairs not yet cached are computed
+        """
+        weighted_A = np.atleast_2d(weighted_A)
+        weighted_B = np.atleast_2d(weighted_B)
+        profiles = np.hstack([-np.sort(-weighted_A, axis=1), -np.sort(-weighted_B, axis=1)])
+        unique_profiles, inverse = np.unique(profiles, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        results = np.empty((len(unique_profiles), 3))
+        keys = [profile.tobytes() for profile in unique_profiles]
+        missing = []
+        for row, key in enumerate(keys):
+            entry = self._entries.get(key)
+            if entry is None:
+                missing.append(row)
+            else:
+                self._entries.move_to_end(key)
+                results[row] = entry
+
+        if missing:
+            computed = []
+            for _, strengths_AB, strengths_BA in iter_connection_strength_chunks(
+                    unique_profiles[missing, :16], unique_profiles[missing, 16:]):
+                computed.append(np.column_stack(synergy_scores_batch(
+                    strengths_AB, strengths_BA, self.lower_bound, self.upper_bound, return_counts=True
+                )))
+            computed = np.concatenate(computed)
+            results[missing] = computed
+            for row, entry in zip(missing, computed):
+                self._entries[keys[row]] = tuple(entry.tolist())
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        # Every pair whose profiles did not have to be computed counts as a hit
+        self.misses += len(missing)
+        self.hits += len(profiles) - len(missing)
+
+        results = results[inverse]
+        return results[:, 0], results[:, 1].astype(np.int64), results[:, 2].astype(np.int64)
+
+    def score(self, personA_weighted, personB_weighted):
+        """(synergy_score, direct_count, cross_count) for one pair of apply_ladder_bonus dicts"""
+        scores, direct_counts, cross_counts = self.scores(
+            weighted_score_vector(personA_weighted), weighted_score_vector(personB_weighted)
+        )
+        return float(scores[0]), int(direct_counts[0]), int(cross_counts[0])
+
+# Shared by the analysis functions, so repeated analyses of a run reuse earlier profiles
+SYNERGY_CACHE = SynergyCache()
+
 def find_top_asym_pair(connections_AB, connections_BA):
-    # Calculate all asymmetries
-    _, asym_paths = calculate_synergy_score(connections_AB, connections_BA)
+    # Largest absolute gap in direct asymmetry first (first one wins ties, as a stable sort would)
+    top_paths = top_asymmetric_paths(connections_AB, connections_BA, k=1)
 
-    if not asym_paths:
+    if not top_paths:
         return None, None
 
-    # Sort by largest absolute gap in direct asymmetry first
-    asym_paths.sort(key=lambda x: abs(x["gap_A_to_B"] - x["gap_B_to_A"]), reverse=True)
+    return top_paths[0]
 
-    # Pick the first one (largest asymmetry)
-    top_asym = asym_paths[0]
 
-    return top_asym
+# ============================================================================
+# MIXED PAIR STORE (COLUMNAR)
+# ============================================================================
+
+class MixedPairStore(Sequence):
+    """
+    Columnar store of mixed pairs: fixed-width integer columns for sim, round and
+    user rows plus packed interest masks (32 bytes per pair), grown in chunks.
+    Indexing returns the same record dict the analysis functions read
+    ('user1_id', 'user1_vector', 'user1_alignments', ...); alignments are
+    recomputed from the interest masks on demand instead of being stored per pair.
+    """
+
+    COLUMNS = {
+        'sim': np.int32,
+        'round': np.int32,
+        'user1_row': np.int32,
+        'user2_row': np.int32,
+        'user1_mask': np.uint64,
+        'user2_mask': np.uint64
+    }
+
+    def __init__(self, chunk_size=4096):
+        self.chunk_size = chunk_size
+        self._size = 0
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def seen(self):
+        """Number of pairs offered to the store (all of them are kept)"""
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            rows = range(*index.indices(self._size))
+            return self.take(np.arange(rows.start, rows.stop, rows.step))
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("mixed pair index out of range")
+        return self.record(index)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self.record(index)
+
+    def __getstate__(self):
+        # Only ship the filled part of each column (e.g. from worker processes)
+        return {'chunk_size': self.chunk_size, 'columns': self.columns()}
+
+    def __setstate__(self, state):
+        self.__init__(state['chunk_size'])
+        self.append(**state['columns'])
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._columns['sim'])
+        if needed <= capacity:
+            return
+        # Grow in whole chunks, at least doubling so appends stay amortized O(1)
+        new_capacity = max(capacity * 2, -(-needed // self.chunk_size) * self.chunk_size)
+        for name, column in self._columns.items():
+            grown = np.empty(new_capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, sim, round, user1_row, user2_row, user1_mask, user2_mask):
+        """Append a batch of pairs; scalar sim/round values are broadcast"""
+        user1_row = np.atleast_1d(user1_row)
+        count = len(user1_row)
+        self._reserve(count)
+        values = {'sim': sim, 'round': round, 'user1_row': user1_row, 'user2_row': user2_row,
+                  'user1_mask': user1_mask, 'user2_mask': user2_mask}
+        for name, value in values.items():
+            self._columns[name][self._size:self._size + count] = value
+        self._size += count
+
+    def extend(self, other):
+        """Append every pair of another store (e.g. one simulation's pairs)"""
+        self.append(**other.columns())
+
+    def column(self, name):
+        """Read-only view of one column"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def columns(self):
+        return {name: self.column(name) for name in self.COLUMNS}
+
+    def take(self, indices):
+        """New store holding the pairs at the given indices"""
+        subset = MixedPairStore(self.chunk_size)
+        subset.append(**{name: column[indices] for name, column in self.columns().items()})
+        return subset
+
+    def record(self, index):
+        """Dict view of one pair, matching the original per-pair mixed_pairs entries"""
+        columns = self._columns
+        user1_mask = int(columns['user1_mask'][index])
+        user2_mask = int(columns['user2_mask'][index])
+        return {
+            'sim': int(columns['sim'][index]),
+            'round': int(columns['round'][index]),
+            'user1_id': f"User_{columns['user1_row'][index]}",
+            'user1_vector': user1_mask,
+            'user1_alignments': compute_alignment(user1_mask, PERSONAS),
+            'user2_id': f"User_{columns['user2_row'][index]}",
+            'user2_vector': user2_mask,
+            'user2_alignments': compute_alignment(user2_mask, PERSONAS)
+        }
+
+class MixedPairReservoir(MixedPairStore):
+    """
+    Bounded MixedPairStore: keeps a uniform random sample of at most `capacity`
+    pairs out of every pair offered (reservoir sampling, Algorithm R applied one
+    round batch at a time), so memory stays flat however many events are run.
+    `seen` counts every pair offered, retained or not.
+    """
+
+    def __init__(self, capacity, rng=None, chunk_size=4096):
+        super().__init__(min(chunk_size, max(capacity, 1)))
+        self.capacity = capacity
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        self._seen = 0
+
+    @property
+    def seen(self):
+        return self._seen
+
+    @classmethod
+    def from_columns(cls, capacity, columns, seen, rng=None):
+        """Rebuild a reservoir from its retained columns and the number of pairs it had seen"""
+        reservoir = cls(capacity, rng)
+        MixedPairStore.append(reservoir, **columns)
+        reservoir._seen = seen
+        return reservoir
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.update(capacity=self.capacity, seen=self._seen, rng=self.rng)
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(state['capacity'], state['rng'], state['chunk_size'])
+        MixedPairStore.append(self, **state['columns'])
+        self._seen = state['seen']
+
+    def append(self, sim, round, user1_row, user2_row, user1_mask, user2_mask):
+        """Offer a batch of pairs; each pair ends up retained with probability capacity / seen"""
+        user1_row = np.atleast_1d(user1_row)
+        count = len(user1_row)
+        values = {name: np.broadcast_to(value, count)
+                  for name, value in zip(self.COLUMNS, (sim, round, user1_row, user2_row, user1_mask, user2_mask))}
+
+        # Fill the reservoir while it has room
+        fill = min(max(self.capacity - self._size, 0), count)
+        if fill:
+            super().append(**{name: value[:fill] for name, value in values.items()})
+
+        # Pair number t (0-based over all pairs seen) replaces a random slot with probability capacity / (t + 1)
+        if fill < count and self.capacity > 0:
+            positions = np.arange(self._seen + fill, self._seen + count)
+            slots = self.rng.integers(0, positions + 1)
+            replace = np.flatnonzero(slots < self.capacity)
+            # Later pairs overwrite earlier ones that drew the same slot, as in the sequential algorithm
+            reversed_slots = slots[replace][::-1]
+            _, last = np.unique(reversed_slots, return_index=True)
+            replace = replace[::-1][last]
+            for name, value in values.items():
+                self._columns[name][slots[replace]] = value[fill + replace]
+        self._seen += count
+
+    def extend(self, other):
+        """
+        Merge another store into the reservoir. Two reservoirs combine into a
+        uniform sample of the union of their streams: the share drawn from each
+        side is hypergeometric in the number of pairs each one saw. Both reservoirs
+        must have the same capacity, so each side retains enough pairs for any draw.
+        """
+        if not isinstance(other, MixedPairReservoir):
+            self.append(**other.columns())
+            return
+        if other.capacity != self.capacity:
+            raise ValueError(f"cannot merge a reservoir of capacity {other.capacity} "
+                             f"into one of capacity {self.capacity}")
+
+        total_seen = self._seen + other.seen
+        keep = min(self.capacity, total_seen)
+        from_self = self.rng.hypergeometric(self._seen, other.seen, keep) if keep else 0
+        mine = self.rng.choice(self._size, size=from_self, replace=False)
+        theirs = self.rng.choice(len(other), size=keep - from_self, replace=False)
+        merged = {name: np.concatenate([self.column(name)[mine], other.column(name)[theirs]])
+                  for name in self.COLUMNS}
+        self._size = 0
+        MixedPairStore.append(self, **merged)
+        self._seen = total_seen
+
+    def extend_stratum(self, other, quota):
+        """
+        Add another store as one stratum of a stratified sample: a uniform subset of
+        at most quota of its retained pairs is kept as is, and everything it saw is
+        added to seen. Strata quotas must sum to at most capacity.
+        """
+        if self._size + min(quota, len(other)) > self.capacity:
+            raise ValueError(f"stratum of {quota} pairs does not fit in the reservoir "
+                             f"({self._size} of {self.capacity} slots used)")
+        if len(other) > quota:
+            rows = np.sort(self.rng.choice(len(other), size=quota, replace=False))
+            MixedPairStore.append(self, **{name: column[rows] for name, column in other.columns().items()})
+        else:
+            MixedPairStore.append(self, **other.columns())
+        self._seen += other.seen
 
 
+# ============================================================================
+# RUN CHECKPOINTS
+# ============================================================================
+
+# A run directory holds meta.json (run parameters and root seed) plus one
+# sim_NNNNN.npz per finished simulation: its count histograms, retained mixed-pair
+# columns, final RNG state and CPU time
+CHECKPOINT_META = "meta.json"
+
+def _checkpoint_path(run_dir, sim):
+    return os.path.join(run_dir, f"sim_{sim:05d}.npz")
+
+def open_checkpoint_dir(run_dir, parameters, resume=False):
+    """
+    Create run_dir (or reopen it with resume=True) and return the run parameters.
+    On resume the stored parameters must match; seed=None reuses the stored root
+    seed, so the remaining simulations continue the same random streams.
+    Returns (parameters, completed_simulation_indices).
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    meta_path = os.path.join(run_dir, CHECKPOINT_META)
+    stored = None
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            stored = json.load(f)
+
+    if stored is None or not resume:
+        if stored is not None:
+            raise FileExistsError(f"{run_dir} already holds a checkpointed run; pass resume=True to continue it "
+                                  "or choose another directory")
+        if parameters['seed'] is None:
+            # Fix the root seed now, so a resumed run continues the same random streams
+            parameters = dict(parameters, seed=random.getrandbits(128))
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(parameters, f, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+        return parameters, set()
+
+    if parameters['seed'] is None:
+        parameters = dict(parameters, seed=stored['seed'])
+    mismatched = sorted(key for key in parameters if stored.get(key) != parameters[key])
+    if mismatched:
+        raise ValueError(f"cannot resume {run_dir}: parameters differ ({', '.join(mismatched)})")
+    completed = {sim for sim in range(parameters['num_simulations'])
+                 if os.path.exists(_checkpoint_path(run_dir, sim))}
+    return parameters, completed
+
+def save_simulation_checkpoint(run_dir, sim, sim_result):
+    """Write one finished simulation to run_dir (atomically, so a crash never leaves half a file)"""
+    histograms = sim_result['histograms']
+    mixed_pairs = sim_result['mixed_pairs']
+    path = _checkpoint_path(run_dir, sim)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            persona_counts=histograms.totals['persona'],
+            rank_counts=histograms.totals['rank'],
+            match_counts=histograms.totals['match'],
+            pairs_seen=np.int64(mixed_pairs.seen),
+            rng_state=np.array(json.dumps(sim_result['rng_state'])),
+            cpu_seconds=np.float64(sim_result['cpu_seconds']),
+            **mixed_pairs.columns()
+        )
+    os.replace(path + ".tmp", path)
+
+def load_simulation_checkpoint(run_dir, sim, pair_capacity=None):
+    """A checkpointed simulation as the result dict simulate_once_with_connection_tracking returned"""
+    with np.load(_checkpoint_path(run_dir, sim)) as data:
+        columns = {name: data[name] for name in MixedPairStore.COLUMNS}
+        if pair_capacity is None:
+            mixed_pairs = MixedPairStore()
+            mixed_pairs.append(**columns)
+        else:
+            mixed_pairs = MixedPairReservoir.from_columns(pair_capacity, columns, int(data['pairs_seen']))
+        return {
+            'histograms': SimulationHistograms.from_counts(data['persona_counts'], data['rank_counts'],
+                                                           data['match_counts'], MATCH_TYPES),
+            'mixed_pairs': mixed_pairs,
+            'rng_state': json.loads(str(data['rng_state'])),
+            'cpu_seconds': float(data['cpu_seconds'])
+        }
+
+# ============================================================================
+# STREAMING EVENT PIPELINE (ROUND BATCHES AND CONSUMERS)
+# ============================================================================
+# One simulation is a stream of RoundBatch tuples, one per round: every user's
+# selection (persona index and rank) plus the round's pairs as row arrays. A batch
+# is bounded by num_users and is dropped once every consumer has seen it, so a
+# simulation's memory does not grow with its number of rounds. user_masks is the
+# simulation's population (shared by all batches, not copied).
+RoundBatch = namedtuple('RoundBatch', ['sim', 'round', 'user_masks', 'persona_idx', 'ranks',
+                                       'same_pairs', 'mixed_pairs', 'remaining'])
+
+# Bin edges of the SynergyConsumer score histogram (scores above the last edge go in the last bin)
+SYNERGY_HISTOGRAM_EDGES = np.linspace(0.0, 4000.0, 81)
+
+def iter_round_batches(sim, rng, num_users, num_rounds, timers=NULL_TIMERS, lookup_table=None):
+    """
+    Yield one RoundBatch per round of a simulation drawn from rng. The draws are
+    the ones the simulation loop has always made, in the same order, so consumers
+    see exactly the events simulate_once_with_connection_tracking counts.
+    """
+    # Generate users (packed interest bitmasks; see interests_to_mask)
+    with timers.phase('generate_users'):
+        user_masks = generate_user_population(num_users, 5, rng=rng)
+
+    # Alignment and dice are built once per simulation; only rolls and pairing repeat
+    with timers.phase('build_dice'):
+        dice_cache = UserDiceCache(user_masks, lookup_table=lookup_table)
+
+    for round_num in range(num_rounds):
+        with timers.phase('roll_dice'):
+            persona_idx, ranks = roll_weighted_dice_batch(dice_cache.cumulative, rng.random(num_users),
+                                                          dice_cache.order)
+        with timers.phase('pair_users'):
+            same_pairs, mixed_pairs, remaining = pair_users_array(persona_idx, rng)
+        yield RoundBatch(sim, round_num, user_masks, persona_idx, ranks, same_pairs, mixed_pairs, remaining)
+
+def run_event_pipeline(batches, consumers=(), timers=NULL_TIMERS, pair_capacity=None, reservoir_rng=None):
+    """
+    Feed every batch to the standard consumers (a HistogramConsumer and a MixedPairConsumer
+    bounded by pair_capacity, drawing from reservoir_rng) and to any extra consumers in a
+    single pass, then close them (also when a batch or consumer raises, so writers
+    never leak open files). Each consumer's time is recorded under its phase name.
+    Returns {name: consumer}.
+    """
+    consumers = [HistogramConsumer(), MixedPairConsumer(pair_capacity, reservoir_rng), *consumers]
+    try:
+        for batch in batches:
+            for consumer in consumers:
+                with timers.phase(consumer.phase):
+                    consumer.consume(batch)
+    finally:
+        for consumer in consumers:
+            consumer.close()
+    return {consumer.name: consumer for consumer in consumers}
+
+class EventConsumer(ABC):
+    """
+    Abstract base class of pipeline stages. A consumer is created per simulation, folds
+    each RoundBatch into fixed-size state in consume(), and consumers of the same
+    kind from different simulations (or workers) combine with merge().
+    Subclasses must be picklable, since they are returned from worker processes.
+    """
+
+    name = 'events'
+    phase = 'consume_events'
+
+    @abstractmethod
+    def consume(self, batch):
+        """Fold one RoundBatch into the consumer's state"""
+
+    def close(self):
+        """Called once after the last batch of a simulation"""
+
+    @abstractmethod
+    def merge(self, other):
+        """Fold another consumer of the same kind into this one (returns self)"""
+
+    @abstractmethod
+    def result(self):
+        """The consumer's output for the run results"""
+
+class HistogramConsumer(EventConsumer):
+    """Persona, rank and match-type counts of a stream, as SimulationHistograms"""
+
+    name = 'histograms'
+    phase = 'bookkeeping'
+
+    def __init__(self):
+        self.persona_counts = np.zeros(16, dtype=np.int64)
+        self.rank_counts = np.zeros(16, dtype=np.int64)
+        self.match_counts = np.zeros(2, dtype=np.int64)
+        self.histograms = None
+
+    def consume(self, batch):
+        # Track selections
+        self.persona_counts += np.bincount(batch.persona_idx, minlength=16)
+        self.rank_counts += np.bincount(batch.ranks - 1, minlength=16)
+
+        # Track matches (same_persona, mixed)
+        self.match_counts[0] += len(batch.same_pairs)
+        self.match_counts[1] += len(batch.mixed_pairs)
+
+    def close(self):
+        self.histograms = SimulationHistograms.from_counts(self.persona_counts, self.rank_counts,
+                                                           self.match_counts, MATCH_TYPES)
+
+    def merge(self, other):
+        self.histograms.merge(other.histograms)
+        return self
+
+    def result(self):
+        return self.histograms
+
+class MixedPairConsumer(EventConsumer):
+    """
+    Mixed pairs of a stream: a MixedPairReservoir of at most pair_capacity pairs, or a
+    MixedPairStore keeping every pair when pair_capacity is None (or the given store)
+    """
+
+    name = 'mixed_pairs'
+    phase = 'capture_mixed_pairs'
+
+    def __init__(self, pair_capacity=None, rng=None, store=None):
+        if store is None:
+            store = MixedPairStore() if pair_capacity is None else MixedPairReservoir(pair_capacity, rng=rng)
+        self.store = store
+
+    def consume(self, batch):
+        # Store mixed pairs for connection analysis (rows + interest masks only)
+        mixed_pairs = batch.mixed_pairs
+        if len(mixed_pairs):
+            self.store.append(batch.sim, batch.round, mixed_pairs[:, 0], mixed_pairs[:, 1],
+                              batch.user_masks[mixed_pairs[:, 0]], batch.user_masks[mixed_pairs[:, 1]])
+
+    def merge(self, other):
+        self.store.extend(other.store)
+        return self
+
+    def result(self):
+        return self.store
+
+class SynergyConsumer(EventConsumer):
+    """
+    Cross-path synergy of every mixed pair, scored as the pairs stream past and
+    kept only as running moments, a fixed histogram and the best pair found, so
+    every mixed pair of a run is scored without retaining any of them.
+    """
+
+    name = 'synergy'
+    phase = 'synergy_scoring'
+
+    def __init__(self, edges=SYNERGY_HISTOGRAM_EDGES, lower_bound=0.01, upper_bound=1.0):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.cache = SynergyCache(lower_bound=lower_bound, upper_bound=upper_bound)
+        self.pairs = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.best = None
+
+    def __getstate__(self):
+        # The profile cache only speeds up scoring; workers do not ship it back
+        state = self.__dict__.copy()
+        state['cache'] = SynergyCache(0, self.cache.lower_bound, self.cache.upper_bound)
+        return state
+
+    def consume(self, batch):
+        mixed_pairs = batch.mixed_pairs
+        if not len(mixed_pairs):
+            return
+        scores, _, _ = self.cache.scores(weighted_scores_batch(batch.user_masks[mixed_pairs[:, 0]]),
+                                         weighted_scores_batch(batch.user_masks[mixed_pairs[:, 1]]))
+        bins = np.clip(np.searchsorted(self.edges, scores, side='right') - 1, 0, len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        self.pairs += len(scores)
+        self.total += float(scores.sum())
+        self.total_squares += float(np.square(scores).sum())
+
+        top = int(np.argmax(scores))
+        if self.best is None or scores[top] > self.best['synergy_score']:
+            self.best = {'synergy_score': float(scores[top]), 'sim': batch.sim, 'round': batch.round,
+                         'user1_row': int(mixed_pairs[top, 0]), 'user2_row': int(mixed_pairs[top, 1])}
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.pairs += other.pairs
+        self.total += other.total
+        self.total_squares += other.total_squares
+        # Ties keep the earlier simulation's pair, since merges run in simulation order
+        if other.best is not None and (self.best is None or other.best['synergy_score'] > self.best['synergy_score']):
+            self.best = other.best
+        return self
+
+    def result(self):
+        mean = self.total / self.pairs if self.pairs else 0.0
+        variance = self.total_squares / self.pairs - mean ** 2 if self.pairs else 0.0
+        return {
+            'pairs_scored': self.pairs,
+            'mean': mean,
+            'std': float(np.sqrt(max(variance, 0.0))),
+            'histogram': self.counts,
+            'edges': self.edges,
+            'top_pair': self.best
+        }
+
+class EventFileWriter(EventConsumer):
+    """
+    Stream a simulation's pairs to CSV as they are made (one file per simulation in
+    directory, one row per pair), so the full event log of a run can be kept on disk
+    without holding it in memory. mixed_only=False also writes same-persona pairs.
+    """
+
+    name = 'event_files'
+    phase = 'write_events'
+    HEADER = "sim,round,match_type,persona,user1_row,user2_row,user1_mask,user2_mask"
+
+    def __init__(self, directory, mixed_only=True):
+        self.directory = directory
+        self.mixed_only = mixed_only
+        self.paths = []
+        self._file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_file'] = None
+        return state
+
+    def _write(self, batch, match_type, pairs, personas):
+        masks = batch.user_masks
+        rows = zip(pairs[:, 0].tolist(), pairs[:, 1].tolist(), personas,
+                   masks[pairs[:, 0]].tolist(), masks[pairs[:, 1]].tolist())
+        self._file.writelines(f"{batch.sim},{batch.round},{match_type},{persona},{row1},{row2},{mask1},{mask2}\n"
+                              for row1, row2, persona, mask1, mask2 in rows)
+
+    def consume(self, batch):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"events_sim{batch.sim:05d}.csv")
+            self._file = open(path, "w")
+            self._file.write(self.HEADER + "\n")
+            self.paths.append(path)
+        if not self.mixed_only:
+            personas = [PERSONA_NAMES[p] for p in batch.persona_idx[batch.same_pairs[:, 0]].tolist()]
+            self._write(batch, 'same_persona', batch.same_pairs, personas)
+        self._write(batch, 'mixed', batch.mixed_pairs, ['mixed'] * len(batch.mixed_pairs))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def merge(self, other):
+        self.paths.extend(other.paths)
+        return self
+
+    def result(self):
+        return self.paths
+
+def print_stream_analyses(analyses):
+    """Summary of the extra pipeline consumers of a run"""
+    synergy = analyses.get('synergy')
+    if synergy is not None:
+        print(f"\nStreamed Synergy Scores ({synergy['pairs_scored']:,} mixed pairs, none retained):")
+        print(f"  - Mean: {synergy['mean']:.1f} ± {synergy['std']:.1f}")
+        top = synergy['top_pair']
+        if top is not None:
+            print(f"  - Top pair: User_{top['user1_row']} & User_{top['user2_row']} "
+                  f"(sim {top['sim']}, round {top['round']}, synergy {top['synergy_score']:.1f})")
+    paths = analyses.get('event_files')
+    if paths is not None:
+        print(f"\nEvent log: {len(paths)} CSV file(s) in {os.path.dirname(paths[0]) if paths else '-'}")
+
 # ============================================================================
 # MONTE CARLO SIMULATION
 # ============================================================================
 
-def run_simulation_with_connection_tracking(num_users=10000, num_rounds=10, num_simulations=20):
-    """Run Monte Carlo simulation and track mixed pairs for connection analysis"""
+# Match types tracked per simulation
+MATCH_TYPES = ['same_persona', 'mixed']
+
+def _reservoir_rng(seed_sequence, key):
+    """Separate stream for reservoir draws, so retention never shifts the simulation's own draws"""
+    return np.random.default_rng(np.random.SeedSequence(seed_sequence.entropy, spawn_key=tuple(seed_sequence.spawn_key) + (key,)))
+
+def simulate_once_with_connection_tracking(sim, seed_sequence, num_users, num_rounds, pair_capacity=None,
+                                           instrumentation=None, analyses=(), lookup_table=None):
+    """
+    Run one independent simulation on its own RNG stream, keeping its mixed pairs
+    (all of them, or a reservoir sample of at most pair_capacity).
+    analyses are EventConsumer factories (e.g. SynergyConsumer); their consumers see
+    the same round batches in the same pass and are returned under 'analyses'.
+    """
+    started = time.process_time()
+    report = InstrumentationReport(instrumentation)
+    timers = report.phase_timers
+    profiling = start_sampled_profiling(sim, instrumentation)
+    rng = np.random.default_rng(seed_sequence)
+
+    extra = [factory() for factory in analyses]
+    consumers = run_event_pipeline(iter_round_batches(sim, rng, num_users, num_rounds, timers, lookup_table),
+                                   extra, timers, pair_capacity, _reservoir_rng(seed_sequence, 0))
+
+    finish_sampled_profiling(profiling, report)
+    sim_result = {
+        'histograms': consumers['histograms'].result(),
+        'mixed_pairs': consumers['mixed_pairs'].result(),
+        'rng_state': rng.bit_generator.state,
+        'cpu_seconds': time.process_time() - started
+    }
+    if extra:
+        sim_result['analyses'] = {consumer.name: consumer for consumer in extra}
+    if instrumentation is not None:
+        sim_result['instrumentation'] = report
+    return sim_result
+
+def run_simulation_with_connection_tracking(num_users=10000, num_rounds=10, num_simulations=20, seed=None, workers=1,
+                                           pair_capacity=None, stratify_pairs=False,
+                                           checkpoint_dir=None, resume=False, instrumentation=None,
+                                           progress_interval=None, metrics_path=None, analyses=(),
+                                           lookup_table=None):
+    """
+    Run Monte Carlo simulation and track mixed pairs for connection analysis.
+
+    pair_capacity=None keeps every mixed pair. Otherwise at most pair_capacity pairs
+    are retained as a uniform reservoir sample over all simulations; with
+    stratify_pairs=True each simulation instead contributes its own uniform sample
+    of pair_capacity // num_simulations pairs (one more for the first
+    pair_capacity % num_simulations simulations). Either way the retained pairs
+    record in .seen how many pairs they were drawn from.
+
+    With checkpoint_dir every finished simulation is saved to that run directory;
+    resume=True skips the simulations already saved there and gives the same final
+    histograms and mixed pairs as an uninterrupted run.
+
+    With an Instrumentation, per-phase timings (and any sampled profiles) are summed
+    over the simulations run in this call into parameters['instrumentation'].
+    progress_interval / metrics_path enable ProgressReporter lines and JSON-lines metrics.
+
+    analyses are extra EventConsumer factories (picklable, e.g. SynergyConsumer or
+    functools.partial(EventFileWriter, directory)) run in the same pass over every
+    simulation; their merged results are returned in all_results['analyses'].
+    lookup_table (a DiceLookupTable) replaces per-simulation dice construction.
+    """
+    completed = set()
+    if checkpoint_dir is not None:
+        run_parameters, completed = open_checkpoint_dir(checkpoint_dir, {
+            'num_users': num_users,
+            'num_rounds': num_rounds,
+            'num_simulations': num_simulations,
+            'seed': seed,
+            'pair_capacity': pair_capacity,
+            'stratify_pairs': stratify_pairs
+        }, resume)
+        seed = run_parameters['seed']
+        if analyses and completed:
+            raise ValueError(f"cannot resume {checkpoint_dir} with analyses: checkpoints only hold "
+                             "histograms and mixed pairs")
+    root_seed, seed_sequences = spawn_simulation_seeds(seed, num_simulations)
+
+    sim_capacity = pair_capacity
+    stratified = stratify_pairs and pair_capacity is not None
+    if pair_capacity is None:
+        mixed_pairs = MixedPairStore()
+    else:
+        root_sequence = np.random.SeedSequence(root_seed)
+        mixed_pairs = MixedPairReservoir(pair_capacity, rng=_reservoir_rng(root_sequence, num_simulations))
+        if stratified:
+            sim_capacity = -(-pair_capacity // num_simulations)
 
     all_results = {
-        'persona_selections': [],
-        'rank_distributions': [],
-        'match_patterns': [],
-        'mixed_pairs': [],  # Track all mixed pairs
+        'histograms': SimulationHistograms(MATCH_TYPES),  # Merged per-simulation count arrays
+        'mixed_pairs': mixed_pairs,  # Track mixed pairs (columnar; bounded when pair_capacity is set)
         'parameters': {
             'num_users': num_users,
             'num_rounds': num_rounds,
             'num_simulations': num_simulations,
-            'total_events': num_users * num_rounds * num_simulations
+            'total_events': num_users * num_rounds * num_simulations,
+            'seed': root_seed,
+            'workers': workers,
+            'pair_capacity': pair_capacity,
+            'stratify_pairs': stratify_pairs,
+            'checkpoint_dir': checkpoint_dir,
+            'resumed_simulations': len(completed)
         }
     }
 
     print(f"Running {num_simulations} simulations with {num_users} users...")
 
-    for sim in range(num_simulations):
-        if (sim + 1) % 5 == 0:
-            print(f"  Completed {sim + 1}/{num_simulations} simulations...")
-
-        # Generate users
-        users = {f"User_{i}": generate_random_user_interests(5) for i in range(num_users)}
-
-        simulation_data = {
-            'persona_counts': Counter(),
-            'rank_counts': Counter(),
-            'match_types': Counter()
-        }
-
-        for round_num in range(num_rounds):
-            selections = run_matching_round(users)
-            matches, remaining = pair_users(selections)
-
-            # Track selections
-            for sel in selections:
-                simulation_data['persona_counts'][sel['selected_persona']] += 1
-                simulation_data['rank_counts'][sel['rank']] += 1
-
-            # Track matches and collect mixed pairs
-            for match in matches:
-                simulation_data['match_types'][match['match_type']] += 1
-
-                if match['match_type'] == 'mixed':
-                    # Store mixed pair for connection analysis
-                    all_results['mixed_pairs'].append({
-                        'sim': sim,
-                        'round': round_num,
-                        'user1_id': match['user1']['user_id'],
-                        'user1_vector': match['user1']['user_vector'],
-                        'user1_alignments': match['user1']['alignments'],
-                        'user2_id': match['user2']['user_id'],
-                        'user2_vector': match['user2']['user_vector'],
-                        'user2_alignments': match['user2']['alignments']
-                    })
-
-        all_results['persona_selections'].append(dict(simulation_data['persona_counts']))
-        all_results['rank_distributions'].append(dict(simulation_data['rank_counts']))
-        all_results['match_patterns'].append(dict(simulation_data['match_types']))
-
-    print(f"Simulation complete! Found {len(all_results['mixed_pairs'])} mixed pairs.")
+    report = InstrumentationReport(instrumentation)
+    with ProgressReporter(num_users, num_rounds, num_simulations, progress_interval, metrics_path,
+                          already_completed=len(completed)) as progress:
+        started = time.perf_counter()
+        serial_seconds = 0.0
+        if completed:
+            print(f"  Resuming from {checkpoint_dir}: {len(completed)} simulations already done")
+        pending = [sim for sim in range(num_simulations) if sim not in completed]
+        new_results = iter_simulation_results(simulate_once_with_connection_tracking,
+                                              [seed_sequences[sim] for sim in pending],
+                                              (num_users, num_rounds, sim_capacity, instrumentation, tuple(analyses),
+                                               lookup_table),
+                                              workers,
+                                              sims=pending)
+        timers = report.phase_timers
+        consumers = {}
+        for sim in range(num_simulations):
+            # Merge strictly in simulation order, so resumed runs fold results exactly as uninterrupted ones
+            if sim in completed:
+                with timers.phase('checkpoint_io'):
+                    sim_result = load_simulation_checkpoint(checkpoint_dir, sim, sim_capacity)
+            else:
+                sim_result = next(new_results)
+                if checkpoint_dir is not None:
+                    with timers.phase('checkpoint_io'):
+                        save_simulation_checkpoint(checkpoint_dir, sim, sim_result)
+
+            with timers.phase('merge_results'):
+                all_results['histograms'].merge(sim_result['histograms'])
+                if stratified:
+                    quota = pair_capacity // num_simulations + (sim < pair_capacity % num_simulations)
+                    all_results['mixed_pairs'].extend_stratum(sim_result['mixed_pairs'], quota)
+                else:
+                    all_results['mixed_pairs'].extend(sim_result['mixed_pairs'])
+                serial_seconds += sim_result['cpu_seconds']
+                for name, consumer in sim_result.get('analyses', {}).items():
+                    if name in consumers:
+                        consumers[name].merge(consumer)
+                    else:
+                        consumers[name] = consumer
+            if 'instrumentation' in sim_result:
+                report.merge(sim_result['instrumentation'])
+            progress.update(sim + 1, len(all_results['mixed_pairs']))
+
+        # Speedup against running the same simulations back to back on one core,
+        # estimated from the CPU time each simulation needed
+        wall_seconds = time.perf_counter() - started
+        progress.close(num_simulations, len(all_results['mixed_pairs']))
+    all_results['parameters'].update({
+        'wall_time_seconds': wall_seconds,
+        'serial_time_seconds': serial_seconds,
+        'parallel_speedup': serial_seconds / wall_seconds if wall_seconds > 0 else 1.0
+    })
+
+    if instrumentation is not None:
+        all_results['parameters']['instrumentation'] = report.as_dict()
+    if analyses:
+        all_results['analyses'] = {name: consumer.result() for name, consumer in consumers.items()}
+
+    mixed_pairs_seen = int(all_results['histograms'].totals['match'][MATCH_TYPES.index('mixed')])
+    all_results['parameters']['mixed_pairs_seen'] = mixed_pairs_seen
+    print(f"Simulation complete! Found {mixed_pairs_seen} mixed pairs "
+          f"({len(all_results['mixed_pairs'])} retained for connection analysis).")
     return all_results
 
 # ============================================================================
 # VISUALIZATION FUNCTIONS
 # ============================================================================
 
+# Where charts go: None shows them (notebooks), a directory saves them as PNGs headlessly
+CHART_DIR = None
+
+def _pyplot():
+    """Import matplotlib on first use (Agg backend when charts are written to files)"""
+    import matplotlib
+    if CHART_DIR is not None:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D  # registers the '3d' projection on older matplotlib
+    return plt
+
+def _show_figure(fig, name):
+    """Show a finished figure, or save it as CHART_DIR/<name>.png and free it"""
+    plt = _pyplot()
+    if CHART_DIR is None:
+        plt.show()
+        return
+    os.makedirs(CHART_DIR, exist_ok=True)
+    fig.savefig(os.path.join(CHART_DIR, f"{name}.png"), dpi=120, bbox_inches='tight')
+    plt.close(fig)
+
 def plot_monte_carlo_results(results):
     """Create Monte Carlo statistical visualizations"""
+    plt = _pyplot()
 
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
     fig.suptitle('Monte Carlo Simulation Results - Connection Analysis',
                 fontsize=16, fontweight='bold')
 
-    # 1. Persona Selection Distribution
-    all_personas = []
-    for sim_result in results['persona_selections']:
-        for persona, count in sim_result.items():
-            all_personas.extend([persona] * count)
+    histograms = results['histograms']
+    persona_counts = histograms.totals['persona']
+    rank_counts = histograms.totals['rank']
+    match_counts = histograms.totals['match']
 
-    persona_counts = Counter(all_personas)
-    personas_sorted = sorted(persona_counts.items(), key=lambda x: x[1], reverse=True)
+    # 1. Persona Selection Distribution
+    personas_sorted = [i for i in np.argsort(-persona_counts, kind='stable') if persona_counts[i]]
 
     ax1 = axes[0, 0]
-    ax1.barh([p[0] for p in personas_sorted], [p[1] for p in personas_sorted], color='steelblue')
+    ax1.barh([PERSONA_NAMES[i] for i in personas_sorted], persona_counts[personas_sorted], color='steelblue')
     ax1.set_xlabel('Selection Count')
     ax1.set_title('Archetype Selection Frequency')
     ax1.grid(axis='x', alpha=0.3)
 
     # 2. Rank Distribution
-    all_ranks = []
-    for sim_result in results['rank_distributions']:
-        for rank, count in sim_result.items():
-            all_ranks.extend([rank] * count)
-
     ax2 = axes[0, 1]
-    rank_counts = Counter(all_ranks)
-    ranks = sorted(rank_counts.keys())
-    counts = [rank_counts.get(r, 0) for r in ranks]
-    ax2.bar(ranks, counts, color='coral')
+    ax2.bar(range(1, 17), rank_counts, color='coral')
     ax2.set_xlabel('Rank')
     ax2.set_ylabel('Frequency')
     ax2.set_title('Rank Selection Distribution')
@@ -406,17 +1366,8 @@ def plot_monte_carlo_results(results):
     ax2.grid(axis='y', alpha=0.3)
 
     # 3. Match Type Distribution
-    all_match_types = []
-    for sim_result in results['match_patterns']:
-        for match_type, count in sim_result.items():
-            all_match_types.extend([match_type] * count)
-
-    match_counts = Counter(all_match_types)
-
     ax3 = axes[1, 0]
-    match_types = list(match_counts.keys())
-    match_values = [match_counts[mt] for mt in match_types]
-    ax3.bar(match_types, match_values, color=['mediumseagreen', 'orange'])
+    ax3.bar(histograms.labels['match'], match_counts, color=['mediumseagreen', 'orange'])
     ax3.set_ylabel('Count')
     ax3.set_title('Match Type Distribution')
     ax3.grid(axis='y', alpha=0.3)
@@ -425,7 +1376,7 @@ def plot_monte_carlo_results(results):
     ax4 = axes[1, 1]
     ranks_list = list(range(1, 17))
     bonuses = LADDER_BONUSES
-    frequencies = [rank_counts.get(r, 0) for r in ranks_list]
+    frequencies = rank_counts
 
     ax4_twin = ax4.twinx()
     ax4.plot(ranks_list, bonuses, 'b-o', label='Ladder Bonus', linewidth=2)
@@ -443,12 +1394,14 @@ def plot_monte_carlo_results(results):
     ax4_twin.legend(loc='upper right')
 
     plt.tight_layout()
-    plt.show()
+    _show_figure(fig, "monte_carlo_results")
 
     return persona_counts, rank_counts, match_counts
 
 def visualize_pair_connection(pair_data, title_prefix=""):
     """Create 3-chart visualization for a single pair"""
+    plt = _pyplot()
+    from matplotlib.lines import Line2D
 
     # Compute weighted scores
     alignments_A = pair_data['user1_alignments']
@@ -516,7 +1469,7 @@ def visualize_pair_connection(pair_data, title_prefix=""):
     ax1.view_init(elev=25, azim=45)
 
     plt.tight_layout()
-    plt.show()
+    _show_figure(fig1, "pair_3d_landscapes")
 
     # ========================================================================
     # CHART 2: A→B Network
@@ -580,7 +1533,7 @@ def visualize_pair_connection(pair_data, title_prefix=""):
     ax2.legend(handles=legend_elements, loc='upper center', bbox_to_anchor=(0.5, -0.05), ncol=3)
 
     plt.tight_layout()
-    plt.show()
+    _show_figure(fig2, "pair_a_to_b_network")
 
     # ========================================================================
     # CHART 3: B→A Network
@@ -632,7 +1585,7 @@ def visualize_pair_connection(pair_data, title_prefix=""):
     ax3.legend(handles=legend_elements2, loc='upper center', bbox_to_anchor=(0.5, -0.05), ncol=3)
 
     plt.tight_layout()
-    plt.show()
+    _show_figure(fig3, "pair_b_to_a_network")
 
     return connections_AB, connections_BA
 
@@ -642,26 +1595,26 @@ def analyze_aggregate_connections(mixed_pairs, sample_size=100):
     print(f"\nAnalyzing aggregate patterns from {min(sample_size, len(mixed_pairs))} mixed pairs...")
 
     # Sample pairs for analysis
-    sampled_pairs = random.sample(mixed_pairs, min(sample_size, len(mixed_pairs)))
+    sampled = random.sample(range(len(mixed_pairs)), min(sample_size, len(mixed_pairs)))
+    if isinstance(mixed_pairs, MixedPairStore):
+        sampled_pairs = mixed_pairs.take(sampled)
+    else:
+        sampled_pairs = [mixed_pairs[i] for i in sampled]
+    weighted_A, weighted_B = pair_weighted_scores(sampled_pairs)
 
     all_connections_AB = []
     all_connections_BA = []
-    synergy_scores = []
-    all_synergy_examples = []
-
-    for pair in sampled_pairs:
-        weighted_A = apply_ladder_bonus(pair['user1_alignments'])
-        weighted_B = apply_ladder_bonus(pair['user2_alignments'])
 
-        conn_AB, conn_BA = calculate_connection_strength(weighted_A, weighted_B)
+    for _, strengths_AB, strengths_BA in iter_connection_strength_chunks(weighted_A, weighted_B):
+        # Same value order as the dicts: A→B by (a, b), B→A by (a, b) over [b, a]
+        all_connections_AB.extend(strengths_AB[strengths_AB > 0].tolist())
+        strengths_BA_by_a = strengths_BA.transpose(0, 2, 1)
+        all_connections_BA.extend(strengths_BA_by_a[strengths_BA_by_a > 0].tolist())
 
-        all_connections_AB.extend(list(conn_AB.values()))
-        all_connections_BA.extend(list(conn_BA.values()))
-
-        synergy, examples = calculate_synergy_score(conn_AB, conn_BA)
-        synergy_scores.append(synergy)
-        if examples:
-            all_synergy_examples.extend(examples)
+    # Score-only mode, memoized per distinct profile pair: nothing here is printed per path
+    scores, direct_counts, cross_counts = SYNERGY_CACHE.scores(weighted_A, weighted_B)
+    synergy_scores = scores.tolist()
+    asymmetric_path_count = int(direct_counts.sum() + cross_counts.sum())
 
     # Calculate statistics
     avg_strength_AB = np.mean(all_connections_AB) if all_connections_AB else 0
@@ -671,7 +1624,10 @@ def analyze_aggregate_connections(mixed_pairs, sample_size=100):
     print(f"  Average A→B connection strength: {avg_strength_AB:.3f}")
     print(f"  Average B→A connection strength: {avg_strength_BA:.3f}")
     print(f"  Average synergy score: {avg_synergy:.3f}")
-    print(f"  Total asymmetric pathways found: {len(all_synergy_examples)}")
+    print(f"  Total asymmetric pathways found: {asymmetric_path_count}")
+    cache_info = SYNERGY_CACHE.cache_info()
+    print(f"  Synergy cache: {cache_info.hits} hits, {cache_info.misses} misses "
+          f"({cache_info.currsize} distinct profile pairs cached)")
 
     return {
         'avg_strength_AB': avg_strength_AB,
@@ -680,11 +1636,10 @@ def analyze_aggregate_connections(mixed_pairs, sample_size=100):
         'all_strengths_AB': all_connections_AB,
         'all_strengths_BA': all_connections_BA,
         'synergy_scores': synergy_scores,
-        'synergy_examples': all_synergy_examples
+        'synergy_examples': SynergyExamples(weighted_A, weighted_B, direct_counts + cross_counts),
+        'asymmetric_path_count': asymmetric_path_count
     }
 
-from dataclasses import dataclass
-
 # ============================================================================
 # CONFIGURATION DATACLASS
 # ============================================================================
@@ -694,6 +1649,31 @@ class SimulationConfig:
     num_users: int = 10000
     num_rounds: int = 10
     num_simulations: int = 20
+    seed: int = None
+    # Retain at most this many mixed pairs (uniform reservoir sample); None keeps them all
+    pair_capacity: int = None
+    stratify_pairs: bool = False
+    # Save every finished simulation here; resume=True continues an interrupted run
+    checkpoint_dir: str = None
+    resume: bool = False
+    # Serial by default; simulations are seeded independently, so --workers N (opt-in)
+    # gives the same results on any number of cores
+    workers: int = 1
+    # Save charts as PNGs in this directory (headless); None shows them as in a notebook
+    chart_dir: str = None
+    plots: bool = True
+    # Hot-path instrumentation: per-phase timers, plus cProfile / tracemalloc on every Nth simulation
+    instrument: bool = False
+    profile_every: int = 0
+    tracemalloc_every: int = 0
+    # Progress line every progress_interval seconds (0 = quiet); metrics_file gets JSON lines
+    progress_interval: float = PROGRESS_INTERVAL_SECONDS
+    metrics_file: str = None
+    # Extra single-pass analyses: stream synergy scores of every mixed pair; write pair events as CSV here
+    stream_synergy: bool = False
+    event_dir: str = None
+    # Dice lookup table directory (built on first use); None computes dice per simulation
+    lookup_table: str = None
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -705,7 +1685,6 @@ def print_header(title, width=70):
     print("=" * width + "\n")
 
 def get_simulation_config():
-    print_header("MONTE CARLO SIMULATION WITH CONNECTION ANALYSIS")
     print("Recommended configurations:")
     print("  - Standard: 10000 users, 10 rounds, 20 simulations (2M events)")
     print("  - More rounds: 10000 users, 100 rounds, 20 simulations (20M events)")
@@ -716,22 +1695,69 @@ def get_simulation_config():
         num_users = int(input("Enter number of users per simulation (e.g., 10000, 25000): ").replace(",", ""))
         num_rounds = int(input("Enter number of rounds per simulation (e.g., 10, 50, 100): ").replace(",", ""))
         num_simulations = int(input("Enter number of simulations to run (e.g., 20): ").replace(",", ""))
-    except ValueError:
+    except (ValueError, EOFError):
         print("Invalid input! Using default values: 10000 users, 10 rounds, 20 simulations")
         num_users, num_rounds, num_simulations = 10000, 10, 20
 
+    return SimulationConfig(num_users, num_rounds, num_simulations)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation with connection analysis")
+    parser.add_argument("--config", help="JSON file with SimulationConfig fields")
+    parser.add_argument("--users", type=int, dest="num_users")
+    parser.add_argument("--rounds", type=int, dest="num_rounds")
+    parser.add_argument("--simulations", type=int, dest="num_simulations")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, help="worker processes (default 1; results do not depend on it)")
+    parser.add_argument("--pair-capacity", type=int, dest="pair_capacity",
+                        help="retain a uniform sample of at most this many mixed pairs")
+    parser.add_argument("--stratify-pairs", dest="stratify_pairs", action="store_true", default=None)
+    parser.add_argument("--checkpoint-dir", dest="checkpoint_dir")
+    parser.add_argument("--resume", action="store_true", default=None)
+    parser.add_argument("--chart-dir", dest="chart_dir", help="write charts here as PNGs instead of showing them")
+    parser.add_argument("--no-plots", dest="plots", action="store_false", default=None,
+                        help="simulation and text analysis only (matplotlib is never imported)")
+    parser.add_argument("--instrument", action="store_true", default=None,
+                        help="time each simulation phase and print the breakdown in the summary")
+    parser.add_argument("--profile-every", type=int, dest="profile_every",
+                        help="run cProfile on every Nth simulation")
+    parser.add_argument("--tracemalloc-every", type=int, dest="tracemalloc_every",
+                        help="take a tracemalloc snapshot of every Nth simulation")
+    parser.add_argument("--progress-interval", type=float, dest="progress_interval",
+                        help="seconds between progress lines (0 disables them)")
+    parser.add_argument("--metrics-file", dest="metrics_file",
+                        help="append throughput/ETA metrics to this JSON-lines file")
+    parser.add_argument("--stream-synergy", dest="stream_synergy", action="store_true", default=None,
+                        help="score every mixed pair's synergy as it is made (nothing retained)")
+    parser.add_argument("--event-dir", dest="event_dir",
+                        help="stream every simulation's mixed pairs to CSV files in this directory")
+    parser.add_argument("--lookup-table", dest="lookup_table",
+                        help="load (or build) the precomputed dice lookup table in this directory")
+    # Unknown arguments are an error; only a notebook kernel's -f kernel.json is dropped
+    return parser.parse_args(strip_kernel_args(argv))
+
+def config_from_args(args):
+    """SimulationConfig from --config and flags; prompts when no run options were given"""
+    overrides = {name: value for name, value in vars(args).items() if name != 'config' and value is not None}
+    if args.config:
+        config = load_config_file(args.config, SimulationConfig())
+    elif overrides:
+        config = SimulationConfig()
+    else:
+        config = get_simulation_config()
+    return SimulationConfig(**{**asdict(config), **overrides})
+
+def print_configuration(config):
     print("\n" + "=" * 70)
     print(f"Configuration:")
-    print(f"  - Users per simulation: {num_users:,}")
-    print(f"  - Rounds per simulation: {num_rounds}")
-    print(f"  - Total simulations: {num_simulations}")
-    total_events = num_users * num_rounds * num_simulations
+    print(f"  - Users per simulation: {config.num_users:,}")
+    print(f"  - Rounds per simulation: {config.num_rounds}")
+    print(f"  - Total simulations: {config.num_simulations}")
+    total_events = config.num_users * config.num_rounds * config.num_simulations
     print(f"  - Total matching events: {total_events:,}")
     print(f"  - Expected mixed pairs: ~{int(total_events * 0.0004)}")
     print("=" * 70 + "\n")
 
-    return SimulationConfig(num_users, num_rounds, num_simulations)
-
 def print_simulation_summary(results):
     params = results['parameters']
     print(f"\nSimulation Parameters:")
@@ -739,7 +1765,25 @@ def print_simulation_summary(results):
     print(f"  - Rounds per simulation: {params['num_rounds']}")
     print(f"  - Total simulations: {params['num_simulations']}")
     print(f"  - Total matching events: {params['total_events']:,}")
-    print(f"  - Mixed pairs found: {len(results['mixed_pairs']):,}")
+    print(f"  - Mixed pairs found: {params['mixed_pairs_seen']:,}")
+    print(f"  - Mixed pairs retained: {len(results['mixed_pairs']):,}")
+    print(f"  - Wall time: {params['wall_time_seconds']:.1f}s on {params['workers']} worker(s) "
+          f"({params['parallel_speedup']:.1f}x vs. serial)")
+    print(f"  - Engine startup: {ENGINE_IMPORT_SECONDS:.2f}s (target < {STARTUP_TARGET_SECONDS:.2f}s)")
+    if 'instrumentation' in params:
+        print()
+        print_instrumentation(params['instrumentation'])
+    if 'analyses' in results:
+        print_stream_analyses(results['analyses'])
+
+def analyses_from_config(config):
+    """EventConsumer factories for the configured streaming analyses"""
+    analyses = []
+    if config.stream_synergy:
+        analyses.append(SynergyConsumer)
+    if config.event_dir:
+        analyses.append(functools.partial(EventFileWriter, config.event_dir))
+    return analyses
 
 def print_top_connections(conn_AB, conn_BA, label="A→B"):
     print(f"\nTop 5 {label} Attractions:")
@@ -756,11 +1800,26 @@ def run_monte_carlo_simulation(config: SimulationConfig):
     results = run_simulation_with_connection_tracking(
         num_users=config.num_users,
         num_rounds=config.num_rounds,
-        num_simulations=config.num_simulations
+        num_simulations=config.num_simulations,
+        seed=config.seed,
+        workers=config.workers,
+        pair_capacity=config.pair_capacity,
+        stratify_pairs=config.stratify_pairs,
+        checkpoint_dir=config.checkpoint_dir,
+        resume=config.resume,
+        instrumentation=instrumentation_from_config(config),
+        progress_interval=config.progress_interval,
+        metrics_path=config.metrics_file,
+        analyses=analyses_from_config(config),
+        lookup_table=load_dice_lookup_table(config.lookup_table) if config.lookup_table else None
     )
     return results
 
-def analyze_curated_synergy(results, max_samples=500):
+def analyze_curated_synergy(results, max_samples=500, render=True, rank_paths=False):
+    """
+    Find the highest-synergy pair among the first max_samples retained pairs (None: all)
+    and print its first three asymmetric paths, or its three largest gaps with rank_paths
+    """
     print_header("PART 2: CURATED SYNERGY EXAMPLE")
     if not results['mixed_pairs']:
         print("No mixed pairs found.")
@@ -768,24 +1827,23 @@ def analyze_curated_synergy(results, max_samples=500):
 
     print("Searching for high-synergy pair...")
 
-    pair_synergies = []
-    for i, pair in enumerate(results['mixed_pairs'][:max_samples]):
-        weighted_A = apply_ladder_bonus(pair['user1_alignments'])
-        weighted_B = apply_ladder_bonus(pair['user2_alignments'])
-        conn_AB, conn_BA = calculate_connection_strength(weighted_A, weighted_B)
-        synergy, examples = calculate_synergy_score(conn_AB, conn_BA)
-
-        # Ensure examples is always a list
-        if examples is None:
-            examples = []
-        elif isinstance(examples, dict):
-            examples = [examples]
+    # Score the candidates with the batched kernels, then build pathways for the winner only
+    candidates = results['mixed_pairs'][:max_samples]
+    weighted_A, weighted_B = pair_weighted_scores(candidates)
+    pair_scores = SYNERGY_CACHE.scores(weighted_A, weighted_B)[0]
 
-        pair_synergies.append((i, synergy, examples))
-
-    best_pair_idx, best_synergy, best_examples = max(pair_synergies, key=lambda x: x[1])
+    best_pair_idx = int(np.argmax(pair_scores))
+    best_synergy = pair_scores[best_pair_idx]
     best_pair = results['mixed_pairs'][best_pair_idx]
 
+    # Explain mode: diagnostics only for the pair that gets printed
+    conn_AB, conn_BA = calculate_connection_strength(apply_ladder_bonus(best_pair['user1_alignments']),
+                                                     apply_ladder_bonus(best_pair['user2_alignments']))
+    if rank_paths:
+        best_examples = top_asymmetric_paths(conn_AB, conn_BA, k=3)
+    else:
+        best_examples = [path for _, path in itertools.islice(iter_asymmetric_paths(conn_AB, conn_BA), 3)]
+
     print(f"Found synergy pair (synergy score: {best_synergy:.3f})")
     print(f"  Person A: Top archetype = {best_pair['user1_alignments'][0]['persona']}")
     print(f"  Person B: Top archetype = {best_pair['user2_alignments'][0]['persona']}")
@@ -805,15 +1863,19 @@ def analyze_curated_synergy(results, max_samples=500):
     else:
         print("No asymmetric pathways found.")
 
-    conn_AB, conn_BA = visualize_pair_connection(best_pair, "SYNERGY EXAMPLE: ")
+    if render:
+        visualize_pair_connection(best_pair, "SYNERGY EXAMPLE: ")
     print_top_connections(conn_AB, conn_BA, "A→B")
     print_top_connections(conn_BA, conn_AB, "B→A")
 
-def plot_aggregate_analysis(results, sample_size=100):
+def plot_aggregate_analysis(results, sample_size=100, render=True):
     print_header("PART 3: AGGREGATE CONNECTION ANALYSIS (MIXED PAIRS)")
 
     aggregate_stats = analyze_aggregate_connections(results['mixed_pairs'], sample_size=sample_size)
+    if not render:
+        return aggregate_stats
 
+    plt = _pyplot()
     fig, axes = plt.subplots(1, 2, figsize=(16, 6))
     fig.suptitle('Aggregate Connection Patterns Across Mixed Pairs', fontsize=16, fontweight='bold')
 
@@ -837,40 +1899,67 @@ def plot_aggregate_analysis(results, sample_size=100):
     axes[1].grid(alpha=0.3)
 
     plt.tight_layout()
-    plt.show()
+    _show_figure(fig, "aggregate_connections")
+
+    return aggregate_stats
 
 # ============================================================================
 # MAIN
 # ============================================================================
 
-if __name__ == "__main__":
-    config = get_simulation_config()
-    results = run_monte_carlo_simulation(config)
-
-    print_header("PART 1: MONTE CARLO STATISTICAL RESULTS")
-    persona_counts, rank_counts, match_counts = plot_monte_carlo_results(results)
-    print_simulation_summary(results)
+def print_result_statistics(results):
+    histograms = results['histograms']
+    persona_counts = histograms.totals['persona']
+    rank_counts = histograms.totals['rank']
+    match_counts = histograms.totals['match']
 
     # Display archetype stats
+    persona_means = histograms.mean('persona')
+    persona_stds = np.sqrt(histograms.variance('persona'))
     print(f"\nTop 5 Most Selected Archetypes:")
-    for persona, count in persona_counts.most_common(5):
-        percentage = (count / sum(persona_counts.values())) * 100
-        print(f"  {persona:20s}: {count:6d} selections ({percentage:.1f}%)")
+    for idx in np.argsort(-persona_counts, kind='stable')[:5]:
+        percentage = (persona_counts[idx] / persona_counts.sum()) * 100
+        print(f"  {PERSONA_NAMES[idx]:20s}: {persona_counts[idx]:6d} selections ({percentage:.1f}%, "
+              f"{persona_means[idx]:.1f} ± {persona_stds[idx]:.1f} per simulation)")
 
     print(f"\nRank Selection Distribution:")
-    for label, r_range in [("Rank 1-3", range(1, 4)), ("Rank 4-8", range(4, 9)), ("Rank 9-16", range(9, 17))]:
-        count = sum(rank_counts.get(r, 0) for r in r_range)
-        pct = count / sum(rank_counts.values()) * 100
+    for label, r_slice in [("Rank 1-3", slice(0, 3)), ("Rank 4-8", slice(3, 8)), ("Rank 9-16", slice(8, 16))]:
+        count = rank_counts[r_slice].sum()
+        pct = count / rank_counts.sum() * 100
         print(f"  {label}: {count:6d} ({pct:.1f}%)")
 
     print(f"\nMatch Type Distribution:")
-    for match_type, count in match_counts.items():
-        pct = count / sum(match_counts.values()) * 100
+    for match_type, count in zip(histograms.labels['match'], match_counts):
+        pct = count / match_counts.sum() * 100
         print(f"  {match_type:20s}: {count:6d} ({pct:.1f}%)")
 
-    analyze_curated_synergy(results)
-    plot_aggregate_analysis(results)
+# Time from the first import to a usable engine (numpy + definitions; no plotting libraries)
+ENGINE_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+def main(argv=None):
+    global CHART_DIR
+
+    print_header("MONTE CARLO SIMULATION WITH CONNECTION ANALYSIS")
+    config = config_from_args(parse_args(argv))
+    print_configuration(config)
+    CHART_DIR = config.chart_dir
+    results = run_monte_carlo_simulation(config)
+
+    print_header("PART 1: MONTE CARLO STATISTICAL RESULTS")
+    if config.plots:
+        plot_monte_carlo_results(results)
+    print_simulation_summary(results)
+    print_result_statistics(results)
+
+    analyze_curated_synergy(results, render=config.plots)
+    plot_aggregate_analysis(results, render=config.plots)
 
     print("\n" + "=" * 70)
     print("ANALYSIS COMPLETE!")
+    if config.plots and CHART_DIR is not None:
+        print(f"Charts saved to {CHART_DIR}")
     print("=" * 70)
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -1,265 +1,780 @@
 """
 Archetype Matching System - Monte Carlo Simulation (3D Version with Input)
-Copy this entire script into Google Colab and run it
+Copy this script and Technical_Validation/Matching_Engine.py into Google Colab and
+run it, or run it from a shell:
+    python Montecarlo_Simulation.py --users 5000 --rounds 10 --simulations 20 --chart-dir charts
+Importing it only loads the simulation engine; matplotlib and scipy are loaded
+when a chart is rendered (scipy also for confidence intervals).
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter, defaultdict
+import argparse
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+import math
+import os
 import random
-from mpl_toolkits.mplot3d import Axes3D
-from scipy.interpolate import griddata
-
-# ============================================================================
-# DATA DEFINITIONS
-# ============================================================================
-
-# 52 Interests
-INTERESTS = [
-    "cars", "gaming", "working_out", "photography", "cooking", "travel",
-    "motorcycles", "hiking", "painting", "fitness", "reading", "writing",
-    "yoga", "meditation", "mindfulness", "music", "spirituality", "gardening",
-    "fashion", "technology", "movies", "running", "cycling", "investing",
-    "architecture", "astronomy", "dancing", "fishing", "camping", "theater",
-    "sports", "philosophy", "podcasts", "design", "baking", "crafts",
-    "animals", "blogging", "anime", "history", "chess", "skateboarding",
-    "programming", "volunteering", "woodworking", "languages", "makeup",
-    "diy_projects", "journaling", "interior_design", "marine_biology",
-    "entrepreneurship"
-]
-
-# 16 Archetypes with their interest vectors (52 binary values each)
-PERSONAS = {
-    "System Weaver": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 1, 0, 1, 0, 1, 0, 0, 0, 1, 0, 0, 0],
-    "Data Drifter": [0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0],
-    "Grid Captain": [1, 1, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 1, 1, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-    "Circuit Jumper": [1, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 1],
-    "Soul Cartographer": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0],
-    "Dreamsmith": [0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 1, 1, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-    "Pulse Guide": [0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 1, 1, 0],
-    "Vibe Rider": [0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    "Core Mason": [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 1, 1, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0],
-    "Harbor Keeper": [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 1, 1, 0, 0],
-    "Forge Handler": [1, 0, 1, 0, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0],
-    "Thread Bonder": [0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 1, 0, 0],
-    "Tinker Nomad": [1, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 1, 0, 0, 0, 0],
-    "Inner Glider": [0, 0, 0, 1, 0, 0, 0, 0, 1, 1, 0, 0, 1, 1, 1, 1, 1, 0, 1, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-    "Momentum Spark": [1, 1, 1, 0, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-    "Echo Prism": [0, 1, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0]
-}
-
-# Ladder Bonuses (rank 1-16)
-LADDER_BONUSES = [
-    0.60, 0.56, 0.55, 0.54, 0.53, 0.52, 0.51, 0.50,
-    0.49, 0.48, 0.45, 0.43, 0.42, 0.41, 0.20, 0.05
-]
+import sys
+
+# The matching engine shared by both simulations lives in Technical_Validation/Matching_Engine.py
+# (the scalar kernels are re-exported for Benchmarks/Engine_Benchmarks.py)
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Matching_Engine import (
+    PERSONAS, LADDER_BONUSES, PERSONA_NAMES, PERSONA_INDEX, PERSONA_MATRIX, PERSONA_MASKS,
+    PERCENTAGE_TABLE, popcount64, generate_random_user_interests, generate_user_population,
+    compute_alignment, compute_alignment_batch, create_weighted_dice,
+    create_weighted_dice_batch, roll_weighted_dice, roll_weighted_dice_batch, pair_users_array,
+    TABLE_INTERESTS, NUM_COMBINATIONS, enumerate_combinations, load_dice_lookup_table,
+    UserDiceCache, InstrumentationReport, start_sampled_profiling, finish_sampled_profiling,
+    print_instrumentation, instrumentation_from_config, STARTUP_TARGET_SECONDS,
+    load_config_file, strip_kernel_args, PROGRESS_INTERVAL_SECONDS, ProgressReporter,
+    spawn_simulation_seeds, iter_simulation_results, SimulationHistograms
+)
 
 # ============================================================================
 # CORE FUNCTIONS
 # ============================================================================
 
-def generate_random_user_interests(num_interests=5):
-    """Generate random user by selecting interests"""
-    indices = random.sample(range(52), num_interests)
-    vector = [0] * 52
-    for idx in indices:
-        vector[idx] = 1
-    return vector
-
-def compute_alignment(user_vector, personas):
-    """Compute alignment percentages for all archetypes"""
-    user_ones = sum(user_vector)
-    if user_ones == 0:
-        return []
-
-    scores = []
-    for persona_name, persona_vector in personas.items():
-        matches = sum(1 for i in range(52) if user_vector[i] == 1 and persona_vector[i] == 1)
-        percentage = (matches / user_ones) * 100
-        scores.append({
-            'persona': persona_name,
-            'percentage': round(percentage, 2)
-        })
-
-    # Sort by percentage descending
-    scores.sort(key=lambda x: x['percentage'], reverse=True)
-    return scores
-
-def create_weighted_dice(sorted_personas, ladder_bonuses):
-    """Create weighted probability distribution"""
-    weighted = []
-    for idx, persona_data in enumerate(sorted_personas):
-        ladder = ladder_bonuses[idx] if idx < len(ladder_bonuses) else ladder_bonuses[-1]
-        weighted_score = persona_data['percentage'] * ladder
-        weighted.append({
-            'persona': persona_data['persona'],
-            'weightedScore': weighted_score
-        })
-
-    total = sum(w['weightedScore'] for w in weighted)
-
-    if total == 0:
-        # Equal distribution fallback
-        inc = 100 / len(weighted)
-        cumulative = 0
-        dice = []
-        for w in weighted:
-            cumulative += inc
-            dice.append({'persona': w['persona'], 'cumulativeMax': cumulative})
-        return dice
-
-    # Create cumulative distribution
-    cumulative = 0
-    dice = []
-    for w in weighted:
-        cumulative += (w['weightedScore'] / total) * 100
-        dice.append({'persona': w['persona'], 'cumulativeMax': cumulative})
-
-    return dice
-
-def roll_weighted_dice(dice):
-    """Select persona based on weighted probability"""
-    r = random.random() * 100
-    for w in dice:
-        if r <= w['cumulativeMax']:
-            return w['persona']
-    return dice[0]['persona']
-
-def run_matching_round(users):
-    """Run one round of matching for all users"""
+def run_matching_round(users, lookup_table=None, dice_cache=None):
+    """Run one round of matching for all users (reusing dice_cache when given)"""
     selections = []
-
-    for user_id, user_vector in users.items():
-        alignments = compute_alignment(user_vector, PERSONAS)
-        dice = create_weighted_dice(alignments, LADDER_BONUSES)
-        selected_persona = roll_weighted_dice(dice)
-        rank = next((i+1 for i, p in enumerate(alignments) if p['persona'] == selected_persona), 1)
-
+    user_ids = list(users)
+    user_masks = [users[user_id] for user_id in user_ids]
+    if dice_cache is None:
+        dice_cache = UserDiceCache(user_masks, lookup_table=lookup_table)
+    else:
+        dice_cache.sync(user_masks)
+    uniforms = [random.random() for _ in user_ids]
+    persona_idx, ranks = roll_weighted_dice_batch(dice_cache.cumulative, uniforms, dice_cache.order)
+    top_alignments = dice_cache.sorted_percentages[:, 0].tolist()
+
+    for user_id, persona, rank, top_alignment in zip(user_ids, persona_idx.tolist(), ranks.tolist(), top_alignments):
         selections.append({
             'user_id': user_id,
-            'selected_persona': selected_persona,
+            'selected_persona': PERSONA_NAMES[persona],
             'rank': rank,
-            'top_alignment': alignments[0]['percentage'] if alignments else 0
+            'top_alignment': top_alignment
         })
 
     return selections
 
-def pair_users(selections):
+def pair_users(selections, rng=None):
     """Pair users based on their selected personas"""
-    # Group by persona
-    persona_groups = defaultdict(list)
-    for sel in selections:
-        persona_groups[sel['selected_persona']].append(sel)
+    persona_idx = np.array([PERSONA_INDEX[sel['selected_persona']] for sel in selections], dtype=np.intp)
+    same_pairs, mixed_pairs, remaining = pair_users_array(persona_idx, rng)
 
     matches = []
-    remaining = []
-
-    # Pair within same persona
-    for persona, users in persona_groups.items():
-        random.shuffle(users)
-        while len(users) >= 2:
-            u1 = users.pop()
-            u2 = users.pop()
+    for pairs, mixed in ((same_pairs, False), (mixed_pairs, True)):
+        for row1, row2 in pairs.tolist():
+            u1, u2 = selections[row1], selections[row2]
             matches.append({
                 'user1': u1['user_id'],
                 'user2': u2['user_id'],
-                'persona': persona,
-                'rank1': u1['rank'],
-                'rank2': u2['rank']
-            })
-        remaining.extend(users)
-
-    # Random fallback for remaining
-    if len(remaining) >= 2:
-        random.shuffle(remaining)
-        while len(remaining) >= 2:
-            u1 = remaining.pop()
-            u2 = remaining.pop()
-            matches.append({
-                'user1': u1['user_id'],
-                'user2': u2['user_id'],
-                'persona': 'mixed',
+                'persona': 'mixed' if mixed else u1['selected_persona'],
                 'rank1': u1['rank'],
                 'rank2': u2['rank']
             })
 
-    return matches, [r['user_id'] for r in remaining]
+    return matches, [selections[row]['user_id'] for row in remaining.tolist()]
+
+# ============================================================================
+# EXACT SELECTION DISTRIBUTION (ENUMERATION BY INTEREST CLASS)
+# ============================================================================
+
+# A user's persona order and dice depend only on the 16 persona match counts of
+# their interest set. Interests with identical persona membership are
+# interchangeable, so the match vectors are enumerated per interest class
+# (weighted by C(class size, k)) rather than per combination. Dice are evaluated
+# once per distinct vector, weighted by how many combinations share it.
+
+@dataclass
+class ExactDistribution:
+    """True per-event selection probabilities for a uniformly random 5-interest user"""
+    persona_probabilities: np.ndarray   # 16, in PERSONA_NAMES order
+    rank_probabilities: np.ndarray      # 16, ranks 1-16
+    persona_second_moments: np.ndarray  # 16, E[p^2] over users of their per-roll persona probability
+    rank_second_moments: np.ndarray     # 16, E[p^2] over users of their per-roll rank probability
+    num_match_vectors: int              # distinct match vectors the combinations collapse onto
+    num_interest_classes: int           # interests grouped by identical persona membership
+    ladder_bonuses: tuple = tuple(LADDER_BONUSES)
+
+    def match_expectations(self, num_users):
+        """
+        Expected pairs per round for num_users users. Every user selects a persona
+        independently with persona_probabilities, so persona counts are multinomial;
+        each persona run of n users gives n // 2 same-persona pairs and its odd user
+        goes to the mixed pool. With P(n_k odd) = (1 - (1 - 2 q_k)^N) / 2:
+            E[same_k] = (N q_k - P(n_k odd)) / 2
+            E[mixed]  = (sum_k P(n_k odd) - N mod 2) / 2
+        The total is always N // 2 pairs, so the shares are exact as well.
+        Returns:
+            - 'same_persona': 16 expected same-persona pairs per persona
+            - 'mixed': expected mixed pairs
+            - 'same_share' / 'mixed_share': fractions of the N // 2 pairs
+        """
+        q = self.persona_probabilities
+        p_odd = (1 - (1 - 2 * q) ** num_users) / 2
+        same = (num_users * q - p_odd) / 2
+        mixed = (p_odd.sum() - num_users % 2) / 2
+        total_pairs = max(num_users // 2, 1)
+        return {
+            'same_persona': same,
+            'mixed': mixed,
+            'same_share': same.sum() / total_pairs,
+            'mixed_share': mixed / total_pairs
+        }
+
+    def expected_histograms(self, num_users, num_rounds):
+        """Expected per-simulation persona/rank/match counts (SimulationHistograms.mean layout)"""
+        events = num_users * num_rounds
+        matches = self.match_expectations(num_users)
+        return {
+            'persona': events * self.persona_probabilities,
+            'rank': events * self.rank_probabilities,
+            'match': num_rounds * np.append(matches['same_persona'], matches['mixed'])
+        }
+
+    def plain_variances(self, num_users, num_rounds):
+        """
+        Exact per-simulation variance of the persona and rank counts under plain Monte
+        Carlo (independent uniformly random users, independent rolls). A user selecting
+        a bin with probability p per roll contributes R (E[p] - E[p^2]) + R^2 (E[p^2] - E[p]^2)
+        over R rounds, and the N users are independent.
+        """
+        variances = {}
+        for name, mean, second in (('persona', self.persona_probabilities, self.persona_second_moments),
+                                   ('rank', self.rank_probabilities, self.rank_second_moments)):
+            per_user = num_rounds * (mean - second) + num_rounds ** 2 * (second - mean ** 2)
+            variances[name] = num_users * per_user
+        return variances
+
+def dice_rank_probabilities(cumulative):
+    """
+    Exact roll_weighted_dice_batch outcome probabilities per rank for users x 16
+    cumulativeMax rows: rank j wins when cumulative[j-1] < r <= cumulative[j] for
+    r uniform on [0, 100), and any mass above the last cumulativeMax (rounding)
+    falls back to rank 1.
+    """
+    capped = np.minimum(cumulative, 100.0)
+    probabilities = np.diff(capped, axis=1, prepend=0.0) / 100
+    probabilities = np.maximum(probabilities, 0.0)
+    probabilities[:, 0] += np.maximum(100.0 - capped[:, -1], 0.0) / 100
+    return probabilities
+
+def interest_classes():
+    """
+    Interests grouped by identical persona membership.
+    Returns (membership, sizes): classes x 16 0/1 rows and the number of interests in each.
+    """
+    return np.unique(PERSONA_MATRIX.T, axis=0, return_counts=True)
+
+@lru_cache(maxsize=1)
+def match_vector_classes():
+    """
+    Distinct persona match-count vectors over all C(52, 5) users and how many
+    combinations produce each. Independent of the ladder, so computed once.
+
+    Interests of one class are interchangeable, so instead of listing combinations
+    this walks the classes and counts how many interests each contributes: taking
+    k of a class of size s adds k to each of its personas' counts and multiplies the
+    number of combinations by C(s, k). Partial selections that reach the same counts
+    are merged after every class, so the state never grows past the distinct vectors.
+    Returns (matches, weights): vectors x 16 match counts and combination counts.
+    """
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(3)
+    used_shift = np.uint64(48)
+    membership, sizes = interest_classes()
+
+    # State key: match counts (0-5) packed 3 bits per persona, interests used so far above them
+    keys = np.zeros(1, dtype=np.uint64)
+    weights = np.ones(1, dtype=np.int64)
+    for member, size in zip((membership.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64).tolist(),
+                            sizes.tolist()):
+        used = (keys >> used_shift).astype(np.int64)
+        next_keys, next_weights = [], []
+        for k in range(min(size, TABLE_INTERESTS) + 1):
+            fits = used + k <= TABLE_INTERESTS
+            next_keys.append(keys[fits] + np.uint64(k * member + (k << 48)))
+            next_weights.append(weights[fits] * math.comb(size, k))
+        keys, inverse = np.unique(np.concatenate(next_keys), return_inverse=True)
+        weights = np.bincount(inverse.reshape(-1), weights=np.concatenate(next_weights)).astype(np.int64)
+
+    complete = (keys >> used_shift) == TABLE_INTERESTS
+    keys, weights = keys[complete], weights[complete]
+    matches = ((keys[:, None] >> shifts) & np.uint64(7)).astype(np.intp)
+    matches.setflags(write=False)
+    weights.setflags(write=False)
+    return matches, weights
+
+def exact_selection_distribution(ladder_bonuses=LADDER_BONUSES):
+    """Persona and rank selection probabilities by enumerating every 5-interest user"""
+    matches, weights = match_vector_classes()
+    percentages = PERCENTAGE_TABLE[TABLE_INTERESTS, matches]
+    order = np.argsort(-percentages, axis=1, kind='stable')
+    sorted_percentages = np.take_along_axis(percentages, order, axis=1)
+    rank_probabilities = dice_rank_probabilities(create_weighted_dice_batch(sorted_percentages, ladder_bonuses))
+
+    shares = (weights / NUM_COMBINATIONS)[:, None]
+    weighted = rank_probabilities * shares
+    persona_probabilities = np.bincount(order.ravel(), weights=weighted.ravel(), minlength=16)
+    # A user's persona probabilities are their rank probabilities scattered by their order
+    persona_second_moments = np.bincount(order.ravel(), weights=(rank_probabilities ** 2 * shares).ravel(),
+                                         minlength=16)
+    return ExactDistribution(
+        persona_probabilities=persona_probabilities,
+        rank_probabilities=weighted.sum(axis=0),
+        persona_second_moments=persona_second_moments,
+        rank_second_moments=(rank_probabilities ** 2 * shares).sum(axis=0),
+        num_match_vectors=len(weights),
+        num_interest_classes=len(interest_classes()[1]),
+        ladder_bonuses=tuple(ladder_bonuses)
+    )
+
+def compare_with_exact(results, exact=None):
+    """
+    Check a run's histograms against the exact distribution.
+    Returns, per histogram ('persona', 'rank', 'match'), the observed and expected
+    per-simulation means and z-scores of their difference (standard error from the
+    per-simulation variance), plus the largest |z|.
+    """
+    if exact is None:
+        exact = exact_selection_distribution()
+    params = results['parameters']
+    histograms = results['histograms']
+    expected = exact.expected_histograms(params['num_users'], params['num_rounds'])
+    n = max(histograms.num_simulations, 1)
+
+    comparison = {}
+    for name, expected_mean in expected.items():
+        observed = histograms.mean(name)
+        stderr = np.sqrt(histograms.variance(name) / n)
+        z = np.divide(observed - expected_mean, stderr, out=np.zeros(len(observed)), where=stderr > 0)
+        comparison[name] = {'observed': observed, 'expected': expected_mean, 'z': z}
+    comparison['max_abs_z'] = max(np.abs(c['z']).max() for c in comparison.values())
+    return comparison
+
+# ============================================================================
+# LADDER BONUS TUNING
+# ============================================================================
+
+# Candidate ladders evaluated per optimizer generation
+LADDER_TUNING_BATCH = 256
+
+class LadderEvaluator:
+    """
+    Expected rank and persona selection distributions for candidate ladders.
+    The dice only see a user's sorted percentages, so the enumerated match vectors
+    are folded onto their distinct sorted profiles; persona_weights records which
+    persona sits at each rank of each profile. A batch of ladders is then scored
+    with a few candidates x profiles x 16 array operations, no simulation needed.
+    """
+
+    def __init__(self):
+        matches, weights = match_vector_classes()
+        order = np.argsort(-PERCENTAGE_TABLE[TABLE_INTERESTS, matches], axis=1, kind='stable')
+        # Sorted match counts packed 3 bits per rank identify the profile (as in the lookup table)
+        shifts = np.arange(16, dtype=np.uint64) * np.uint64(3)
+        sorted_matches = np.take_along_axis(matches, order, axis=1).astype(np.uint64)
+        keys, profile = np.unique((sorted_matches << shifts).sum(axis=1, dtype=np.uint64), return_inverse=True)
+        profile = profile.reshape(-1)
+        probabilities = weights / NUM_COMBINATIONS
+
+        profile_matches = ((keys[:, None] >> shifts) & np.uint64(7)).astype(np.intp)
+        self.profile_percentages = PERCENTAGE_TABLE[TABLE_INTERESTS, profile_matches]
+        self.profile_weights = np.bincount(profile, weights=probabilities, minlength=len(keys))
+        # persona_weights[p, r, k]: probability mass of users with profile p whose rank r is persona k
+        index = (profile[:, None] * 16 + np.arange(16)) * 16 + order
+        self.persona_weights = np.bincount(
+            index.ravel(), weights=np.repeat(probabilities, 16), minlength=len(keys) * 256
+        ).reshape(len(keys), 16, 16)
+
+    def dice_probabilities(self, ladders):
+        """candidates x profiles x 16 rank probabilities (create_weighted_dice without the cumsum)"""
+        ladders = np.atleast_2d(np.asarray(ladders, dtype=np.float64))
+        weighted = self.profile_percentages[None, :, :] * ladders[:, None, :]
+        total = weighted.sum(axis=2, keepdims=True)
+        # Equal distribution fallback, as in create_weighted_dice
+        return np.where(total > 0, weighted / np.where(total > 0, total, 1.0), 1 / 16)
+
+    def evaluate(self, ladders):
+        """(rank_probabilities, persona_probabilities) for each ladder, both candidates x 16"""
+        probabilities = self.dice_probabilities(ladders)
+        ranks = np.tensordot(probabilities, self.profile_weights, axes=([1], [0]))
+        personas = np.tensordot(probabilities, self.persona_weights, axes=([1, 2], [0, 1]))
+        return ranks, personas
+
+@dataclass
+class LadderTuningResult:
+    ladder: list
+    loss: float
+    rank_probabilities: np.ndarray
+    persona_probabilities: np.ndarray
+    initial_loss: float
+    candidates_evaluated: int
+    seconds: float
+
+def persona_flatness(persona_probabilities):
+    """Coefficient of variation of persona selection probabilities (0 = perfectly flat)"""
+    personas = np.atleast_2d(persona_probabilities)
+    return personas.std(axis=1) / personas.mean(axis=1)
+
+def ladder_loss(ranks, personas, target_ranks=None, flatness_weight=1.0):
+    """Total variation distance to target_ranks (if given) plus flatness_weight x persona_flatness"""
+    loss = flatness_weight * persona_flatness(personas)
+    if target_ranks is not None:
+        loss = loss + 0.5 * np.abs(ranks - target_ranks).sum(axis=1)
+    return loss
+
+def project_ladder(ladders, top_bonus, min_bonus):
+    """Make candidate ladders monotone non-increasing, anchored at top_bonus and floored at min_bonus"""
+    ladders = -np.sort(-np.asarray(ladders, dtype=np.float64), axis=-1)
+    # Dice only depend on the ladder up to scale, so pin rank 1 to keep values comparable
+    ladders = ladders * (top_bonus / ladders[..., :1])
+    return np.maximum(ladders, min_bonus)
+
+def tune_ladder_bonuses(target_ranks=None, flatness_weight=None, initial=LADDER_BONUSES, generations=60,
+                        batch_size=LADDER_TUNING_BATCH, step=0.3, min_bonus=0.01, seed=None, evaluator=None):
+    """
+    Search monotone non-increasing 16-value ladders for a target rank distribution
+    and/or flat persona frequencies. Each generation perturbs the best ladder in
+    log space, projects the candidates back onto monotone ladders and scores them
+    with LadderEvaluator; the step shrinks whenever a generation brings no gain.
+    With no target_ranks the objective is persona flatness alone.
+    """
+    started = time.perf_counter()
+    evaluator = evaluator or LadderEvaluator()
+    rng = np.random.default_rng(seed)
+    if target_ranks is not None:
+        target_ranks = np.asarray(target_ranks, dtype=np.float64)
+        if target_ranks.shape != (16,):
+            raise ValueError("target_ranks needs one value per rank (16)")
+        target_ranks = target_ranks / target_ranks.sum()
+    if flatness_weight is None:
+        flatness_weight = 1.0 if target_ranks is None else 0.0
+
+    def score(ladders):
+        ranks, personas = evaluator.evaluate(ladders)
+        return ladder_loss(ranks, personas, target_ranks, flatness_weight)
+
+    top_bonus = float(initial[0])
+    best = project_ladder(initial, top_bonus, min_bonus)
+    best_loss = initial_loss = float(score(best)[0])
+    evaluated = 1
+
+    for _ in range(generations):
+        noise = rng.normal(0.0, step, size=(batch_size, 16))
+        candidates = project_ladder(best * np.exp(noise), top_bonus, min_bonus)
+        losses = score(candidates)
+        evaluated += batch_size
+        idx = int(np.argmin(losses))
+        if losses[idx] < best_loss:
+            best, best_loss = candidates[idx], float(losses[idx])
+        else:
+            step *= 0.7
+
+    ranks, personas = evaluator.evaluate(best)
+    return LadderTuningResult(
+        ladder=[round(value, 4) for value in best.tolist()],
+        loss=best_loss,
+        rank_probabilities=ranks[0],
+        persona_probabilities=personas[0],
+        initial_loss=initial_loss,
+        candidates_evaluated=evaluated,
+        seconds=time.perf_counter() - started
+    )
 
 # ============================================================================
 # SIMULATION
 # ============================================================================
 
-def run_simulation(num_users=500, num_rounds=10, num_simulations=100):
-    """Run Monte Carlo simulation"""
+# Match types tracked per simulation: same-persona pairs by persona, plus mixed pairs
+MATCH_TYPES = PERSONA_NAMES + ['mixed']
+
+# Optional variance-reduction strategies (any combination):
+#   stratified - users are allocated proportionally to the dice strata (the distinct
+#                match vectors of the interest-class enumeration, grouped by dice
+#                profile), so every simulation's population matches the exact
+#                dice distribution up to one user per stratum
+#   antithetic - odd rounds reuse the previous round's dice uniforms reflected inside
+#                [0, 1) (ANTITHETIC_TOP - u), so each user's rank selections in a
+#                round pair are negatively correlated
+#   common     - dice uniforms come from their own stream, so two configurations run
+#                from the same seed see the same users and the same rolls (CRN)
+VARIANCE_REDUCTION_MODES = ('stratified', 'antithetic', 'common')
+DICE_STREAM_KEY = 0xD1CE
+# Largest double below 1: reflecting u in [0, 1) as ANTITHETIC_TOP - u stays in [0, 1),
+# where 1 - u could reach 1.0 and fall off the end of the dice (rank 1 fallback)
+ANTITHETIC_TOP = np.nextafter(1.0, 0.0)
+
+def _check_variance_reduction(variance_reduction):
+    modes = tuple(variance_reduction or ())
+    unknown = sorted(set(modes) - set(VARIANCE_REDUCTION_MODES))
+    if unknown:
+        raise ValueError(f"unknown variance reduction modes: {', '.join(unknown)} "
+                         f"(choose from {', '.join(VARIANCE_REDUCTION_MODES)})")
+    return modes
+
+@lru_cache(maxsize=1)
+def dice_strata():
+    """
+    Strata for stratified populations: the distinct match vectors of
+    match_vector_classes (which fix a user's persona order and dice), sorted by
+    dice profile so that neighbouring strata roll alike, with their exact
+    combination counts from the interest-class enumeration.
+    Returns (members, starts, sizes): every 5-interest mask grouped by match
+    vector, and each stratum's first member and size, in stratum order.
+    """
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(3)
+    matches, weights = match_vector_classes()
+    vector_keys = (matches.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+    profile_keys = (np.sort(matches, axis=1)[:, ::-1].astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+    strata = np.lexsort((vector_keys, profile_keys))
+
+    # Match counts add up per interest, so a combination's key is the sum of its interests' keys
+    combos = enumerate_combinations()
+    interest_keys = (PERSONA_MATRIX.T.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+    keys = interest_keys[combos].sum(axis=1, dtype=np.uint64)
+    grouped = np.argsort(keys, kind='stable')
+    members = np.bitwise_or.reduce(np.uint64(1) << combos[grouped].astype(np.uint64), axis=1)
+    starts = np.searchsorted(keys[grouped], vector_keys[strata])
+    return members, starts, weights[strata]
+
+def generate_stratified_population(num_users, rng):
+    """
+    Population allocated proportionally to the dice strata: user i sits at a uniform
+    point of the i-th of num_users equal slices of the cumulative stratum
+    probabilities, so a stratum with probability p gets floor or ceil of p * num_users
+    users, each a uniformly random interest set of that stratum.
+    """
+    members, starts, sizes = dice_strata()
+    ends = np.cumsum(sizes)
+    points = (np.arange(num_users) + rng.random(num_users)) * (NUM_COMBINATIONS / num_users)
+    stratum = np.minimum(np.searchsorted(ends, points, side='right'), len(sizes) - 1)
+    offset = np.minimum((points - (ends[stratum] - sizes[stratum])).astype(np.int64), sizes[stratum] - 1)
+    return members[starts[stratum] + offset]
+
+def _stream_rng(seed_sequence, key):
+    """Independent generator derived from a simulation's seed and a fixed stream key"""
+    return np.random.default_rng(np.random.SeedSequence(seed_sequence.entropy,
+                                                        spawn_key=seed_sequence.spawn_key + (key,)))
+
+def simulate_once(sim, seed_sequence, num_users, num_rounds, lookup_table=None,
+                  variance_reduction=(), ladder_bonuses=LADDER_BONUSES, instrumentation=None):
+    """Run one independent simulation on its own RNG stream"""
+    started = time.process_time()
+    report = InstrumentationReport(instrumentation)
+    timers = report.phase_timers
+    profiling = start_sampled_profiling(sim, instrumentation)
+    rng = np.random.default_rng(seed_sequence)
+    modes = _check_variance_reduction(variance_reduction)
+    roll_rng = _stream_rng(seed_sequence, DICE_STREAM_KEY) if 'common' in modes else rng
+
+    # Generate completely random users (5 interests each, packed as bitmasks)
+    with timers.phase('generate_users'):
+        if 'stratified' in modes:
+            user_masks = generate_stratified_population(num_users, rng)
+        else:
+            user_masks = generate_user_population(num_users, 5, rng=rng)
+
+    # Alignment and dice are built once per simulation; only rolls and pairing repeat
+    with timers.phase('build_dice'):
+        dice_cache = UserDiceCache(user_masks, ladder_bonuses, lookup_table=lookup_table)
+
+    persona_counts = np.zeros(16, dtype=np.int64)
+    rank_counts = np.zeros(16, dtype=np.int64)
+    same_persona_matches = np.zeros(16, dtype=np.int64)
+    mixed_matches = 0
+
+    for round_num in range(num_rounds):
+        with timers.phase('roll_dice'):
+            if 'antithetic' in modes and round_num % 2:
+                uniforms = ANTITHETIC_TOP - uniforms
+            else:
+                uniforms = roll_rng.random(num_users)
+            persona_idx, ranks = roll_weighted_dice_batch(dice_cache.cumulative, uniforms, dice_cache.order)
+        with timers.phase('pair_users'):
+            same_pairs, mixed_pairs, remaining = pair_users_array(persona_idx, rng)
+
+        with timers.phase('bookkeeping'):
+            # Track selections
+            persona_counts += np.bincount(persona_idx, minlength=16)
+            rank_counts += np.bincount(ranks - 1, minlength=16)
+
+            # Track matches
+            same_persona_matches += np.bincount(persona_idx[same_pairs[:, 0]], minlength=16)
+            mixed_matches += len(mixed_pairs)
+
+    finish_sampled_profiling(profiling, report)
+    sim_result = {
+        'histograms': SimulationHistograms.from_counts(persona_counts, rank_counts,
+                                                       np.append(same_persona_matches, mixed_matches), MATCH_TYPES),
+        'cpu_seconds': time.process_time() - started
+    }
+    if instrumentation is not None:
+        sim_result['instrumentation'] = report
+    return sim_result
+
+# Target-precision runs: two-sided 95% intervals, never judged on fewer simulations
+CONFIDENCE_LEVEL = 0.95
+MIN_CONVERGENCE_SIMULATIONS = 10
+RANK_BUCKETS = {'Rank 1-3': slice(0, 3), 'Rank 4-8': slice(3, 8), 'Rank 9-16': slice(8, 16)}
+
+@lru_cache(maxsize=None)
+def confidence_quantile(num_simulations):
+    """Two-sided CONFIDENCE_LEVEL Student-t quantile for a mean over num_simulations (n - 1 dof)"""
+    from scipy.stats import t
+    return float(t.ppf(0.5 + CONFIDENCE_LEVEL / 2, num_simulations - 1))
+
+class ConvergenceMonitor:
+    """
+    Running mean and confidence half-width of the headline shares, one value per
+    simulation: each persona's selection share, the rank-bucket shares and the
+    mixed-pair rate. Simulations are independent, so the half-width is the
+    Student-t quantile (n - 1 degrees of freedom) times the standard error across
+    simulations.
+    """
+
+    def __init__(self, num_users, num_rounds):
+        self.events = max(num_users * num_rounds, 1)
+        self.pairs = max(num_rounds * (num_users // 2), 1)
+        self.metrics = PERSONA_NAMES + list(RANK_BUCKETS) + ['Mixed pair rate']
+        self.num_simulations = 0
+        self.sums = np.zeros(len(self.metrics))
+        self.squares = np.zeros(len(self.metrics))
+
+    def add(self, histograms):
+        """Add one simulation's histograms"""
+        ranks = histograms.totals['rank']
+        values = np.concatenate([
+            histograms.totals['persona'] / self.events,
+            [ranks[bucket].sum() / self.events for bucket in RANK_BUCKETS.values()],
+            [histograms.totals['match'][-1] / self.pairs]
+        ])
+        self.sums += values
+        self.squares += values ** 2
+        self.num_simulations += 1
+
+    def mean(self):
+        return self.sums / max(self.num_simulations, 1)
+
+    def half_widths(self):
+        n = self.num_simulations
+        if n < 2:
+            return np.full(len(self.metrics), np.inf)
+        variance = np.maximum(self.squares - self.sums ** 2 / n, 0.0) / (n - 1)
+        return confidence_quantile(n) * np.sqrt(variance / n)
+
+    def converged(self, tolerance):
+        return self.num_simulations >= MIN_CONVERGENCE_SIMULATIONS and bool((self.half_widths() <= tolerance).all())
+
+    def as_dict(self):
+        return {
+            'metrics': list(self.metrics),
+            'mean': self.mean(),
+            'half_width': self.half_widths(),
+            'confidence_quantile': confidence_quantile(self.num_simulations) if self.num_simulations > 1 else np.inf
+        }
+
+def run_simulation(num_users=500, num_rounds=10, num_simulations=100, lookup_table=None, seed=None, workers=1,
+                   variance_reduction=(), ladder_bonuses=LADDER_BONUSES, tolerance=None, time_budget=None,
+                   instrumentation=None, progress_interval=None, metrics_path=None):
+    """
+    Run Monte Carlo simulation (optionally fanned out over worker processes).
+    With a tolerance and/or time_budget (seconds), num_simulations is a maximum:
+    simulations run in batches and the run stops at the first simulation after
+    which every ConvergenceMonitor interval is within tolerance, or after the
+    batch that exhausts the time budget. Stopping on tolerance is decided in
+    simulation order, so it is reproducible for any worker count.
+    With an Instrumentation, per-phase timings (and any sampled profiles) are
+    summed over simulations into parameters['instrumentation'].
+    progress_interval / metrics_path enable ProgressReporter lines and JSON-lines metrics.
+    """
+    modes = _check_variance_reduction(variance_reduction)
+    if 'stratified' in modes:
+        dice_strata()  # built once here so forked workers share it
+    root_seed, seed_sequences = spawn_simulation_seeds(seed, num_simulations)
+    monitor = ConvergenceMonitor(num_users, num_rounds)
+    report = InstrumentationReport(instrumentation)
+    adaptive = tolerance is not None or time_budget is not None
+    batch_size = max(MIN_CONVERGENCE_SIMULATIONS, 4 * workers) if adaptive else max(num_simulations, 1)
 
     all_results = {
-        'persona_selections': [],
-        'rank_distributions': [],
-        'match_patterns': [],
+        'histograms': SimulationHistograms(MATCH_TYPES),  # Merged per-simulation count arrays
         'entropy_metrics': [],
         'parameters': {
             'num_users': num_users,
             'num_rounds': num_rounds,
             'num_simulations': num_simulations,
-            'total_events': num_users * num_rounds * num_simulations
+            'total_events': num_users * num_rounds * num_simulations,
+            'seed': root_seed,
+            'workers': workers,
+            'variance_reduction': list(modes)
         }
     }
 
-    for sim in range(num_simulations):
-        # Generate completely random users (5 interests each)
-        users = {f"User_{i}": generate_random_user_interests(5) for i in range(num_users)}
+    with ProgressReporter(num_users, num_rounds, num_simulations, progress_interval, metrics_path) as progress:
+        started = time.perf_counter()
+        serial_seconds = 0.0
+        stopped_by = 'max_simulations'
+        for batch_start in range(0, num_simulations, batch_size):
+            batch = seed_sequences[batch_start:batch_start + batch_size]
+            for sim_result in iter_simulation_results(simulate_once, batch,
+                                                      (num_users, num_rounds, lookup_table, modes, ladder_bonuses,
+                                                       instrumentation), workers,
+                                                      sims=range(batch_start, batch_start + len(batch))):
+                with report.phase_timers.phase('merge_results'):
+                    all_results['histograms'].merge(sim_result['histograms'])
+                    serial_seconds += sim_result['cpu_seconds']
+                    monitor.add(sim_result['histograms'])
+                if instrumentation is not None:
+                    report.merge(sim_result['instrumentation'])
+                histograms = all_results['histograms']
+                progress.update(histograms.num_simulations, int(histograms.totals['match'][-1]))
+                if tolerance is not None and monitor.converged(tolerance):
+                    stopped_by = 'tolerance'
+                    break
+            if stopped_by == 'tolerance':
+                break
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                stopped_by = 'time_budget'
+                break
+
+        # Speedup against running the same simulations back to back on one core,
+        # estimated from the CPU time each simulation needed
+        wall_seconds = time.perf_counter() - started
+        completed = all_results['histograms'].num_simulations
+        progress.close(completed, int(all_results['histograms'].totals['match'][-1]))
+    all_results['parameters'].update({
+        'num_simulations': completed,
+        'total_events': num_users * num_rounds * completed,
+        'wall_time_seconds': wall_seconds,
+        'serial_time_seconds': serial_seconds,
+        'parallel_speedup': serial_seconds / wall_seconds if wall_seconds > 0 else 1.0
+    })
+    if adaptive:
+        all_results['parameters'].update({
+            'max_simulations': num_simulations,
+            'tolerance': tolerance,
+            'time_budget_seconds': time_budget,
+            'stopped_by': stopped_by
+        })
+    if instrumentation is not None:
+        all_results['parameters']['instrumentation'] = report.as_dict()
+    all_results['convergence'] = monitor.as_dict()
+    return all_results
 
-        simulation_data = {
-            'persona_counts': Counter(),
-            'rank_counts': Counter(),
-            'match_types': Counter(),
-            'persona_pairs': Counter()
+def variance_ratios(results, exact=None):
+    """
+    Variance reduction against plain Monte Carlo: the exact per-simulation variance
+    of every persona and rank count under plain sampling (ExactDistribution.plain_variances)
+    over the run's observed per-simulation variance. About 1 for a plain run and
+    above 1 when the variance-reduction modes help.
+    Returns {'persona': ratios, 'rank': ratios}.
+    """
+    if exact is None:
+        exact = exact_selection_distribution()
+    params = results['parameters']
+    histograms = results['histograms']
+    plain = exact.plain_variances(params['num_users'], params['num_rounds'])
+
+    ratios = {}
+    for name in ('persona', 'rank'):
+        observed = histograms.variance(name)
+        ratios[name] = np.divide(plain[name], observed, out=np.full(len(observed), np.nan), where=observed > 0)
+    return ratios
+
+def simulate_pair_once(sim, seed_sequence, num_users, num_rounds, ladder_a, ladder_b, variance_reduction=('common',)):
+    """One simulation of two ladders on the same seed (common random numbers)"""
+    started = time.process_time()
+    a = simulate_once(sim, seed_sequence, num_users, num_rounds, None, variance_reduction, ladder_a)['histograms']
+    b = simulate_once(sim, seed_sequence, num_users, num_rounds, None, variance_reduction, ladder_b)['histograms']
+    difference = SimulationHistograms.from_counts(*(b.totals[name] - a.totals[name] for name in a.totals),
+                                                   MATCH_TYPES)
+    return {'a': a, 'b': b, 'difference': difference, 'cpu_seconds': time.process_time() - started}
+
+def compare_ladders(ladder_a, ladder_b=LADDER_BONUSES, num_users=500, num_rounds=10, num_simulations=100,
+                    seed=None, workers=1, variance_reduction=('common',)):
+    """
+    Estimate how switching from ladder_a to ladder_b changes the result histograms.
+    Both ladders are simulated on the same seeds, so with 'common' the differences are
+    paired; crn_gain is the variance of independent runs (var_a + var_b) over the
+    variance of the paired difference, per bin.
+    """
+    modes = _check_variance_reduction(variance_reduction)
+    root_seed, seed_sequences = spawn_simulation_seeds(seed, num_simulations)
+    merged = {key: SimulationHistograms(MATCH_TYPES) for key in ('a', 'b', 'difference')}
+    for sim_result in iter_simulation_results(simulate_pair_once, seed_sequences,
+                                              (num_users, num_rounds, ladder_a, ladder_b, modes), workers):
+        for key, histograms in merged.items():
+            histograms.merge(sim_result[key])
+
+    crn_gain = {}
+    for name in merged['difference'].totals:
+        independent = merged['a'].variance(name) + merged['b'].variance(name)
+        paired = merged['difference'].variance(name)
+        crn_gain[name] = np.divide(independent, paired, out=np.full(len(paired), np.nan), where=paired > 0)
+
+    return {
+        'histograms_a': merged['a'],
+        'histograms_b': merged['b'],
+        'difference': merged['difference'],
+        'crn_gain': crn_gain,
+        'parameters': {
+            'num_users': num_users,
+            'num_rounds': num_rounds,
+            'num_simulations': num_simulations,
+            'seed': root_seed,
+            'variance_reduction': list(modes)
         }
-
-        for round_num in range(num_rounds):
-            selections = run_matching_round(users)
-            matches, remaining = pair_users(selections)
-
-            # Track selections
-            for sel in selections:
-                simulation_data['persona_counts'][sel['selected_persona']] += 1
-                simulation_data['rank_counts'][sel['rank']] += 1
-
-            # Track matches
-            for match in matches:
-                simulation_data['match_types'][match['persona']] += 1
-                pair = tuple(sorted([match['persona'], match['persona']]))
-                simulation_data['persona_pairs'][pair] += 1
-
-        all_results['persona_selections'].append(dict(simulation_data['persona_counts']))
-        all_results['rank_distributions'].append(dict(simulation_data['rank_counts']))
-        all_results['match_patterns'].append(dict(simulation_data['match_types']))
-
-    return all_results
+    }
 
 # ============================================================================
 # VISUALIZATION
 # ============================================================================
 
+# Where charts go: None shows them (notebooks), a directory saves them as PNGs headlessly
+CHART_DIR = None
+
+def _pyplot():
+    """Import matplotlib on first use (Agg backend when charts are written to files)"""
+    import matplotlib
+    if CHART_DIR is not None:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D  # registers the '3d' projection on older matplotlib
+    return plt
+
+def _show_figure(fig, name):
+    """Show a finished figure, or save it as CHART_DIR/<name>.png and free it"""
+    plt = _pyplot()
+    if CHART_DIR is None:
+        plt.show()
+        return
+    os.makedirs(CHART_DIR, exist_ok=True)
+    fig.savefig(os.path.join(CHART_DIR, f"{name}.png"), dpi=120, bbox_inches='tight')
+    plt.close(fig)
+
+def persona_jaccard_matrix(persona_masks=PERSONA_MASKS):
+    """Jaccard similarity between every pair of archetypes, from packed interest masks"""
+    masks = np.asarray(persona_masks, dtype=np.uint64)
+    intersection = popcount64(masks[:, None] & masks[None, :])
+    union = popcount64(masks[:, None] | masks[None, :])
+    return np.divide(intersection, union, out=np.zeros(union.shape), where=union > 0)
+
 def create_3d_topographical_map(persona_counts):
-    """Create 3D topographical map of archetype selection frequencies"""
+    """Create 3D topographical map of archetype selection frequencies (counts in PERSONAS order)"""
+    plt = _pyplot()
+    from scipy.interpolate import griddata
 
     # Create coordinate system for archetypes based on interest similarity
     archetype_names = list(PERSONAS.keys())
 
     # Calculate similarity matrix between archetypes
-    similarity_matrix = []
-    for i, (name1, vector1) in enumerate(PERSONAS.items()):
-        row = []
-        for j, (name2, vector2) in enumerate(PERSONAS.items()):
-            # Jaccard similarity
-            intersection = sum(1 for a, b in zip(vector1, vector2) if a == 1 and b == 1)
-            union = sum(1 for a, b in zip(vector1, vector2) if a == 1 or b == 1)
-            similarity = intersection / union if union > 0 else 0
-            row.append(similarity)
-        similarity_matrix.append(row)
+    similarity_matrix = persona_jaccard_matrix(PERSONA_MASKS)
 
     # Simple 2D positioning based on index for now (can be enhanced with MDS)
     # Arrange in a 4x4 grid
@@ -272,7 +787,7 @@ def create_3d_topographical_map(persona_counts):
     positions = np.array(grid_positions)
     x_coords = positions[:, 0]
     y_coords = positions[:, 1]
-    frequencies = np.array([persona_counts.get(name, 0) for name in archetype_names])
+    frequencies = np.asarray(persona_counts)
 
     # Create meshgrid for interpolation
     xi = np.linspace(-0.5, 3.5, 100)
@@ -389,42 +904,34 @@ def create_3d_topographical_map(persona_counts):
     plt.colorbar(im, ax=ax4, label='Selection Frequency')
 
     plt.tight_layout()
-    plt.show()
+    _show_figure(fig, "topographical_map")
 
     return fig
 
 def plot_results(results):
     """Create comprehensive visualization"""
+    plt = _pyplot()
 
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
     fig.suptitle('Archetype Matching System - Monte Carlo Simulation Results', fontsize=16, fontweight='bold')
 
-    # 1. Persona Selection Distribution
-    all_personas = []
-    for sim_result in results['persona_selections']:
-        for persona, count in sim_result.items():
-            all_personas.extend([persona] * count)
+    histograms = results['histograms']
+    persona_counts = histograms.totals['persona']
+    rank_counts = histograms.totals['rank']
+    match_counts = histograms.totals['match']
 
-    persona_counts = Counter(all_personas)
-    personas_sorted = sorted(persona_counts.items(), key=lambda x: x[1], reverse=True)
+    # 1. Persona Selection Distribution
+    personas_sorted = [i for i in np.argsort(-persona_counts, kind='stable') if persona_counts[i]]
 
     ax1 = axes[0, 0]
-    ax1.barh([p[0] for p in personas_sorted], [p[1] for p in personas_sorted], color='steelblue')
+    ax1.barh([PERSONA_NAMES[i] for i in personas_sorted], persona_counts[personas_sorted], color='steelblue')
     ax1.set_xlabel('Selection Count')
     ax1.set_title('Archetype Selection Frequency Across All Simulations')
     ax1.grid(axis='x', alpha=0.3)
 
     # 2. Rank Distribution
-    all_ranks = []
-    for sim_result in results['rank_distributions']:
-        for rank, count in sim_result.items():
-            all_ranks.extend([rank] * count)
-
     ax2 = axes[0, 1]
-    rank_counts = Counter(all_ranks)
-    ranks = sorted(rank_counts.keys())
-    counts = [rank_counts[r] for r in ranks]
-    ax2.bar(ranks, counts, color='coral')
+    ax2.bar(range(1, 17), rank_counts, color='coral')
     ax2.set_xlabel('Rank')
     ax2.set_ylabel('Frequency')
     ax2.set_title('Distribution of Selected Archetype Ranks')
@@ -432,16 +939,10 @@ def plot_results(results):
     ax2.grid(axis='y', alpha=0.3)
 
     # 3. Match Type Distribution
-    all_match_types = []
-    for sim_result in results['match_patterns']:
-        for match_type, count in sim_result.items():
-            all_match_types.extend([match_type] * count)
-
-    match_counts = Counter(all_match_types)
-
     ax3 = axes[1, 0]
-    match_types_sorted = sorted(match_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-    ax3.barh([m[0] for m in match_types_sorted], [m[1] for m in match_types_sorted], color='mediumseagreen')
+    match_types_sorted = [i for i in np.argsort(-match_counts, kind='stable') if match_counts[i]][:10]
+    ax3.barh([histograms.labels['match'][i] for i in match_types_sorted], match_counts[match_types_sorted],
+             color='mediumseagreen')
     ax3.set_xlabel('Match Count')
     ax3.set_title('Top 10 Match Types (Same Persona Pairs)')
     ax3.grid(axis='x', alpha=0.3)
@@ -450,7 +951,7 @@ def plot_results(results):
     ax4 = axes[1, 1]
     ranks = list(range(1, 17))
     bonuses = LADDER_BONUSES
-    frequencies = [rank_counts.get(r, 0) for r in ranks]
+    frequencies = rank_counts
 
     ax4_twin = ax4.twinx()
     ax4.plot(ranks, bonuses, 'b-o', label='Ladder Bonus', linewidth=2)
@@ -468,87 +969,308 @@ def plot_results(results):
     ax4_twin.legend(loc='upper right')
 
     plt.tight_layout()
-    plt.show()
+    _show_figure(fig, "simulation_results")
 
     return persona_counts, rank_counts, match_counts
 
 # ============================================================================
-# RUN SIMULATION
+# RUN CONFIGURATION
 # ============================================================================
 
+@dataclass
+class SimulationConfig:
+    num_users: int = 500
+    num_rounds: int = 10
+    num_simulations: int = 100
+    seed: int = None
+    # Serial by default; simulations are seeded independently, so --workers N (opt-in)
+    # gives the same results on any number of cores
+    workers: int = 1
+    # Save charts as PNGs in this directory (headless); None shows them as in a notebook
+    chart_dir: str = None
+    plots: bool = True
+    # Also compute the exact selection distribution and check the run against it
+    exact: bool = False
+    # Search LADDER_BONUSES instead of simulating: 'flatness' or 'ranks' (needs target_ranks)
+    tune_ladder: str = None
+    target_ranks: list = None
+    # Any of VARIANCE_REDUCTION_MODES
+    variance_reduction: tuple = ()
+    # Target precision: stop once every tracked share's 95% CI half-width is below
+    # tolerance (num_simulations becomes a maximum) or time_budget seconds have passed
+    tolerance: float = None
+    time_budget: float = None
+    # Hot-path instrumentation: per-phase timers, plus cProfile / tracemalloc on every Nth simulation
+    instrument: bool = False
+    profile_every: int = 0
+    tracemalloc_every: int = 0
+    # Progress line every progress_interval seconds (0 = quiet); metrics_file gets JSON lines
+    progress_interval: float = PROGRESS_INTERVAL_SECONDS
+    metrics_file: str = None
+    # Dice lookup table directory (built on first use); None computes dice per simulation
+    lookup_table: str = None
+
+def prompt_simulation_config():
+    """Ask for the run size interactively (the notebook workflow)"""
+    print("Recommended configurations:")
+    print("  - Quick test: 500 users, 10 rounds, 20 simulations (100K events)")
+    print("  - Standard: 5000 users, 10 rounds, 20 simulations (1M events)")
+    print("  - Large scale: 10000 users, 10 rounds, 20 simulations (2M events)")
+    print()
+
+    try:
+        num_users = int(input("Enter number of users per simulation (e.g., 500, 5000, 10000): "))
+        num_rounds = int(input("Enter number of rounds per simulation (e.g., 10): "))
+        num_simulations = int(input("Enter number of simulations to run (e.g., 20, 100): "))
+    except (ValueError, EOFError):
+        print("Invalid input! Using default values: 500 users, 10 rounds, 100 simulations")
+        num_users, num_rounds, num_simulations = 500, 10, 100
+
+    return SimulationConfig(num_users, num_rounds, num_simulations)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Archetype matching Monte Carlo simulation")
+    parser.add_argument("--config", help="JSON file with SimulationConfig fields")
+    parser.add_argument("--users", type=int, dest="num_users")
+    parser.add_argument("--rounds", type=int, dest="num_rounds")
+    parser.add_argument("--simulations", type=int, dest="num_simulations")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, help="worker processes (default 1; results do not depend on it)")
+    parser.add_argument("--chart-dir", dest="chart_dir", help="write charts here as PNGs instead of showing them")
+    parser.add_argument("--no-plots", dest="plots", action="store_false", default=None,
+                        help="simulation and summary only (matplotlib is never imported)")
+    parser.add_argument("--exact", action="store_true", default=None,
+                        help="compare the run with the exact (fully enumerated) selection distribution")
+    parser.add_argument("--variance-reduction", dest="variance_reduction", type=lambda text: tuple(text.split(",")),
+                        help=f"comma-separated sampling modes: {', '.join(VARIANCE_REDUCTION_MODES)}")
+    parser.add_argument("--tolerance", type=float,
+                        help="stop when every persona/rank-bucket/mixed-rate 95%% CI half-width is below this share")
+    parser.add_argument("--time-budget", type=float, dest="time_budget", help="stop after this many seconds")
+    parser.add_argument("--instrument", action="store_true", default=None,
+                        help="time each simulation phase and print the breakdown in the summary")
+    parser.add_argument("--profile-every", type=int, dest="profile_every",
+                        help="run cProfile on every Nth simulation")
+    parser.add_argument("--tracemalloc-every", type=int, dest="tracemalloc_every",
+                        help="take a tracemalloc snapshot of every Nth simulation")
+    parser.add_argument("--progress-interval", type=float, dest="progress_interval",
+                        help="seconds between progress lines (0 disables them)")
+    parser.add_argument("--metrics-file", dest="metrics_file",
+                        help="append throughput/ETA metrics to this JSON-lines file")
+    parser.add_argument("--lookup-table", dest="lookup_table",
+                        help="load (or build) the precomputed dice lookup table in this directory")
+    parser.add_argument("--tune-ladder", dest="tune_ladder", choices=["flatness", "ranks"],
+                        help="search monotone ladder bonuses for flat persona frequencies or --target-ranks")
+    parser.add_argument("--target-ranks", dest="target_ranks",
+                        type=lambda text: [float(value) for value in text.split(",")],
+                        help="16 comma-separated rank weights for --tune-ladder ranks")
+    # Unknown arguments are an error; only a notebook kernel's -f kernel.json is dropped
+    return parser.parse_args(strip_kernel_args(argv))
+
+def config_from_args(args):
+    """SimulationConfig from --config and flags; prompts when no run options were given"""
+    overrides = {name: value for name, value in vars(args).items() if name != 'config' and value is not None}
+    if args.config:
+        config = load_config_file(args.config, SimulationConfig())
+    elif overrides:
+        config = SimulationConfig()
+    else:
+        config = prompt_simulation_config()
+    return SimulationConfig(**{**asdict(config), **overrides})
+
+def print_summary(results, exact=None):
+    """Print summary statistics using actual parameters from results (exact adds the variance ratios)"""
+    params = results['parameters']
+    histograms = results['histograms']
+    persona_counts = histograms.totals['persona']
+    rank_counts = histograms.totals['rank']
+
+    print("=" * 70)
+    print("SUMMARY STATISTICS")
+    print("=" * 70)
+    print()
+    print(f"Simulation Parameters:")
+    print(f"  - Users per simulation: {params['num_users']:,}")
+    print(f"  - Rounds per simulation: {params['num_rounds']}")
+    print(f"  - Total simulations: {params['num_simulations']}")
+    print(f"  - Total matching events: {params['total_events']:,}")
+    print(f"  - Wall time: {params['wall_time_seconds']:.1f}s on {params['workers']} worker(s) "
+          f"({params['parallel_speedup']:.1f}x vs. serial)")
+    print(f"  - Engine startup: {ENGINE_IMPORT_SECONDS:.2f}s (target < {STARTUP_TARGET_SECONDS:.2f}s)")
+    if exact is not None and histograms.num_simulations > 1:
+        ratios = variance_ratios(results, exact)
+        modes = ', '.join(params.get('variance_reduction') or ['none'])
+        print(f"  - Variance reduction: {modes}; variance ratio vs. plain Monte Carlo "
+              f"(median over bins): personas {np.nanmedian(ratios['persona']):.2f}x, "
+              f"ranks {np.nanmedian(ratios['rank']):.2f}x")
+    print()
+    print("Top 5 Most Selected Archetypes:")
+    persona_means = histograms.mean('persona')
+    persona_stds = np.sqrt(histograms.variance('persona'))
+    for idx in np.argsort(-persona_counts, kind='stable')[:5]:
+        percentage = (persona_counts[idx] / persona_counts.sum()) * 100
+        print(f"  {PERSONA_NAMES[idx]:20s}: {persona_counts[idx]:5d} selections ({percentage:.1f}%, "
+              f"{persona_means[idx]:.1f} ± {persona_stds[idx]:.1f} per simulation)")
+
+    print()
+    print("Rank Selection Distribution:")
+    print(f"  Rank 1-3:  {rank_counts[0:3].sum():5d} ({rank_counts[0:3].sum()/rank_counts.sum()*100:.1f}%)")
+    print(f"  Rank 4-8:  {rank_counts[3:8].sum():5d} ({rank_counts[3:8].sum()/rank_counts.sum()*100:.1f}%)")
+    print(f"  Rank 9-16: {rank_counts[8:16].sum():5d} ({rank_counts[8:16].sum()/rank_counts.sum()*100:.1f}%)")
+
+    print()
+    if 'instrumentation' in params:
+        print_instrumentation(params['instrumentation'])
+        print()
+
+    convergence = results.get('convergence')
+    if convergence is not None and histograms.num_simulations > 1:
+        print("Achieved 95% Confidence Intervals (mean share ± half-width):")
+        if 'stopped_by' in params:
+            target = f"tolerance {params['tolerance']}" if params['tolerance'] is not None else "no tolerance"
+            print(f"  Stopped by {params['stopped_by'].replace('_', ' ')} after {params['num_simulations']} of "
+                  f"{params['max_simulations']} simulations ({target})")
+        means = dict(zip(convergence['metrics'], convergence['mean']))
+        widths = dict(zip(convergence['metrics'], convergence['half_width']))
+        persona_widths = np.array([widths[name] for name in PERSONA_NAMES])
+        widest = PERSONA_NAMES[int(np.argmax(persona_widths))]
+        print(f"  Persona shares: widest ±{persona_widths.max()*100:.2f}% ({widest}), "
+              f"median ±{np.median(persona_widths)*100:.2f}%")
+        for name in list(RANK_BUCKETS) + ['Mixed pair rate']:
+            print(f"  {name + ':':16s} {means[name]*100:5.1f}% ± {widths[name]*100:.2f}%")
+        print()
+
+    print("This demonstrates emergent patterns (alpha) from your matching system!")
+    print("=" * 70)
+
+def print_exact_comparison(results, exact):
+    """Print exact vs simulated selection and match shares"""
+    params = results['parameters']
+    comparison = compare_with_exact(results, exact)
+    matches = exact.match_expectations(params['num_users'])
+    observed_matches = comparison['match']['observed']
+    observed_ranks = comparison['rank']['observed']
+
+    print("=" * 70)
+    print("EXACT DISTRIBUTION CHECK")
+    print("=" * 70)
+    print()
+    print(f"  {NUM_COMBINATIONS:,} interest combinations -> {exact.num_match_vectors:,} distinct match vectors "
+          f"({exact.num_interest_classes} interest classes)")
+    print(f"  Mixed match share: exact {matches['mixed_share']*100:.2f}%, "
+          f"simulated {observed_matches[-1] / observed_matches.sum()*100:.2f}%")
+    print(f"  Rank 1 selections: exact {exact.rank_probabilities[0]*100:.2f}%, "
+          f"simulated {observed_ranks[0] / observed_ranks.sum()*100:.2f}%")
+    print()
+    print("Top 5 Archetypes by Exact Selection Probability:")
+    observed_personas = comparison['persona']['observed']
+    for idx in np.argsort(-exact.persona_probabilities, kind='stable')[:5]:
+        print(f"  {PERSONA_NAMES[idx]:20s}: exact {exact.persona_probabilities[idx]*100:.2f}%, "
+              f"simulated {observed_personas[idx] / observed_personas.sum()*100:.2f}% "
+              f"(z = {comparison['persona']['z'][idx]:+.2f})")
+    print()
+    print(f"  Largest |z| over all persona/rank/match bins: {comparison['max_abs_z']:.2f}")
+    print("=" * 70)
+
+def print_ladder_tuning(result):
+    """Print the tuned ladder and its predicted rank histogram"""
+    print("=" * 70)
+    print("LADDER BONUS TUNING")
+    print("=" * 70)
+    print()
+    print(f"  Candidates evaluated: {result.candidates_evaluated:,} in {result.seconds:.1f}s")
+    print(f"  Loss: {result.initial_loss:.4f} (current LADDER_BONUSES) -> {result.loss:.4f}")
+    print(f"  Persona flatness (CV): {persona_flatness(result.persona_probabilities)[0]:.4f}")
+    print()
+    print("LADDER_BONUSES = [")
+    print("    " + ", ".join(f"{value:.4f}" for value in result.ladder[:8]) + ",")
+    print("    " + ", ".join(f"{value:.4f}" for value in result.ladder[8:]))
+    print("]")
+    print()
+    print("Predicted Rank Distribution:")
+    for rank, probability in enumerate(result.rank_probabilities.tolist(), start=1):
+        print(f"  Rank {rank:2d}: {probability*100:5.2f}% {'#' * int(round(probability * 200))}")
+    print("=" * 70)
+
+# Time from the first import to a usable engine (numpy + definitions; no plotting libraries)
+ENGINE_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
 # ============================================================================
 # USER INPUT AND RUN SIMULATION
 # ============================================================================
 
-print("=" * 70)
-print("ARCHETYPE MATCHING SYSTEM - MONTE CARLO SIMULATION (with 3D Visualization)")
-print("=" * 70)
-print()
-print("Recommended configurations:")
-print("  - Quick test: 500 users, 10 rounds, 20 simulations (100K events)")
-print("  - Standard: 5000 users, 10 rounds, 20 simulations (1M events)")
-print("  - Large scale: 10000 users, 10 rounds, 20 simulations (2M events)")
-print()
-
-# Get user input
-try:
-    NUM_USERS = int(input("Enter number of users per simulation (e.g., 500, 5000, 10000): "))
-    NUM_ROUNDS = int(input("Enter number of rounds per simulation (e.g., 10): "))
-    NUM_SIMULATIONS = int(input("Enter number of simulations to run (e.g., 20, 100): "))
-except ValueError:
-    print("Invalid input! Using default values: 500 users, 10 rounds, 100 simulations")
-    NUM_USERS = 500
-    NUM_ROUNDS = 10
-    NUM_SIMULATIONS = 100
-
-print()
-print("=" * 70)
-print(f"Running simulation with:")
-print(f"  - Users per simulation: {NUM_USERS:,}")
-print(f"  - Interests per user: 5 (randomly selected from 52)")
-print(f"  - Rounds per simulation: {NUM_ROUNDS}")
-print(f"  - Total simulations: {NUM_SIMULATIONS}")
-print(f"  - Total matching events: {NUM_USERS * NUM_ROUNDS * NUM_SIMULATIONS:,}")
-print("=" * 70)
-print()
-print("Generating completely random users with random interest selections...")
-print("Running simulation...")
-print()
-
-results = run_simulation(num_users=NUM_USERS, num_rounds=NUM_ROUNDS, num_simulations=NUM_SIMULATIONS)
-
-print("Simulation complete! Generating visualizations...")
-print()
-
-persona_counts, rank_counts, match_counts = plot_results(results)
-
-print("Creating 3D Topographical Map...")
-print()
-create_3d_topographical_map(persona_counts)
-
-# Print summary statistics using actual parameters from results
-params = results['parameters']
-print("=" * 70)
-print("SUMMARY STATISTICS")
-print("=" * 70)
-print()
-print(f"Simulation Parameters:")
-print(f"  - Users per simulation: {params['num_users']:,}")
-print(f"  - Rounds per simulation: {params['num_rounds']}")
-print(f"  - Total simulations: {params['num_simulations']}")
-print(f"  - Total matching events: {params['total_events']:,}")
-print()
-print("Top 5 Most Selected Archetypes:")
-for persona, count in persona_counts.most_common(5):
-    percentage = (count / sum(persona_counts.values())) * 100
-    print(f"  {persona:20s}: {count:5d} selections ({percentage:.1f}%)")
-
-print()
-print("Rank Selection Distribution:")
-print(f"  Rank 1-3:  {sum(rank_counts.get(r, 0) for r in [1,2,3]):5d} ({sum(rank_counts.get(r, 0) for r in [1,2,3])/sum(rank_counts.values())*100:.1f}%)")
-print(f"  Rank 4-8:  {sum(rank_counts.get(r, 0) for r in range(4,9)):5d} ({sum(rank_counts.get(r, 0) for r in range(4,9))/sum(rank_counts.values())*100:.1f}%)")
-print(f"  Rank 9-16: {sum(rank_counts.get(r, 0) for r in range(9,17)):5d} ({sum(rank_counts.get(r, 0) for r in range(9,17))/sum(rank_counts.values())*100:.1f}%)")
-
-print()
-print("This demonstrates emergent patterns (alpha) from your matching system!")
-print("=" * 70)
\ No newline at end of file
+def main(argv=None):
+    global CHART_DIR
+
+    print("=" * 70)
+    print("ARCHETYPE MATCHING SYSTEM - MONTE CARLO SIMULATION (with 3D Visualization)")
+    print("=" * 70)
+    print()
+
+    config = config_from_args(parse_args(argv))
+    CHART_DIR = config.chart_dir
+
+    if config.tune_ladder:
+        if config.tune_ladder == "ranks" and config.target_ranks is None:
+            raise SystemExit("--tune-ladder ranks needs --target-ranks")
+        print("Enumerating all interest combinations for the ladder evaluator...")
+        print()
+        result = tune_ladder_bonuses(config.target_ranks if config.tune_ladder == "ranks" else None,
+                                     seed=config.seed)
+        print_ladder_tuning(result)
+        return result
+
+    print()
+    print("=" * 70)
+    print(f"Running simulation with:")
+    print(f"  - Users per simulation: {config.num_users:,}")
+    print(f"  - Interests per user: 5 (randomly selected from 52)")
+    print(f"  - Rounds per simulation: {config.num_rounds}")
+    print(f"  - Total simulations: {config.num_simulations}")
+    print(f"  - Total matching events: {config.num_users * config.num_rounds * config.num_simulations:,}")
+    print(f"  - Worker processes: {config.workers}")
+    print("=" * 70)
+    print()
+    print("Generating completely random users with random interest selections...")
+    print("Running simulation...")
+    print()
+
+    lookup_table = load_dice_lookup_table(config.lookup_table) if config.lookup_table else None
+    results = run_simulation(num_users=config.num_users, num_rounds=config.num_rounds,
+                             num_simulations=config.num_simulations, lookup_table=lookup_table,
+                             seed=config.seed, workers=config.workers,
+                             variance_reduction=config.variance_reduction,
+                             tolerance=config.tolerance, time_budget=config.time_budget,
+                             instrumentation=instrumentation_from_config(config),
+                             progress_interval=config.progress_interval, metrics_path=config.metrics_file)
+
+    if config.plots:
+        print("Simulation complete! Generating visualizations...")
+        print()
+
+        persona_counts, rank_counts, match_counts = plot_results(results)
+
+        print("Creating 3D Topographical Map...")
+        print()
+        create_3d_topographical_map(persona_counts)
+        if CHART_DIR is not None:
+            print(f"Charts saved to {CHART_DIR}")
+            print()
+    else:
+        print("Simulation complete!")
+        print()
+
+    # The exact distribution also gives the plain Monte Carlo variances the modes are measured against
+    exact = None
+    if config.exact or config.variance_reduction:
+        print("Enumerating all interest combinations for the exact distribution...")
+        print()
+        exact = exact_selection_distribution()
+    print_summary(results, exact)
+
+    if config.exact:
+        print()
+        print_exact_comparison(results, exact)
+    return results
+
+if __name__ == "__main__":
+    main()
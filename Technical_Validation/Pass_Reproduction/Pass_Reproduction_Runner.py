@@ -0,0 +1,262 @@
+"""
+Pass Reproduction Runner
+Replays the published simulation passes headlessly, one subprocess per pass, and
+records wall time, events/sec, peak RSS and mixed-pair count for each of them:
+    python Pass_Reproduction_Runner.py --passes all --output-dir pass_reproduction
+    python Pass_Reproduction_Runner.py --passes dl-1,dl-5,mc-2 --charts
+Every pass writes its console log and a JSON record; the runner then writes
+Pass_Reproduction_Report.md, a scaling report in the style of the pass logs.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not available
+    resource = None
+
+# ============================================================================
+# PASS DEFINITIONS
+# ============================================================================
+
+VALIDATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENGINE_SCRIPTS = {
+    'mc': os.path.join(VALIDATION_DIR, 'Monte_Carlo_Sims', 'Montecarlo_Simulation.py'),
+    'dl': os.path.join(VALIDATION_DIR, 'MonteCarlo_AsymSym_DualLine_Sims', 'MonteCarlo_AsymSym_DualLine_Simulation.py')
+}
+ENGINE_TITLES = {
+    'mc': "MONTE CARLO SIMULATION PASSES (Monte_Carlo_Sims)",
+    'dl': "ASYM/SYM DUAL-LINE PASSES (MonteCarlo_AsymSym_DualLine_Sims)"
+}
+
+PassConfig = namedtuple('PassConfig', ['engine', 'number', 'num_users', 'num_rounds', 'num_simulations'])
+
+# The configurations recorded in Monte_Carlo_Sims_Testing.md and MonteCarlo_AsymSym_DualLine_Testing.md
+PASSES = {f"{config.engine}-{config.number}": config for config in [
+    PassConfig('mc', 1, 22, 10, 100),
+    PassConfig('mc', 2, 500, 10, 20),
+    PassConfig('mc', 3, 5000, 10, 20),
+    PassConfig('mc', 4, 10000, 10, 20),
+    PassConfig('mc', 5, 25000, 10, 20),
+    PassConfig('dl', 1, 22, 10, 100),
+    PassConfig('dl', 2, 500, 10, 100),
+    PassConfig('dl', 3, 1000, 10, 10),
+    PassConfig('dl', 4, 5000, 10, 20),
+    PassConfig('dl', 5, 5000, 75, 20),
+    PassConfig('dl', 6, 10000, 10, 20),
+    PassConfig('dl', 7, 25000, 10, 20)
+]}
+
+DEFAULT_OUTPUT_DIR = "pass_reproduction"
+DEFAULT_SEED = 2024
+REPORT_NAME = "Pass_Reproduction_Report.md"
+
+# ============================================================================
+# REPLAYING ONE PASS (runs in its own process)
+# ============================================================================
+
+def load_engine(name):
+    """Import one simulation script as a module (engine only; main() is not run)"""
+    spec = importlib.util.spec_from_file_location(f"{name}_engine", ENGINE_SCRIPTS[name])
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker processes can pickle the simulation functions by module name
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def peak_rss_bytes(who):
+    """Peak resident set size of this process (RUSAGE_SELF) or its reaped workers (RUSAGE_CHILDREN)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def replay_pass(pass_id, output_dir, seed=DEFAULT_SEED, workers=1, charts=False):
+    """Run one pass through the script's own main() and write <pass_id>.log and <pass_id>.json"""
+    config = PASSES[pass_id]
+    argv = ['--users', str(config.num_users), '--rounds', str(config.num_rounds),
+            '--simulations', str(config.num_simulations), '--seed', str(seed), '--workers', str(workers)]
+    argv += ['--chart-dir', os.path.join(output_dir, f"{pass_id}_charts")] if charts else ['--no-plots']
+
+    started = time.perf_counter()
+    with open(os.path.join(output_dir, f"{pass_id}.log"), "w") as log, contextlib.redirect_stdout(log):
+        engine = load_engine(config.engine)
+        results = engine.main(argv)
+    end_to_end = time.perf_counter() - started
+
+    params = results['parameters']
+    events = config.num_users * config.num_rounds * config.num_simulations
+    record = {
+        'pass': pass_id,
+        **config._asdict(),
+        'events': events,
+        'seed': seed,
+        'workers': workers,
+        'charts': charts,
+        'simulation_seconds': params['wall_time_seconds'],
+        'end_to_end_seconds': end_to_end,
+        'events_per_sec': events / params['wall_time_seconds'] if params['wall_time_seconds'] > 0 else None,
+        'peak_rss_bytes': peak_rss_bytes(resource.RUSAGE_SELF) if resource else None,
+        'peak_worker_rss_bytes': peak_rss_bytes(resource.RUSAGE_CHILDREN) if resource else None,
+        'mixed_pairs': int(results['histograms'].totals['match'][-1])
+    }
+    with open(os.path.join(output_dir, f"{pass_id}.json"), "w") as f:
+        json.dump(record, f, indent=2)
+    return record
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def select_passes(selection):
+    """Pass ids for 'all', an engine name ('mc', 'dl') or a comma-separated list of ids"""
+    selected = []
+    for item in selection.split(","):
+        if item == 'all':
+            selected += list(PASSES)
+        elif item in ENGINE_SCRIPTS:
+            selected += [pass_id for pass_id, config in PASSES.items() if config.engine == item]
+        elif item in PASSES:
+            selected.append(item)
+        else:
+            raise ValueError(f"unknown pass {item!r} (choose from all, mc, dl, {', '.join(PASSES)})")
+    return list(dict.fromkeys(selected))
+
+def run_passes(pass_ids, output_dir=DEFAULT_OUTPUT_DIR, seed=DEFAULT_SEED, workers=1, charts=False):
+    """Replay each pass in a fresh interpreter so peak RSS is measured per pass"""
+    os.makedirs(output_dir, exist_ok=True)
+    records = []
+    for pass_id in pass_ids:
+        print(f"Replaying {pass_id} {PASSES[pass_id].num_users}/{PASSES[pass_id].num_rounds}/"
+              f"{PASSES[pass_id].num_simulations}...", flush=True)
+        command = [sys.executable, os.path.abspath(__file__), 'replay', pass_id, '--output-dir', output_dir,
+                   '--seed', str(seed), '--workers', str(workers)] + (['--charts'] if charts else [])
+        completed = subprocess.run(command)
+        if completed.returncode != 0:
+            print(f"  {pass_id} failed (exit code {completed.returncode}); see {pass_id}.log")
+            continue
+        with open(os.path.join(output_dir, f"{pass_id}.json")) as f:
+            record = json.load(f)
+        records.append(record)
+        print(f"  {record['simulation_seconds']:.1f}s simulation, {record['end_to_end_seconds']:.1f}s end to end, "
+              f"{record['events_per_sec']:,.0f} events/sec, {record['mixed_pairs']:,} mixed pairs")
+    return records
+
+# ============================================================================
+# SCALING REPORT
+# ============================================================================
+
+def format_bytes(value):
+    return "n/a" if value is None else f"{value / 2**20:,.0f} MiB"
+
+def scaling_exponent(records, key):
+    """Least-squares b in seconds ~ events^b over the given passes (None with fewer than two sizes)"""
+    events = np.array([record['events'] for record in records], dtype=np.float64)
+    seconds = np.array([record[key] for record in records], dtype=np.float64)
+    if len(np.unique(events)) < 2 or (seconds <= 0).any():
+        return None
+    return float(np.polyfit(np.log(events), np.log(seconds), 1)[0])
+
+def banner(title, width=70):
+    return ["=" * width, "", title, "", "=" * width, ""]
+
+def render_report(records):
+    """Markdown scaling report (pass-log style banners plus one table per engine)"""
+    first = records[0] if records else {}
+    lines = [" "] + banner("PASS REPRODUCTION SCALING REPORT")
+    lines += [
+        "Environment:",
+        f"  - Python {platform.python_version()}, NumPy {np.__version__}, {platform.platform()}",
+        f"  - CPUs: {os.cpu_count()}, worker processes per pass: {first.get('workers', 'n/a')}",
+        f"  - Seed: {first.get('seed', 'n/a')}, charts: {'rendered' if first.get('charts') else 'off (--no-plots)'}",
+        ""
+    ]
+
+    for engine, title in ENGINE_TITLES.items():
+        engine_records = [record for record in records if record['engine'] == engine]
+        if not engine_records:
+            continue
+        lines += banner(title)
+        lines += [
+            "| Pass | Users | Rounds | Sims | Events | Simulation | End to end | Events/sec | Peak RSS | "
+            "Peak worker RSS | Mixed pairs |",
+            "|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|"
+        ]
+        for record in engine_records:
+            lines.append(
+                f"| {record['number']} | {record['num_users']:,} | {record['num_rounds']} | "
+                f"{record['num_simulations']} | {record['events']:,} | {record['simulation_seconds']:.2f}s | "
+                f"{record['end_to_end_seconds']:.2f}s | {record['events_per_sec']:,.0f} | "
+                f"{format_bytes(record['peak_rss_bytes'])} | {format_bytes(record['peak_worker_rss_bytes'])} | "
+                f"{record['mixed_pairs']:,} |"
+            )
+        lines.append("")
+
+        lines.append("Scaling:")
+        exponent = scaling_exponent(engine_records, 'simulation_seconds')
+        if exponent is not None:
+            lines.append(f"  - Simulation time grows as events^{exponent:.2f} (1.00 = linear)")
+        fastest = max(engine_records, key=lambda record: record['events_per_sec'])
+        slowest = min(engine_records, key=lambda record: record['events_per_sec'])
+        lines.append(f"  - Throughput: {slowest['events_per_sec']:,.0f} events/sec (pass {slowest['number']}) to "
+                     f"{fastest['events_per_sec']:,.0f} events/sec (pass {fastest['number']})")
+        # Same users, different rounds: the per-round cost once the population and dice exist
+        by_users = {}
+        for record in engine_records:
+            by_users.setdefault(record['num_users'], []).append(record)
+        for num_users, group in by_users.items():
+            rounds = sorted({record['num_rounds'] for record in group})
+            if len(rounds) > 1:
+                low = next(record for record in group if record['num_rounds'] == rounds[0])
+                high = next(record for record in group if record['num_rounds'] == rounds[-1])
+                lines.append(f"  - {num_users:,} users: {rounds[0]} -> {rounds[-1]} rounds changes throughput "
+                             f"{high['events_per_sec'] / low['events_per_sec']:.2f}x")
+        peak = max(engine_records, key=lambda record: record['peak_rss_bytes'] or 0)
+        lines.append(f"  - Largest peak RSS: {format_bytes(peak['peak_rss_bytes'])} "
+                     f"({peak['num_users']:,} users, {peak['num_rounds']} rounds)")
+        lines.append("")
+    return "\n".join(lines)
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the published simulation passes and report their cost")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "replay"],
+                        help="'replay' runs a single pass in this process (used by 'run')")
+    parser.add_argument("pass_id", nargs="?")
+    parser.add_argument("--passes", default="all", help="all, mc, dl or comma-separated ids such as dl-1,mc-3")
+    parser.add_argument("--output-dir", dest="output_dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--charts", action="store_true", help="render the charts as PNGs (default: --no-plots)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "replay":
+        replay_pass(args.pass_id, args.output_dir, args.seed, args.workers, args.charts)
+        return 0
+
+    records = run_passes(select_passes(args.passes), args.output_dir, args.seed, args.workers, args.charts)
+    report_path = os.path.join(args.output_dir, REPORT_NAME)
+    with open(report_path, "w") as f:
+        f.write(render_report(records))
+    print(f"Scaling report written to {report_path}")
+    return 0 if records else 1
+
+if __name__ == "__main__":
+    sys.exit(main())